@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+"""
+Выравнивание церковнославянского текста молитвы (content) с современным переводом (contentModern)
+Оба поля делятся на предложения, предложения сопоставляются динамическим программированием
+в полосе вокруг диагонали по сходству основ слов. Непокрытые предложения оригинала
+показывают пропуски и обрезанные переводы, лишние предложения перевода - вставки
+"""
+
+import argparse
+import csv
+import json
+import os
+import sys
+from functools import partial
+from multiprocessing import Pool
+from typing import Any, Dict, FrozenSet, List, NamedTuple, Optional, Set, Tuple
+
+from corpus_reader import PRAYERS_DIR, extract_tokens, load_prayer, resolve_paths
+from packed_corpus import PACK_FILE, get_packed_corpus
+from text_chunker import sentence_spans
+from word_families import stem_word
+
+# Минимальное сходство (коэффициент Дайса по основам), при котором предложения считаются парой
+MIN_SIMILARITY = 0.2
+
+# Слияние двух предложений с одним (1:2 и 2:1) весит больше пары 1:1,
+# иначе разбитое переводчиком предложение выравнивается с одной половиной
+MERGE_WEIGHT = 1.5
+
+# Запас полосы по обе стороны от диагонали сверх отклонения обрезанного перевода
+BAND_MARGIN = 8
+
+# Доля покрытых слов оригинала, ниже которой перевод считается неполным
+MIN_COVERAGE = 0.9
+
+# Если непокрытый хвост оригинала больше этой доли слов, перевод считается обрезанным
+TRUNCATED_TAIL = 0.2
+
+# Хвост - самый длинный конец оригинала, в котором покрыто меньше этой доли слов.
+# Отдельные случайные пары в хвосте (повторяющиеся припевы) его не обрывают
+TAIL_MAX_COVERED = 0.5
+
+# Хвост ищется, только если и последние TAIL_END_SHARE слов покрыты так же редко:
+# перевод, дошедший до конца, неполон в середине, а не обрезан
+TAIL_END_SHARE = 0.05
+
+# Сколько непокрытых предложений показывать в отчете для каждой молитвы
+MAX_LISTED = 10
+
+# Поля, которые нужны выравниванию: из упакованного корпуса читаются только они
+ALIGN_FIELDS = ["url", "title", "content", "contentModern"]
+
+STATUS_OK = "ok"
+STATUS_INCOMPLETE = "incomplete"
+STATUS_TRUNCATED = "truncated"
+STATUS_NO_MODERN = "no_modern"
+STATUS_ERROR = "error"
+
+# Ходы выравнивания: сколько предложений оригинала и перевода забирает шаг
+MOVES = ((1, 1), (1, 2), (2, 1), (1, 0), (0, 1))
+
+
+class Segment(NamedTuple):
+    """Предложение поля и основы его слов"""
+    start: int
+    end: int
+    words: int
+    stems: FrozenSet[str]
+
+
+def segment_text(text: str) -> List[Segment]:
+    """Предложения текста; предложения без слов (номера стихов, знаки) пропускаются"""
+    segments = []
+    for start, end in sentence_spans(text):
+        tokens = extract_tokens(text[start:end])
+        if tokens:
+            segments.append(Segment(start, end, len(tokens), frozenset(stem_word(token) for token in tokens)))
+    return segments
+
+
+def dice(left: FrozenSet[str], right: FrozenSet[str]) -> float:
+    return 2.0 * len(left & right) / (len(left) + len(right))
+
+
+def align_segments(original: List[Segment], modern: List[Segment]) -> Optional[List[Tuple[int, int, int, int, float]]]:
+    """
+    Выравнивание в полосе: шаги 1:1, 1:2, 2:1 и пропуски с обеих сторон
+    Полоса идет вдоль диагонали j = i * m / n. Ее полуширина - наибольшее отклонение
+    от диагонали перевода, обрезанного с конца или с начала (min(n, m) * |n - m| / max(n, m)),
+    но не меньше шага диагонали между строками (max(n, m) / min(n, m)), иначе соседние
+    строки полосы не пересекаются; плюс BAND_MARGIN. Время O(n * (|n - m| + BAND_MARGIN)), а не O(n * m)
+    Возвращает пары (начало и конец в оригинале, начало и конец в переводе, сходство)
+    или None, если путь через полосу не найден
+    """
+    n, m = len(original), len(modern)
+    deviation = -(-min(n, m) * abs(n - m) // max(n, m))
+    step = -(-max(n, m) // min(n, m))
+    slack = max(deviation, step) + BAND_MARGIN
+    # lows[i]..highs[i] - допустимые j в строке i; score[i][j - lows[i]] - лучший вес
+    # выравнивания первых i и j предложений
+    lows = [max(0, i * m // n - slack) for i in range(n + 1)]
+    highs = [min(m, -(-i * m // n) + slack) for i in range(n + 1)]
+    score = [[-1.0] * (highs[i] - lows[i] + 1) for i in range(n + 1)]
+    back: List[List[Optional[Tuple[int, int, float]]]] = [[None] * len(row) for row in score]
+    score[0][0] = 0.0
+
+    for i in range(n + 1):
+        for j in range(lows[i], highs[i] + 1):
+            if i == 0 and j == 0:
+                continue
+            best = -1.0
+            best_move = None
+            for di, dj in MOVES:
+                pi, pj = i - di, j - dj
+                if pi < 0 or pj < 0 or not lows[pi] <= pj <= highs[pi]:
+                    continue
+                previous = score[pi][pj - lows[pi]]
+                if previous < 0:
+                    continue
+                similarity = 0.0
+                gain = 0.0
+                if di and dj:
+                    left = original[pi].stems if di == 1 else original[pi].stems | original[pi + 1].stems
+                    right = modern[pj].stems if dj == 1 else modern[pj].stems | modern[pj + 1].stems
+                    similarity = dice(left, right)
+                    if similarity < MIN_SIMILARITY:
+                        continue
+                    gain = similarity if di + dj == 2 else similarity * MERGE_WEIGHT
+                if previous + gain > best:
+                    best = previous + gain
+                    best_move = (di, dj, similarity)
+            score[i][j - lows[i]] = best
+            back[i][j - lows[i]] = best_move
+
+    if back[n][m - lows[n]] is None:
+        return None
+
+    pairs = []
+    i, j = n, m
+    while i or j:
+        di, dj, similarity = back[i][j - lows[i]]
+        if di and dj:
+            pairs.append((i - di, i, j - dj, j, similarity))
+        i, j = i - di, j - dj
+    pairs.reverse()
+    return pairs
+
+
+def preview(text: str, segment: Segment) -> str:
+    return " ".join(text[segment.start:min(segment.end, segment.start + 80)].split())
+
+
+def uncovered_tail(segments: List[Segment], matched: Set[int]) -> int:
+    """Непокрытые слова в самом длинном конце текста, где покрыто меньше TAIL_MAX_COVERED слов"""
+    total = sum(segment.words for segment in segments)
+    tail = 0
+    words = 0
+    covered = 0
+    for i in range(len(segments) - 1, -1, -1):
+        words += segments[i].words
+        if i in matched:
+            covered += segments[i].words
+        sparse = covered < TAIL_MAX_COVERED * words
+        if not sparse and words - segments[i].words < TAIL_END_SHARE * total:
+            return 0
+        if sparse:
+            tail = max(tail, words - covered)
+    return tail
+
+
+def align_prayer(content: str, modern: str, details: bool = False) -> Dict[str, Any]:
+    """Выравнивает оригинал с переводом и считает покрытие оригинала по словам"""
+    original_segments = segment_text(content)
+    modern_segments = segment_text(modern)
+    total_words = sum(segment.words for segment in original_segments)
+
+    if extract_tokens(content) == extract_tokens(modern):
+        # Перевод совпадает с оригиналом с точностью до нормализации - выравнивать нечего
+        pairs = [(i, i + 1, i, i + 1, 1.0) for i in range(len(original_segments))]
+    elif original_segments and modern_segments:
+        pairs = align_segments(original_segments, modern_segments)
+    else:
+        pairs = []
+    aligned = pairs is not None
+    pairs = pairs or []
+
+    matched_original = set()
+    matched_modern = set()
+    for o_start, o_end, m_start, m_end, _ in pairs:
+        matched_original.update(range(o_start, o_end))
+        matched_modern.update(range(m_start, m_end))
+
+    covered_words = sum(original_segments[i].words for i in matched_original)
+    tail_words = uncovered_tail(original_segments, matched_original)
+
+    missing = [i for i in range(len(original_segments)) if i not in matched_original]
+    extra = [j for j in range(len(modern_segments)) if j not in matched_modern]
+    result = {
+        "original_segments": len(original_segments),
+        "modern_segments": len(modern_segments),
+        "aligned": aligned,
+        "matched_pairs": len(pairs),
+        "coverage": round(covered_words / total_words, 3) if total_words else 1.0,
+        "tail_missing": round(tail_words / total_words, 3) if total_words else 0.0,
+        "missing_count": len(missing),
+        "extra_count": len(extra),
+        "missing": [
+            {"segment": i + 1, "offset": original_segments[i].start, "preview": preview(content, original_segments[i])}
+            for i in missing[:MAX_LISTED]
+        ],
+        "extra": [
+            {"segment": j + 1, "offset": modern_segments[j].start, "preview": preview(modern, modern_segments[j])}
+            for j in extra[:MAX_LISTED]
+        ],
+    }
+    if details:
+        result["alignment"] = [
+            {"original": [o_start + 1, o_end], "modern": [m_start + 1, m_end], "similarity": round(similarity, 3)}
+            for o_start, o_end, m_start, m_end, similarity in pairs
+        ]
+    return result
+
+
+def read_align_fields(file_path: str, pack_file: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Поля для выравнивания: из упакованного корпуса (packed_corpus.py), если в нем
+    текущая версия файла, иначе из самого файла
+    """
+    if pack_file and os.path.dirname(os.path.abspath(file_path)) == os.path.abspath(PRAYERS_DIR):
+        data = get_packed_corpus(pack_file).get_file(file_path, ALIGN_FIELDS)
+        if data is not None:
+            return data
+    return load_prayer(file_path)
+
+
+def align_prayer_file(file_path: str, min_coverage: float = MIN_COVERAGE, details: bool = False,
+                      pack_file: Optional[str] = None) -> Dict[str, Any]:
+    """Строка отчета для одного файла молитвы (для пакетного режима)"""
+    result = {"file": file_path, "url": "", "title": "", "status": STATUS_ERROR, "coverage": 0.0, "error": ""}
+    data = read_align_fields(file_path, pack_file)
+    if data is None:
+        result["error"] = "Не удалось загрузить файл"
+        return result
+
+    result["url"] = data.get("url") or os.path.basename(file_path)[:-len('.json')]
+    result["title"] = data.get("title", "Неизвестно")
+    content = data.get("content")
+    modern = data.get("contentModern")
+    if not isinstance(content, str) or not content.strip():
+        result["error"] = "Нет поля content"
+        return result
+    if not isinstance(modern, str) or not modern.strip():
+        result["status"] = STATUS_NO_MODERN
+        return result
+
+    result.update(align_prayer(content, modern, details))
+    if not result["aligned"]:
+        # Выравнивание не нашлось: перевод нужно смотреть вручную, но пакет не падает
+        result["status"] = STATUS_INCOMPLETE
+        result["error"] = "Не удалось выровнять предложения"
+    elif result["tail_missing"] >= TRUNCATED_TAIL:
+        result["status"] = STATUS_TRUNCATED
+    elif result["coverage"] < min_coverage:
+        result["status"] = STATUS_INCOMPLETE
+    else:
+        result["status"] = STATUS_OK
+    return result
+
+
+def align_batch(file_paths: List[str], jobs: int = 1, min_coverage: float = MIN_COVERAGE,
+                details: bool = False, pack_file: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Выравнивает все файлы в одном процессе или в пуле из jobs процессов"""
+    align = partial(align_prayer_file, min_coverage=min_coverage, details=details, pack_file=pack_file)
+    if jobs <= 1:
+        return [align(path) for path in file_paths]
+    with Pool(jobs) as pool:
+        return pool.map(align, file_paths, chunksize=max(1, len(file_paths) // (jobs * 8)))
+
+
+def summarize_batch(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Сводка: сколько переводов полные, неполные, обрезанные и какие покрывают оригинал хуже всего"""
+    aligned = [r for r in results if r["status"] in (STATUS_OK, STATUS_INCOMPLETE, STATUS_TRUNCATED)]
+    worst = sorted((r for r in aligned if r["status"] != STATUS_OK), key=lambda r: (r["coverage"], r["url"]))
+    return {
+        "total": len(results),
+        "ok": sum(1 for r in results if r["status"] == STATUS_OK),
+        "incomplete": sum(1 for r in results if r["status"] == STATUS_INCOMPLETE),
+        "truncated": sum(1 for r in results if r["status"] == STATUS_TRUNCATED),
+        "no_modern": sum(1 for r in results if r["status"] == STATUS_NO_MODERN),
+        "errors": sum(1 for r in results if r["status"] == STATUS_ERROR),
+        "mean_coverage": round(sum(r["coverage"] for r in aligned) / len(aligned), 3) if aligned else 0.0,
+        "worst": [(r["url"], r["coverage"], r["status"]) for r in worst[:20]],
+    }
+
+
+def write_report(report_path: str, results: List[Dict[str, Any]], summary: Dict[str, Any]):
+    """Пишет отчет в JSON или CSV (по расширению файла)"""
+    report_dir = os.path.dirname(report_path)
+    if report_dir:
+        os.makedirs(report_dir, exist_ok=True)
+
+    if report_path.endswith('.csv'):
+        with open(report_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["file", "url", "status", "coverage", "tail_missing", "original_segments",
+                             "modern_segments", "missing_count", "extra_count", "first_missing", "error"])
+            for r in results:
+                first_missing = r["missing"][0]["preview"] if r.get("missing") else ""
+                writer.writerow([r["file"], r["url"], r["status"], r["coverage"], r.get("tail_missing", ""),
+                                 r.get("original_segments", ""), r.get("modern_segments", ""),
+                                 r.get("missing_count", ""), r.get("extra_count", ""), first_missing, r["error"]])
+    else:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump({"summary": summary, "files": results}, f, ensure_ascii=False, indent=2)
+
+
+def print_prayer(result: Dict[str, Any]):
+    """Печатает выравнивание одной молитвы"""
+    print(f"📄 {result['title']} ({result['url']})")
+    if result["status"] in (STATUS_ERROR, STATUS_NO_MODERN):
+        print(f"❌ {result['error'] or 'Нет поля contentModern'}")
+        return
+    print(f"📝 Предложений: оригинал {result['original_segments']}, перевод {result['modern_segments']}, "
+          f"пар {result['matched_pairs']}")
+    print(f"📊 Покрытие оригинала: {result['coverage']:.1%}, непокрытый хвост: {result['tail_missing']:.1%}")
+    for title, key, count_key in (("Нет в переводе", "missing", "missing_count"),
+                                  ("Лишнее в переводе", "extra", "extra_count")):
+        if result[key]:
+            print(f"⚠️  {title} ({result[count_key]}):")
+            for item in result[key]:
+                print(f"   - предложение {item['segment']} (символ {item['offset']}): {item['preview']}")
+    verdict = {STATUS_OK: "✅ Перевод полный", STATUS_INCOMPLETE: "⚠️  Перевод неполный",
+               STATUS_TRUNCATED: "✂️  Перевод обрезан"}
+    print(verdict[result["status"]])
+
+
+def parse_args() -> argparse.Namespace:
+    """Разбирает аргументы командной строки"""
+    parser = argparse.ArgumentParser(
+        description="Выравнивание content и contentModern: поиск пропусков и обрезанных переводов",
+        epilog="Пример: python align_translation.py data/prayers/chas-shestoy.json\n"
+               "Пакетно: python align_translation.py data/prayers --jobs 4 --report reports/alignment.json",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("paths", nargs="*", default=[PRAYERS_DIR],
+                        help=f"файл, каталог или glob-шаблон (по умолчанию {PRAYERS_DIR})")
+    parser.add_argument("--report", help="путь к отчету .json или .csv")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="количество процессов")
+    parser.add_argument("--min-coverage", type=float, default=MIN_COVERAGE,
+                        help=f"доля слов оригинала, покрытая переводом, ниже которой перевод неполный "
+                             f"(по умолчанию {MIN_COVERAGE})")
+    parser.add_argument("--details", action="store_true",
+                        help="добавить в отчет все пары выровненных предложений")
+    parser.add_argument("--fail-on-incomplete", action="store_true",
+                        help="код возврата 1, если есть неполные или обрезанные переводы (для CI)")
+    parser.add_argument("--no-pack", action="store_true",
+                        help=f"читать файлы молитв, даже если есть упакованный корпус {PACK_FILE}")
+    return parser.parse_args()
+
+
+def main():
+    """Главная функция"""
+    args = parse_args()
+    file_paths = resolve_paths(args.paths)
+    if not file_paths:
+        print(f"Файлы не найдены: {' '.join(args.paths)}")
+        sys.exit(1)
+
+    pack_file = None if args.no_pack or not os.path.exists(PACK_FILE) else PACK_FILE
+    print(f"🔍 Выравниваем {len(file_paths)} файлов (процессов: {args.jobs})...")
+    if pack_file:
+        print(f"📦 Тексты берутся из {pack_file} (измененные после упаковки файлы читаются напрямую)")
+    results = align_batch(file_paths, args.jobs, args.min_coverage, args.details, pack_file)
+    summary = summarize_batch(results)
+
+    if len(results) == 1:
+        print_prayer(results[0])
+    else:
+        print(f"\n📋 СВОДКА:")
+        print(f"   Всего файлов: {summary['total']}")
+        print(f"   Полный перевод: {summary['ok']}")
+        print(f"   Неполный перевод: {summary['incomplete']}")
+        print(f"   Обрезанный перевод: {summary['truncated']}")
+        print(f"   Без contentModern: {summary['no_modern']}")
+        if summary['errors']:
+            print(f"   Ошибки чтения: {summary['errors']}")
+        print(f"   Среднее покрытие: {summary['mean_coverage']:.1%}")
+        if summary['worst']:
+            print("   Хуже всего покрыты:")
+            for url, coverage, status in summary['worst'][:10]:
+                print(f"     - {url}: {coverage:.1%} ({status})")
+
+    if args.report:
+        write_report(args.report, results, summary)
+        print(f"💾 Отчет сохранен в: {args.report}")
+
+    if args.fail_on_incomplete and (summary['incomplete'] or summary['truncated']):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
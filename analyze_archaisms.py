@@ -2,148 +2,282 @@
 """
 Интерактивный инструмент для анализа слов на предмет архаизмов
 Читает файлы со словами и позволяет вручную классифицировать их
+Решения хранятся в extracted_words/review.sqlite, поэтому проверку можно продолжить с того же места
 """
 
+import argparse
 import os
-import json
-from typing import Set, Dict
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Set
+
+from collocations import load_collocations, phrases_by_word
+from review_store import REVIEW_DB, VERDICT_NO, VERDICT_SKIP, VERDICT_YES, ReviewStore
+from word_families import build_families, stem_word
+
+ARCHAISMS_FILE = "extracted_words/archaisms.txt"
+WORDS_DIR = "extracted_words"
+FREQUENCY_FILE = "extracted_words/word_frequency.txt"
+
+# Как часто печатать покрытие корпуса во время проверки
+COVERAGE_EVERY = 10
 
 def load_existing_archaisms() -> Set[str]:
     """Загружает уже существующие архаизмы из файла"""
-    archaisms_file = "extracted_words/archaisms.txt"
     archaisms = set()
-    
-    if os.path.exists(archaisms_file):
-        with open(archaisms_file, 'r', encoding='utf-8') as f:
+
+    if os.path.exists(ARCHAISMS_FILE):
+        with open(ARCHAISMS_FILE, 'r', encoding='utf-8') as f:
             for line in f:
                 word = line.strip()
                 if word and not word.startswith('#'):
                     archaisms.add(word)
-    
+
     return archaisms
 
 def save_archaisms(archaisms: Set[str]):
     """Сохраняет архаизмы в файл"""
-    archaisms_file = "extracted_words/archaisms.txt"
-    
-    with open(archaisms_file, 'w', encoding='utf-8') as f:
+    with open(ARCHAISMS_FILE, 'w', encoding='utf-8') as f:
         f.write("# Словарь архаизмов из молитв\n")
         f.write("# Слова, которые являются архаичными и нуждаются в современном переводе\n\n")
-        
+
         for word in sorted(archaisms):
             f.write(f"{word}\n")
 
-def analyze_word_chunk(chunk_file: str, existing_archaisms: Set[str]) -> Set[str]:
-    """Анализирует один файл со словами"""
-    print(f"\n🔍 Анализируем файл: {chunk_file}")
-    
+def append_archaism(word: str) -> bool:
+    """
+    Дописывает одно слово в конец файла архаизмов, не переписывая его целиком
+    Слово, которое уже есть в файле, не дописывается; возвращает True, если слово добавлено
+    """
+    if not os.path.exists(ARCHAISMS_FILE):
+        save_archaisms(set())
+    elif word in load_existing_archaisms():
+        return False
+    with open(ARCHAISMS_FILE, 'rb+') as f:
+        # Файл может заканчиваться без перевода строки
+        prefix = b""
+        if f.seek(0, os.SEEK_END) > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                prefix = b"\n"
+        f.write(prefix + f"{word}\n".encode('utf-8'))
+    return True
+
+def load_chunk_words(chunk_file: str) -> List[str]:
+    """Читает слова из одного файла words_chunk_*.txt"""
     with open(chunk_file, 'r', encoding='utf-8') as f:
         lines = f.readlines()
-    
+
     # Пропускаем заголовочные строки
     words = []
     for line in lines:
         line = line.strip()
         if line and not line.startswith('#') and not line.startswith('Всего'):
             words.append(line)
-    
-    print(f"📊 Слов для анализа: {len(words)}")
-    
-    new_archaisms = set()
-    
-    for i, word in enumerate(words, 1):
-        if word in existing_archaisms:
-            continue  # Уже классифицировано
-            
-        print(f"\n[{i}/{len(words)}] Слово: '{word}'")
-        print("Это архаизм? (y/n/s - пропустить файл/q - выйти)")
-        
-        choice = input().lower().strip()
-        
+    return words
+
+def list_chunk_files() -> List[str]:
+    """Находит все файлы со словами в порядке номеров"""
+    chunk_files = []
+    for filename in os.listdir(WORDS_DIR):
+        if filename.startswith("words_chunk_") and filename.endswith(".txt"):
+            chunk_files.append(os.path.join(WORDS_DIR, filename))
+    return sorted(chunk_files)
+
+def iter_chunk_words() -> Iterator[str]:
+    """Все слова из файлов со словами по порядку"""
+    for chunk_file in list_chunk_files():
+        yield from load_chunk_words(chunk_file)
+
+def load_word_frequencies() -> Counter:
+    """Читает word_frequency.txt (строки 'слово - количество') в Counter"""
+    frequencies = Counter()
+    if not os.path.exists(FREQUENCY_FILE):
+        return frequencies
+
+    with open(FREQUENCY_FILE, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.startswith('#') or ' - ' not in line:
+                continue
+            word, _, count = line.strip().rpartition(' - ')
+            if count.isdigit():
+                frequencies[word] = int(count)
+    return frequencies
+
+class CoverageTracker:
+    """Доля всех вхождений слов в корпусе, покрытая проверенными словами"""
+
+    def __init__(self, frequencies: Counter, decisions: Dict[str, str]):
+        self.frequencies = frequencies
+        self.total = sum(frequencies.values())
+        self.covered = sum(frequencies[word] for word, verdict in decisions.items()
+                           if verdict != VERDICT_SKIP)
+
+    def add(self, word: str):
+        self.covered += self.frequencies.get(word, 0)
+
+    def percent(self) -> float:
+        return 100.0 * self.covered / self.total if self.total else 0.0
+
+    def report(self) -> str:
+        return (f"проверенные слова покрывают {self.percent():.1f}% всех вхождений "
+                f"({self.covered} из {self.total})")
+
+def build_queue(store: ReviewStore, order: str, include_skipped: bool) -> List[str]:
+    """
+    Очередь непроверенных слов
+    frequency - сначала самые частые слова корпуса, alpha - по файлам words_chunk_*.txt
+    """
+    if order == "frequency":
+        frequencies = load_word_frequencies()
+        if frequencies:
+            ranked = sorted(frequencies, key=lambda word: (-frequencies[word], word))
+            return list(store.pending(ranked, include_skipped))
+        print(f"Файл {FREQUENCY_FILE} не найден, проверяем в алфавитном порядке")
+    return list(store.pending(iter_chunk_words(), include_skipped))
+
+def choose_family_forms(forms: List[str]) -> List[str]:
+    """
+    Спрашивает, какие формы семейства исключить из решения
+    Формы указываются номерами или словами через пробел; Enter - решение для всех форм
+    """
+    print("Применить ко всем формам? (Enter - да, или номера/формы, которые исключить)")
+    try:
+        answer = input().lower().replace(',', ' ').split()
+    except (EOFError, KeyboardInterrupt):
+        answer = []
+    excluded = set()
+    for item in answer:
+        if item.isdigit() and 1 <= int(item) <= len(forms):
+            excluded.add(forms[int(item) - 1])
+        elif item in forms:
+            excluded.add(item)
+        else:
+            print(f"   Нет такой формы: {item}")
+    if excluded:
+        print(f"   Исключены: {', '.join(form for form in forms if form in excluded)}")
+    return [form for form in forms if form not in excluded]
+
+def review_words(store: ReviewStore, queue: List[str], coverage: CoverageTracker,
+                 families: Dict[str, List[str]], phrases: Optional[Dict[str, List[str]]] = None) -> int:
+    """
+    Задает вопросы по словам из очереди, каждое решение сохраняется сразу
+    Решение применяется к еще не проверенным формам того же семейства, кроме тех,
+    которые проверяющий исключил (если families пустой - только к самому слову)
+    phrases - устойчивые сочетания со словом, показываются как контекст
+    Возвращает количество принятых решений
+    """
+    answered = 0
+    decided: Set[str] = set()
+
+    for i, word in enumerate(queue, 1):
+        if word in decided:
+            continue
+
+        forms = [word]
+        if families:
+            forms += [form for form in families.get(stem_word(word), [])
+                      if form != word and form not in decided and store.verdict(form) is None]
+
+        print(f"\n[{i}/{len(queue)}] Слово: '{word}' (вхождений: {coverage.frequencies.get(word, 0)})")
+        if len(forms) > 1:
+            print(f"   Формы семейства: {' '.join(f'{n}) {form}' for n, form in enumerate(forms[1:], 1))}")
+        if phrases and word in phrases:
+            print(f"   Сочетания: {', '.join(phrases[word])}")
+        print("Это архаизм? (y/n/s - отложить/q - выйти)")
+
+        try:
+            choice = input().lower().strip()
+        except (EOFError, KeyboardInterrupt):
+            # Все ответы уже сохранены, можно просто выйти
+            break
+
         if choice == 'q':
-            return new_archaisms
-        elif choice == 's':
-            print("Пропускаем файл...")
-            return new_archaisms
-        elif choice == 'y':
-            new_archaisms.add(word)
-            print(f"✅ '{word}' добавлен в архаизмы")
+            break
+        if choice in ('y', 'n') and len(forms) > 1:
+            forms = [word] + choose_family_forms(forms[1:])
+
+        if choice == 'y':
+            store.record(word, VERDICT_YES)
+            store.record_many(forms[1:], VERDICT_YES, source=f"family:{word}")
+            for form in forms:
+                append_archaism(form)
+            print(f"✅ '{word}' добавлен в архаизмы (форм: {len(forms)})")
         elif choice == 'n':
-            print(f"❌ '{word}' не архаизм")
+            store.record(word, VERDICT_NO)
+            store.record_many(forms[1:], VERDICT_NO, source=f"family:{word}")
+            print(f"❌ '{word}' не архаизм (форм: {len(forms)})")
+        elif choice == 's':
+            store.record(word, VERDICT_SKIP)
+            print(f"⏭  '{word}' отложен")
+            forms = [word]
         else:
-            print("Неверный выбор, пропускаем...")
-    
-    return new_archaisms
+            print("Неверный выбор, спросим в следующий раз...")
+            continue
+        answered += 1
+        decided.update(forms)
+        if choice != 's':
+            for form in forms:
+                coverage.add(form)
+        if answered % COVERAGE_EVERY == 0:
+            print(f"📈 Покрытие: {coverage.report()}")
+
+    return answered
+
+def print_store_stats(store: ReviewStore):
+    counts = store.counts()
+    print(f"📚 Решения: архаизмов {counts[VERDICT_YES]}, не архаизмов {counts[VERDICT_NO]}, "
+          f"отложено {counts[VERDICT_SKIP]}")
+
+def parse_args() -> argparse.Namespace:
+    """Разбирает аргументы командной строки"""
+    parser = argparse.ArgumentParser(description="Ручная проверка слов на архаизмы")
+    parser.add_argument("--order", choices=["frequency", "alpha"], default="frequency",
+                        help="порядок очереди: по частоте в корпусе (по умолчанию) или по алфавиту")
+    parser.add_argument("--no-families", action="store_true",
+                        help="не распространять решение на другие формы того же слова")
+    parser.add_argument("--skipped", action="store_true",
+                        help="показать также отложенные ранее слова")
+    parser.add_argument("--export", action="store_true",
+                        help="пересобрать archaisms.txt из хранилища решений и выйти")
+    return parser.parse_args()
 
 def main():
     """Главная функция"""
+    args = parse_args()
     print("🔍 Интерактивный анализ слов на предмет архаизмов")
-    
-    # Загружаем существующие архаизмы
-    existing_archaisms = load_existing_archaisms()
-    print(f"📚 Уже найдено архаизмов: {len(existing_archaisms)}")
-    
-    if existing_archaisms:
-        print("Существующие архаизмы:")
-        for arch in sorted(list(existing_archaisms)[:10]):
-            print(f"  - {arch}")
-        if len(existing_archaisms) > 10:
-            print(f"  ... и еще {len(existing_archaisms) - 10}")
-    
-    # Находим все файлы со словами
-    words_dir = "extracted_words"
-    chunk_files = []
-    
-    for filename in os.listdir(words_dir):
-        if filename.startswith("words_chunk_") and filename.endswith(".txt"):
-            chunk_files.append(os.path.join(words_dir, filename))
-    
-    chunk_files.sort()
-    
-    print(f"\n📁 Найдено файлов со словами: {len(chunk_files)}")
-    
-    # Спрашиваем, с какого файла начать
-    if existing_archaisms:
-        print("\nС какого файла начать анализ? (номер файла или 'all' для всех)")
-        start_choice = input().strip()
-        
-        if start_choice.isdigit():
-            start_index = int(start_choice) - 1
-            if 0 <= start_index < len(chunk_files):
-                chunk_files = chunk_files[start_index:]
-            else:
-                print("Неверный номер файла")
-                return
-        elif start_choice.lower() != 'all':
-            print("Начинаем с первого файла")
-    
-    all_archaisms = existing_archaisms.copy()
-    
-    # Анализируем каждый файл
-    for i, chunk_file in enumerate(chunk_files):
-        print(f"\n{'='*50}")
-        print(f"Файл {i+1}/{len(chunk_files)}: {os.path.basename(chunk_file)}")
-        
-        new_archaisms = analyze_word_chunk(chunk_file, all_archaisms)
-        all_archaisms.update(new_archaisms)
-        
-        print(f"\n📊 Статистика:")
-        print(f"  Новых архаизмов в файле: {len(new_archaisms)}")
-        print(f"  Всего архаизмов: {len(all_archaisms)}")
-        
-        # Сохраняем промежуточные результаты
-        save_archaisms(all_archaisms)
-        
-        # Спрашиваем, продолжать ли
-        if i < len(chunk_files) - 1:
-            print(f"\nПродолжить анализ следующего файла? (y/n)")
-            continue_choice = input().lower().strip()
-            if continue_choice != 'y':
-                break
-    
-    print(f"\n✅ Анализ завершен!")
-    print(f"📊 Итого найдено архаизмов: {len(all_archaisms)}")
-    print(f"💾 Результаты сохранены в: extracted_words/archaisms.txt")
+
+    store = ReviewStore()
+    try:
+        # Переносим архаизмы из файла в хранилище при каждом запуске: INSERT OR IGNORE
+        # добавляет только слова, дописанные в файл вручную, и не трогает принятые решения
+        imported = store.import_words(load_existing_archaisms(), VERDICT_YES, source="archaisms.txt")
+        if imported:
+            print(f"📥 Импортировано из {ARCHAISMS_FILE}: {imported}")
+        print_store_stats(store)
+
+        if args.export:
+            save_archaisms(set(store.words_with_verdict(VERDICT_YES)))
+            print(f"💾 Файл {ARCHAISMS_FILE} пересобран из {REVIEW_DB}")
+            return
+
+        coverage = CoverageTracker(load_word_frequencies(), store.decisions())
+        print(f"📈 Покрытие: {coverage.report()}")
+
+        queue = build_queue(store, args.order, args.skipped)
+        print(f"\n📊 Слов без решения: {len(queue)}")
+        if not queue:
+            print("✅ Все слова уже проверены")
+            return
+
+        families = {} if args.no_families else build_families(coverage.frequencies)
+        answered = review_words(store, queue, coverage, families, phrases_by_word(load_collocations()))
+
+        print(f"\n✅ Сессия завершена, решений принято: {answered}")
+        print_store_stats(store)
+        print(f"📈 Покрытие: {coverage.report()}")
+        print(f"💾 Решения сохранены в: {REVIEW_DB}")
+    finally:
+        store.close()
 
 if __name__ == "__main__":
     main()
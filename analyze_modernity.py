@@ -1,15 +1,45 @@
 #!/usr/bin/env python3
 """
-Улучшенный скрипт для анализа качества современного перевода в JSON файлах молитв
-Анализирует несколько предложений и определяет, действительно ли это современный русский язык
+Анализ качества современного перевода (contentModern) в JSON файлах молитв
+По умолчанию проверяются первые 5 предложений: при 2 и более архаизмах перевод не считается
+современным. С --full проверяется весь текст и считается плотность архаизмов на 1000 слов
+(порог --max-density) с самыми архаичными предложениями. С --stems архаизмы ищутся по основе
+слова. Несколько файлов, каталоги и glob-шаблоны обрабатываются пакетом (--jobs процессов),
+итог можно сохранить в отчет .json или .csv (--report)
 """
 
+import argparse
+import csv
+import heapq
 import json
 import sys
 import os
-import re
+from collections import Counter
+from functools import partial
+from multiprocessing import Pool
 from typing import Dict, Any, List, Tuple
 
+from archaism_matcher import ARCHAISMS_FILE, get_matcher
+from collocations import COLLOCATIONS_FILE
+from corpus_reader import resolve_paths
+from run_profile import RunProfile, add_profile_argument
+from text_normalize import normalize_word
+
+# Сколько первых предложений проверяется для вердикта is_modern
+SAMPLE_SENTENCES = 5
+
+# Порог: при стольких архаичных совпадениях текст уже не считается современным
+ARCHAIC_THRESHOLD = 2
+
+# Полный режим: допустимая плотность архаизмов на 1000 слов
+DENSITY_THRESHOLD = 20.0
+
+# Сколько самых "архаичных" предложений показывать в полном режиме
+HOTSPOT_COUNT = 5
+
+# Словари, которые читает ArchaismMatcher (для замеров --profile)
+DICTIONARY_FILES = [ARCHAISMS_FILE, COLLOCATIONS_FILE]
+
 def load_prayer_file(file_path: str) -> Dict[str, Any]:
     """Загружает JSON файл молитвы"""
     try:
@@ -19,105 +49,114 @@ def load_prayer_file(file_path: str) -> Dict[str, Any]:
         print(f"Ошибка загрузки файла {file_path}: {e}")
         return None
 
-def analyze_text_modernity(text: str) -> Tuple[bool, List[str]]:
+def analyze_text_modernity(text: str, verbose: bool = True, stems: bool = False) -> Tuple[bool, List[str]]:
     """
     Анализирует текст на современность русского языка
+    stems=True - архаизмы ищутся по основе слова, а не только по точной форме
     Возвращает (is_modern, issues_list)
     """
-    issues = []
-    
-    # Разбиваем текст на предложения (примерно)
-    sentences = re.split(r'[.!?]+', text)
-    sentences = [s.strip() for s in sentences if s.strip()]
+    matcher = get_matcher(match_stems=stems)
     
     # Берем первые 5 предложений для анализа
-    sample_sentences = sentences[:5]
+    sample_sentences = list(matcher.scan(text, max_sentences=SAMPLE_SENTENCES))
     
     if not sample_sentences:
         return False, ["Текст пустой или не содержит предложений"]
     
-    print(f"📝 Анализируем первые {len(sample_sentences)} предложений:")
-    for i, sentence in enumerate(sample_sentences, 1):
-        print(f"  {i}. {sentence[:100]}{'...' if len(sentence) > 100 else ''}")
-    
-    # Загружаем словарь архаизмов из файла
-    archaisms_file = "extracted_words/archaisms.txt"
-    archaic_words = set()
+    if verbose:
+        print(f"📝 Анализируем первые {len(sample_sentences)} предложений:")
+        for sentence in sample_sentences:
+            print(f"  {sentence.index + 1}. {sentence.text[:100]}{'...' if len(sentence.text) > 100 else ''}")
     
-    try:
-        with open(archaisms_file, 'r', encoding='utf-8') as f:
-            for line in f:
-                word = line.strip()
-                if word and not word.startswith('#'):
-                    archaic_words.add(word)
-    except FileNotFoundError:
-        print(f"Файл {archaisms_file} не найден, используем базовый словарь")
-        archaic_words = {
-            'яко', 'еже', 'иже', 'яже', 'егоже', 'паче', 'нежели',
-            'во', 'ко', 'молиши', 'даруеши', 'сподоби', 'избави',
-            'архистратиже', 'архангеле', 'святый', 'благоутробие',
-            'напрасние', 'всякаго', 'благаго', 'аще', 'аз', 'еси',
-            'мя', 'твоего', 'твое', 'твоя', 'твоих', 'твоим', 'твою',
-            'твои', 'твоему', 'твоея', 'твой', 'твоей', 'твоею'
-        }
-    
-    # Проверяем на церковнославянские формы по паттернам
-    church_slavonic_patterns = [
-        # Архаичные окончания
-        r'\b\w+ие\b',  # напрасние, благоутробие
-        r'\b\w+аго\b',  # благаго
-        r'\b\w+яго\b',  # всякаго
-        r'\b\w+ши\b',  # молиши, даруеши
-        r'\b\w+шися\b',  # молишися
-        r'\b\w+шии\b',  # молящии
-    ]
-    
-    # Проверяем каждое предложение на архаичные слова
+    word_issues = []
+    form_issues = []
+    phrase_issues = []
     archaic_count = 0
     modern_count = 0
     
     for sentence in sample_sentences:
-        words = re.findall(r'\b\w+\b', sentence.lower())
-        
-        for word in words:
-            if word in archaic_words:
-                archaic_count += 1
-                issues.append(f"Архаичное слово '{word}' в предложении: {sentence[:50]}...")
-        
-        # Проверяем на современные конструкции
-        modern_patterns = [
-            r'\bкак\b',  # как (вместо яко)
-            r'\bчто\b',  # что (вместо еже)
-            r'\bкоторый\b',  # который (вместо иже)
-            r'\bкоторая\b',  # которая (вместо яже)
-            r'\bв\b',  # в (вместо во)
-            r'\bк\b',  # к (вместо ко)
-            r'\bболее\b',  # более (вместо паче)
-            r'\bчем\b',  # чем (вместо нежели)
-        ]
-        
-        for pattern in modern_patterns:
-            if re.search(pattern, sentence, re.IGNORECASE):
-                modern_count += 1
-    
-    # Проверяем по паттернам (дополнительно)
-    for sentence in sample_sentences:
-        for pattern in church_slavonic_patterns:
-            matches = re.findall(pattern, sentence, re.IGNORECASE)
-            if matches:
-                for match in matches:
-                    if len(match) > 3:  # Игнорируем короткие совпадения
-                        archaic_count += 1
-                        issues.append(f"Архаичная форма '{match}' в предложении: {sentence[:50]}...")
+        for word in sentence.words:
+            word_issues.append(f"Архаичное слово '{word}' в предложении: {sentence.text[:50]}...")
+        for form in sentence.forms:
+            form_issues.append(f"Архаичная форма '{form}' в предложении: {sentence.text[:50]}...")
+        for phrase in sentence.phrases:
+            phrase_issues.append(f"Архаичное сочетание '{phrase}' в предложении: {sentence.text[:50]}...")
+        archaic_count += len(sentence.words) + len(sentence.forms)
+        modern_count += sentence.modern_count
     
     # Определяем, современный ли текст
     # Если мало архаичных слов - текст современный
-    is_modern = archaic_count < 2
+    is_modern = archaic_count < ARCHAIC_THRESHOLD
     
-    return is_modern, issues
+    return is_modern, word_issues + form_issues + phrase_issues
 
-def analyze_prayer_file(file_path: str) -> Dict[str, Any]:
-    """Анализирует файл молитвы на качество современного перевода"""
+def analyze_text_full(text: str, max_density: float = DENSITY_THRESHOLD,
+                      hotspot_count: int = HOTSPOT_COUNT, stems: bool = False) -> Dict[str, Any]:
+    """
+    Анализирует весь текст, а не первые предложения
+    Предложения обрабатываются потоком, в памяти держатся только счетчики
+    и hotspot_count предложений с наибольшим числом архаизмов
+    """
+    sentence_count = 0
+    word_count = 0
+    archaic_count = 0
+    offending = Counter()
+    phrases = Counter()
+    hotspots: List[Tuple[int, int, int, str]] = []
+    
+    for sentence in get_matcher(match_stems=stems).scan(text):
+        sentence_count += 1
+        word_count += sentence.word_count
+        phrases.update(sentence.phrases)
+        hits = len(sentence.words) + len(sentence.forms)
+        if not hits:
+            continue
+        archaic_count += hits
+        offending.update(sentence.words)
+        offending.update(normalize_word(form) for form in sentence.forms)
+        
+        # Куча минимального размера: при равенстве остаются более ранние предложения
+        item = (hits, -sentence.index, sentence.start, " ".join(sentence.text[:80].split()))
+        if len(hotspots) < hotspot_count:
+            heapq.heappush(hotspots, item)
+        elif item > hotspots[0]:
+            heapq.heapreplace(hotspots, item)
+    
+    density = 1000.0 * archaic_count / word_count if word_count else 0.0
+    return {
+        "sentences": sentence_count,
+        "words": word_count,
+        "archaic_count": archaic_count,
+        "density_per_1000": round(density, 2),
+        "is_modern": word_count > 0 and density < max_density,
+        "archaic_words": sorted(offending),
+        # Сочетания не входят в archaic_count: их слова уже посчитаны по отдельности
+        "archaic_phrases": sorted(phrases),
+        "hotspots": [
+            {"sentence": -neg_index + 1, "offset": offset, "archaic_count": hits, "preview": preview}
+            for hits, neg_index, offset, preview in sorted(hotspots, reverse=True)
+        ],
+    }
+
+def print_full_analysis(analysis: Dict[str, Any]):
+    """Печатает результаты полного анализа"""
+    print(f"📝 Проверено предложений: {analysis['sentences']}, слов: {analysis['words']}")
+    print(f"📊 Архаизмов: {analysis['archaic_count']} "
+          f"({analysis['density_per_1000']} на 1000 слов)")
+    if analysis['archaic_phrases']:
+        print(f"📎 Архаичные сочетания: {', '.join(analysis['archaic_phrases'][:10])}")
+    if analysis['hotspots']:
+        print("🔥 Самые архаичные места:")
+        for spot in analysis['hotspots']:
+            print(f"   - предложение {spot['sentence']} (символ {spot['offset']}): "
+                  f"{spot['archaic_count']} совп. — {spot['preview']}...")
+
+def analyze_prayer_file(file_path: str, full: bool = False,
+                        max_density: float = DENSITY_THRESHOLD, stems: bool = False) -> Dict[str, Any]:
+    """
+    Анализирует файл молитвы на качество современного перевода
+    full=True - проверяется весь текст с оценкой плотности архаизмов
+    """
     print(f"\n🔍 Анализируем файл: {file_path}")
     
     data = load_prayer_file(file_path)
@@ -140,12 +179,20 @@ def analyze_prayer_file(file_path: str) -> Dict[str, Any]:
         result["sample_text"] = content_modern[:300] + "..." if len(content_modern) > 300 else content_modern
         
         # Анализируем качество перевода
-        is_modern, issues = analyze_text_modernity(content_modern)
+        if full:
+            analysis = analyze_text_full(content_modern, max_density, stems=stems)
+            is_modern = analysis["is_modern"]
+            issues = [f"Архаизм '{word}'" for word in analysis["archaic_words"]]
+            result["full_analysis"] = analysis
+        else:
+            is_modern, issues = analyze_text_modernity(content_modern, stems=stems)
         result["is_modern"] = is_modern
         result["issues"] = issues
         
         print(f"📄 Заголовок: {result['title']}")
         print(f"📊 Длина contentModern: {result['contentModern_length']} символов")
+        if full:
+            print_full_analysis(result["full_analysis"])
         print(f"✅ Современный перевод: {'ДА' if is_modern else 'НЕТ'}")
         
         if issues:
@@ -159,27 +206,191 @@ def analyze_prayer_file(file_path: str) -> Dict[str, Any]:
     
     return result
 
+def score_prayer_file(file_path: str, full: bool = False,
+                      max_density: float = DENSITY_THRESHOLD, stems: bool = False) -> Dict[str, Any]:
+    """
+    Оценивает contentModern одного файла без вывода на экран (для пакетного режима)
+    Возвращает строку отчета: is_modern, количество архаичных совпадений и сами слова
+    При full=True проверяется весь текст и добавляются плотность и горячие точки
+    """
+    result = {
+        "file": file_path,
+        "title": "",
+        "contentModern_exists": False,
+        "is_modern": False,
+        "archaic_count": 0,
+        "archaic_words": [],
+        "archaic_phrases": [],
+        "error": "",
+    }
+    
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+    except Exception as e:
+        result["error"] = str(e)
+        return result
+    
+    result["title"] = data.get("title", "Неизвестно")
+    content_modern = data.get("contentModern")
+    if not isinstance(content_modern, str):
+        return result
+    result["contentModern_exists"] = True
+    
+    if full:
+        analysis = analyze_text_full(content_modern, max_density, stems=stems)
+        result.update(analysis)
+        return result
+    
+    offending = Counter()
+    phrases = set()
+    for sentence in get_matcher(match_stems=stems).scan(content_modern, max_sentences=SAMPLE_SENTENCES):
+        offending.update(sentence.words)
+        offending.update(normalize_word(form) for form in sentence.forms)
+        phrases.update(sentence.phrases)
+    
+    result["archaic_count"] = sum(offending.values())
+    result["archaic_words"] = sorted(offending)
+    result["archaic_phrases"] = sorted(phrases)
+    result["is_modern"] = bool(content_modern.strip()) and result["archaic_count"] < ARCHAIC_THRESHOLD
+    return result
+
+def analyze_batch(file_paths: List[str], jobs: int = 1, full: bool = False,
+                  max_density: float = DENSITY_THRESHOLD, stems: bool = False) -> List[Dict[str, Any]]:
+    """Оценивает все файлы в одном процессе или в пуле из jobs процессов"""
+    score = partial(score_prayer_file, full=full, max_density=max_density, stems=stems)
+    if jobs <= 1:
+        return [score(path) for path in file_paths]
+    with Pool(jobs) as pool:
+        return pool.map(score, file_paths, chunksize=max(1, len(file_paths) // (jobs * 8)))
+
+def summarize_batch(results: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Сводка по пакету: сколько файлов современные и какие архаизмы встречаются чаще"""
+    word_files = Counter()
+    phrase_files = Counter()
+    for result in results:
+        word_files.update(result["archaic_words"])
+        phrase_files.update(result.get("archaic_phrases", []))
+    return {
+        "total": len(results),
+        "modern": sum(1 for r in results if r["is_modern"]),
+        "not_modern": sum(1 for r in results if r["contentModern_exists"] and not r["is_modern"]),
+        "missing_contentModern": sum(1 for r in results if not r["contentModern_exists"] and not r["error"]),
+        "errors": sum(1 for r in results if r["error"]),
+        "top_archaic_words": word_files.most_common(20),
+        "top_archaic_phrases": phrase_files.most_common(20),
+    }
+
+def write_report(report_path: str, results: List[Dict[str, Any]], summary: Dict[str, Any]):
+    """Пишет отчет в JSON или CSV (по расширению файла)"""
+    report_dir = os.path.dirname(report_path)
+    if report_dir:
+        os.makedirs(report_dir, exist_ok=True)
+    
+    if report_path.endswith('.csv'):
+        with open(report_path, 'w', encoding='utf-8', newline='') as f:
+            writer = csv.writer(f)
+            writer.writerow(["file", "title", "contentModern_exists", "is_modern",
+                             "archaic_count", "density_per_1000", "archaic_words", "error"])
+            for r in results:
+                writer.writerow([r["file"], r["title"], r["contentModern_exists"], r["is_modern"],
+                                 r["archaic_count"], r.get("density_per_1000", ""),
+                                 " ".join(r["archaic_words"]), r["error"]])
+    else:
+        with open(report_path, 'w', encoding='utf-8') as f:
+            json.dump({"summary": summary, "files": results}, f, ensure_ascii=False, indent=2)
+
+def run_batch(args: argparse.Namespace, run: RunProfile) -> int:
+    """Пакетный режим: оценивает все файлы, печатает сводку и пишет отчет"""
+    with run.stage("resolve"):
+        file_paths = resolve_paths(args.paths)
+    if not file_paths:
+        print(f"Файлы не найдены: {' '.join(args.paths)}")
+        return 1
+    
+    print(f"🔍 Анализируем {len(file_paths)} файлов (процессов: {args.jobs})...")
+    with run.stage("analyze") as stage:
+        results = analyze_batch(file_paths, args.jobs, args.full, args.max_density, args.stems)
+        stage.read_if_exists(DICTIONARY_FILES)
+        stage.read_files(file_paths)
+    with run.stage("summarize"):
+        summary = summarize_batch(results)
+    
+    print(f"\n📋 СВОДКА:")
+    print(f"   Всего файлов: {summary['total']}")
+    print(f"   Современный перевод: {summary['modern']}")
+    print(f"   Архаичный перевод: {summary['not_modern']}")
+    print(f"   Без contentModern: {summary['missing_contentModern']}")
+    if summary['errors']:
+        print(f"   Ошибки чтения: {summary['errors']}")
+    if summary['top_archaic_words']:
+        print("   Частые архаизмы (в скольких файлах):")
+        for word, count in summary['top_archaic_words'][:10]:
+            print(f"     - {word}: {count}")
+    if summary['top_archaic_phrases']:
+        print("   Частые архаичные сочетания (в скольких файлах):")
+        for phrase, count in summary['top_archaic_phrases'][:10]:
+            print(f"     - {phrase}: {count}")
+    
+    if args.report:
+        with run.stage("report") as stage:
+            write_report(args.report, results, summary)
+            stage.wrote_file(args.report)
+        print(f"💾 Отчет сохранен в: {args.report}")
+    
+    if args.fail_on_archaic and (summary['not_modern'] or summary['errors']):
+        return 1
+    return 0
+
+def parse_args() -> argparse.Namespace:
+    """Разбирает аргументы командной строки"""
+    parser = argparse.ArgumentParser(
+        description="Анализ качества современного перевода молитв",
+        epilog="Пример: python analyze_modernity.py data/prayers/molitva-5-pyatnitsa-arhangelu-selafiilu.json\n"
+               "Пакетно: python analyze_modernity.py data/prayers --jobs 4 --report reports/modernity.json",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("paths", nargs="+", help="файл, каталог или glob-шаблон (\"data/prayers/akafist-*.json\")")
+    parser.add_argument("--report", help="путь к отчету .json или .csv (включает пакетный режим)")
+    parser.add_argument("--jobs", "-j", type=int, default=1, help="количество процессов в пакетном режиме")
+    parser.add_argument("--full", action="store_true",
+                        help="проверять весь текст, а не первые 5 предложений")
+    parser.add_argument("--max-density", type=float, default=DENSITY_THRESHOLD,
+                        help="полный режим: допустимое число архаизмов на 1000 слов")
+    parser.add_argument("--stems", action="store_true",
+                        help="искать архаизмы по основе слова (формы с архаичным окончанием)")
+    parser.add_argument("--fail-on-archaic", action="store_true",
+                        help="код возврата 1, если найден архаичный перевод (для CI)")
+    add_profile_argument(parser)
+    return parser.parse_args()
+
 def main():
     """Главная функция"""
-    if len(sys.argv) < 2:
-        print("Использование: python analyze_modernity.py <путь_к_файлу>")
-        print("Пример: python analyze_modernity.py data/prayers/molitva-5-pyatnitsa-arhangelu-selafiilu.json")
-        return
+    args = parse_args()
+    run = RunProfile("analyze_modernity", args.profile)
     
-    file_path = sys.argv[1]
-    
-    if not os.path.exists(file_path):
-        print(f"Файл не найден: {file_path}")
+    # Один файл без отчета - прежний интерактивный режим
+    if len(args.paths) == 1 and os.path.isfile(args.paths[0]) and not args.report:
+        file_path = args.paths[0]
+        with run.stage("analyze") as stage:
+            result = analyze_prayer_file(file_path, args.full, args.max_density, args.stems)
+            stage.read_if_exists(DICTIONARY_FILES)
+            stage.read_files([file_path])
+        
+        # Выводим итоговый результат
+        print(f"\n📋 ИТОГОВЫЙ РЕЗУЛЬТАТ:")
+        print(f"   Файл: {result['file']}")
+        print(f"   Современный перевод: {'✅ ДА' if result['is_modern'] else '❌ НЕТ'}")
+        if result['issues']:
+            print(f"   Найдено проблем: {len(result['issues'])}")
+        run.finish()
+        if args.fail_on_archaic and not result['is_modern']:
+            sys.exit(1)
         return
     
-    result = analyze_prayer_file(file_path)
-    
-    # Выводим итоговый результат
-    print(f"\n📋 ИТОГОВЫЙ РЕЗУЛЬТАТ:")
-    print(f"   Файл: {result['file']}")
-    print(f"   Современный перевод: {'✅ ДА' if result['is_modern'] else '❌ НЕТ'}")
-    if result['issues']:
-        print(f"   Найдено проблем: {len(result['issues'])}")
+    code = run_batch(args, run)
+    run.finish()
+    sys.exit(code)
 
 if __name__ == "__main__":
     main()
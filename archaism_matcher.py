@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""
+Скомпилированный поиск архаизмов в тексте
+Словарь архаизмов, архаичные окончания, устойчивые архаичные сочетания
+и маркеры современного языка собираются один раз на процесс,
+а текст проверяется за один линейный проход
+"""
+
+import re
+from functools import lru_cache
+from typing import Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from collocations import COLLOCATIONS_FILE, load_collocations
+from text_normalize import COMBINING_CLASS, normalize_word
+from word_families import REFLEXIVE_SUFFIXES, stem_word
+
+ARCHAISMS_FILE = "extracted_words/archaisms.txt"
+
+# Базовый словарь на случай отсутствия archaisms.txt
+FALLBACK_ARCHAISMS = {
+    'яко', 'еже', 'иже', 'яже', 'егоже', 'паче', 'нежели',
+    'во', 'ко', 'молиши', 'даруеши', 'сподоби', 'избави',
+    'архистратиже', 'архангеле', 'святый', 'благоутробие',
+    'напрасние', 'всякаго', 'благаго', 'аще', 'аз', 'еси',
+    'мя', 'твоего', 'твое', 'твоя', 'твоих', 'твоим', 'твою',
+    'твои', 'твоему', 'твоея', 'твой', 'твоей', 'твоею'
+}
+
+# Архаичные окончания церковнославянских форм
+ARCHAIC_SUFFIXES = (
+    'ие',    # напрасние, благоутробие
+    'аго',   # благаго
+    'яго',   # всякаго
+    'ши',    # молиши, даруеши
+    'шися',  # молишися
+    'шии',   # молящии
+)
+
+# Короткие совпадения по окончаниям игнорируются
+MIN_FORM_LENGTH = 4
+
+# Поиск по основе: основа не короче этого и только с церковнославянским окончанием,
+# иначе современные формы совпадают с архаичными (святый -> свят <- святой)
+MIN_MATCH_STEM_LENGTH = 4
+ARCHAIC_ENDINGS = frozenset({
+    'аго', 'яго', 'ыя', 'ея', 'ею', 'ие', 'ии',
+    'ахом', 'ихом', 'ехом', 'аша', 'иша', 'еши', 'иши', 'ши',
+})
+
+# Современные конструкции вместо церковнославянских
+MODERN_WORDS = frozenset({
+    'как',      # вместо яко
+    'что',      # вместо еже
+    'который',  # вместо иже
+    'которая',  # вместо яже
+    'в',        # вместо во
+    'к',        # вместо ко
+    'более',    # вместо паче
+    'чем',      # вместо нежели
+})
+
+# Один проход по тексту: либо конец предложения, либо слово (вместе с ударениями)
+SCAN_RE = re.compile(rf'(?P<end>[.!?]+)|(?P<word>(?:\w|[{COMBINING_CLASS}])+)')
+
+
+class SentenceHits(NamedTuple):
+    """Результат проверки одного предложения"""
+    index: int          # номер предложения с нуля
+    start: int          # смещение начала предложения в тексте
+    text: str           # текст предложения без пробелов по краям
+    word_count: int     # количество слов
+    words: List[str]    # слова из словаря архаизмов
+    forms: List[str]    # слова с архаичными окончаниями
+    modern_count: int   # количество разных современных маркеров
+    phrases: List[str]  # устойчивые сочетания с архаизмами (из collocations.txt)
+
+
+class ArchaismMatcher:
+    """Словарь архаизмов и окончаний, собранный для быстрого поиска"""
+
+    def __init__(self, archaic_words: Iterable[str], match_stems: bool = False,
+                 phrases: Iterable[Tuple[str, ...]] = ()):
+        self.archaic_words = frozenset(normalize_word(word) for word in archaic_words if word.strip())
+        # С match_stems слово считается архаизмом, если совпадает его основа, а окончание
+        # церковнославянское (одна запись словаря покрывает архаичные формы семейства)
+        self.archaic_stems = frozenset(
+            stem for stem in map(stem_word, self.archaic_words) if len(stem) >= MIN_MATCH_STEM_LENGTH
+        ) if match_stems else None
+        # Из устойчивых сочетаний корпуса остаются те, в которых есть архаизм
+        self.archaic_phrases = frozenset(
+            phrase for phrase in phrases if any(self.is_archaic_word(word) for word in phrase)
+        )
+        # Последние слова сочетаний: для остальных слов кортежи не собираются
+        self.phrase_ends = frozenset(phrase[-1] for phrase in self.archaic_phrases)
+
+    @classmethod
+    def from_file(cls, archaisms_file: str = ARCHAISMS_FILE, match_stems: bool = False,
+                  collocations_file: str = COLLOCATIONS_FILE) -> 'ArchaismMatcher':
+        """
+        Загружает словарь из archaisms.txt, при отсутствии файла - базовый словарь
+        Сочетания берутся из collocations.txt (collocations.py); без файла поиск сочетаний выключен
+        """
+        try:
+            with open(archaisms_file, 'r', encoding='utf-8') as f:
+                words = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+        except FileNotFoundError:
+            print(f"Файл {archaisms_file} не найден, используем базовый словарь")
+            words = FALLBACK_ARCHAISMS
+        phrases = [phrase for phrase, _, _ in load_collocations(collocations_file)]
+        return cls(words, match_stems, phrases)
+
+    def is_archaic_word(self, word: str) -> bool:
+        """Проверяет нормализованное слово по словарю (и по основе, если включено)"""
+        if word in self.archaic_words:
+            return True
+        return self.archaic_stems is not None and self.matches_stem(word)
+
+    def matches_stem(self, word: str) -> bool:
+        """Основа слова есть среди основ словаря, и окончание у слова архаичное"""
+        stem = stem_word(word)
+        if stem not in self.archaic_stems:
+            return False
+        ending = word[len(stem):]
+        for suffix in REFLEXIVE_SUFFIXES:
+            if ending.endswith(suffix):
+                ending = ending[:-len(suffix)]
+                break
+        return ending in ARCHAIC_ENDINGS
+
+    @staticmethod
+    def is_archaic_form(word: str) -> bool:
+        """Проверяет нормализованное слово по архаичным окончаниям"""
+        return len(word) >= MIN_FORM_LENGTH and word.endswith(ARCHAIC_SUFFIXES)
+
+    def scan(self, text: str, max_sentences: Optional[int] = None) -> Iterator[SentenceHits]:
+        """
+        Проходит текст один раз и отдает результаты по непустым предложениям
+        Память не зависит от длины текста: в каждый момент хранится одно предложение
+        """
+        archaic_words = self.archaic_words
+        match_stems = self.archaic_stems is not None
+        archaic_phrases = self.archaic_phrases
+        phrase_ends = self.phrase_ends
+        index = 0
+        start = 0
+        word_count = 0
+        words: List[str] = []
+        forms: List[str] = []
+        phrases: List[str] = []
+        modern = set()
+        # Два предыдущих слова предложения - для биграмм и триграмм
+        previous = ""
+        before_previous = ""
+
+        for match in SCAN_RE.finditer(text):
+            word = match.group('word')
+            if word is not None:
+                normalized = normalize_word(word)
+                word_count += 1
+                if normalized in archaic_words or (match_stems and self.matches_stem(normalized)):
+                    words.append(normalized)
+                if len(normalized) >= MIN_FORM_LENGTH and normalized.endswith(ARCHAIC_SUFFIXES):
+                    forms.append(word)
+                if normalized in MODERN_WORDS:
+                    modern.add(normalized)
+                if archaic_phrases:
+                    if normalized in phrase_ends:
+                        if (previous, normalized) in archaic_phrases:
+                            phrases.append(f"{previous} {normalized}")
+                        if (before_previous, previous, normalized) in archaic_phrases:
+                            phrases.append(f"{before_previous} {previous} {normalized}")
+                    before_previous, previous = previous, normalized
+                continue
+
+            sentence = text[start:match.start()]
+            stripped = sentence.strip()
+            if stripped:
+                offset = start + len(sentence) - len(sentence.lstrip())
+                yield SentenceHits(index, offset, stripped, word_count, words, forms, len(modern), phrases)
+                index += 1
+                if max_sentences is not None and index >= max_sentences:
+                    return
+            start = match.end()
+            word_count = 0
+            words, forms, phrases, modern = [], [], [], set()
+            previous = before_previous = ""
+
+        sentence = text[start:]
+        stripped = sentence.strip()
+        if stripped:
+            offset = start + len(sentence) - len(sentence.lstrip())
+            yield SentenceHits(index, offset, stripped, word_count, words, forms, len(modern), phrases)
+
+
+@lru_cache(maxsize=None)
+def get_matcher(archaisms_file: str = ARCHAISMS_FILE, match_stems: bool = False) -> ArchaismMatcher:
+    """Возвращает общий для процесса экземпляр ArchaismMatcher"""
+    return ArchaismMatcher.from_file(archaisms_file, match_stems)
@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+Замеры производительности скриптов обработки корпуса молитв
+Показывает, как параллельное извлечение слов масштабируется от 1 до N процессов
+на текущем корпусе и на синтетической копии, увеличенной в несколько раз,
+сколько занимает пересчет relatedPrayers и насколько упакованный корпус
+быстрее чтения отдельных файлов.
+С --suite прогоняет набор замеров горячих путей (токенизация, подсчет частот,
+поиск архаизмов, split_long_field, пакетные правки); результаты можно записать
+в benchmark_baseline.json и сравнивать с ним в CI. Время каждого замера хранится
+как доля от калибровочного замера (чистый Python без кода проекта), поэтому
+записанные результаты сравнимы на машинах разной скорости.
+Проверка в CI (.github/workflows/benchmark.yml, npm run benchmark):
+  python benchmark.py --suite --compare benchmark_baseline.json
+Перезапись после намеренного изменения скорости:
+  python benchmark.py --suite --record benchmark_baseline.json
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import re
+import sys
+import tempfile
+import time
+from collections import Counter
+from typing import Any, Callable, Dict, List
+
+from analyze_modernity import analyze_text_full
+from corpus_reader import (
+    PRAYERS_DIR,
+    count_corpus,
+    list_prayer_files,
+    load_prayer,
+    sorted_frequencies,
+    tokenize_prayer,
+    utc_now_iso,
+)
+from packed_corpus import PackedCorpus, pack_corpus
+from process_prayer import apply_batch, split_long_field
+from related_prayers import rank_related, read_corpus_features
+
+BASELINE_FILE = "benchmark_baseline.json"
+# Меняется вместе с форматом записанных результатов
+BASELINE_VERSION = 2
+
+# Синтетический корпус детерминирован: одинаковый seed дает одинаковые файлы
+SYNTHETIC_SEED = 0
+# Поля, которые меняются в копиях молитв
+MUTATED_FIELDS = ('content', 'contentModern', 'explanation')
+# Доля слов, в которых меняется одна буква: словарь растет вместе с корпусом
+MUTATION_RATE = 0.05
+MUTATION_LETTERS = "абвгдежзиклмнопрстуфхцчшщыэюя"
+
+SENTENCE_SPLIT_RE = re.compile(r'(?<=[.!?])\s+')
+MUTABLE_WORD_RE = re.compile(r'[а-яё]{4,}')
+
+# Сколько раз повторяется каждый замер (берется лучшее время)
+SUITE_ROUNDS = 3
+# Во сколько раз доля замера от калибровки может вырасти, прежде чем считаться регрессией
+REGRESSION_TOLERANCE = 1.25
+
+# Калибровка: подсчет и сортировка частот стольких случайных слов
+CALIBRATION_WORDS = 500000
+CALIBRATION_CASE = "calibration"
+
+
+def mutate_text(text: str, rng: random.Random) -> str:
+    """Переставляет предложения и меняет по одной букве в части слов"""
+    sentences = SENTENCE_SPLIT_RE.split(text)
+    rng.shuffle(sentences)
+
+    def mutate_word(match: re.Match) -> str:
+        word = match.group(0)
+        if rng.random() >= MUTATION_RATE:
+            return word
+        position = rng.randrange(len(word))
+        return word[:position] + rng.choice(MUTATION_LETTERS) + word[position + 1:]
+
+    return MUTABLE_WORD_RE.sub(mutate_word, " ".join(sentences))
+
+
+def make_synthetic_corpus(target_dir: str, factor: int, prayers_dir: str = PRAYERS_DIR,
+                          seed: int = SYNTHETIC_SEED) -> int:
+    """
+    Размножает корпус factor раз в target_dir, возвращает количество файлов
+    Первая копия совпадает с оригиналом, в остальных тексты изменены mutate_text.
+    У каждой копии свои url (совпадает с именем файла, как в настоящем корпусе) и id
+    """
+    os.makedirs(target_dir, exist_ok=True)
+    count = 0
+    for file_path in list_prayer_files(prayers_dir):
+        original = load_prayer(file_path)
+        if original is None:
+            continue
+        name = os.path.basename(file_path)[:-len('.json')]
+        for copy in range(factor):
+            count += 1
+            data = dict(original, url=f"{name}-{copy:03d}", id=count)
+            if copy > 0:
+                rng = random.Random(f"{seed}:{name}:{copy}")
+                for field in MUTATED_FIELDS:
+                    if isinstance(data.get(field), str):
+                        data[field] = mutate_text(data[field], rng)
+            with open(os.path.join(target_dir, f"{data['url']}.json"), 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+    return count
+
+
+def bench_extract_scaling(prayers_dir: str, jobs_list: List[int]):
+    """Замеряет count_corpus для каждого числа процессов и сверяет результаты"""
+    reference = None
+    baseline_time = None
+
+    for jobs in jobs_list:
+        start = time.perf_counter()
+        counter = count_corpus(prayers_dir, jobs)
+        elapsed = time.perf_counter() - start
+
+        frequencies = sorted_frequencies(counter)
+        if reference is None:
+            reference = frequencies
+            baseline_time = elapsed
+        identical = "да" if frequencies == reference else "НЕТ"
+
+        print(f"  jobs={jobs:<3} {elapsed:8.3f} с  ускорение x{baseline_time / elapsed:5.2f}  "
+              f"совпадает с jobs=1: {identical}")
+
+
+def bench_related(prayers_dir: str):
+    """Замеряет чтение признаков и ранжирование связанных молитв"""
+    start = time.perf_counter()
+    prayers = read_corpus_features(prayers_dir)
+    read_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rank_related(prayers)
+    rank_time = time.perf_counter() - start
+    print(f"  relatedPrayers: чтение {read_time:8.3f} с, ранжирование {rank_time:8.3f} с "
+          f"({len(prayers)} молитв)")
+
+
+def bench_packed(prayers_dir: str, pack_file: str, lookups: int = 1000):
+    """Сравнивает поштучное чтение JSON файлов с упакованным корпусом: полный проход и точечные запросы"""
+    pack_corpus(prayers_dir, pack_file, rebuild=True)
+    file_paths = list_prayer_files(prayers_dir)
+    sample = random.Random(0).choices(file_paths, k=lookups)
+
+    start = time.perf_counter()
+    files_total = sum(len(load_prayer(file_path).get("content", "")) for file_path in file_paths)
+    files_pass = time.perf_counter() - start
+
+    start = time.perf_counter()
+    titles = [load_prayer(file_path)["title"] for file_path in sample]
+    files_lookup = time.perf_counter() - start
+
+    with PackedCorpus(pack_file) as corpus:
+        start = time.perf_counter()
+        packed_total = sum(len(content) for _, content in corpus.iter_field("content"))
+        packed_pass = time.perf_counter() - start
+
+        urls = [os.path.basename(file_path)[:-len('.json')] for file_path in sample]
+        start = time.perf_counter()
+        packed_titles = [corpus.field(url, "title") for url in urls]
+        packed_lookup = time.perf_counter() - start
+
+    identical = "да" if files_total == packed_total and titles == packed_titles else "НЕТ"
+    print(f"  проход по content: файлы {files_pass:8.3f} с, pack {packed_pass:8.3f} с "
+          f"(x{files_pass / packed_pass:5.1f})")
+    print(f"  {lookups} запросов title: файлы {files_lookup:8.3f} с, pack {packed_lookup:8.3f} с "
+          f"(x{files_lookup / packed_lookup:5.1f}), результаты совпадают: {identical}")
+
+
+def best_time(func: Callable[[], Any], rounds: int = SUITE_ROUNDS) -> float:
+    """Лучшее время из нескольких запусков (как min в pytest-benchmark)"""
+    times = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def calibration_case(seed: int = SYNTHETIC_SEED) -> Callable[[], Any]:
+    """
+    Калибровочный замер: разбор, подсчет и сортировка частот слов на чистом Python,
+    та же работа интерпретатора, что и в горячих путях, но без кода проекта
+    """
+    rng = random.Random(seed)
+    words = ["".join(rng.choice(MUTATION_LETTERS) for _ in range(rng.randint(2, 8)))
+             for _ in range(CALIBRATION_WORDS)]
+    text = " ".join(words)
+
+    def calibrate():
+        counter = Counter(MUTABLE_WORD_RE.findall(text))
+        return sorted(counter.items(), key=lambda item: (-item[1], item[0]))
+
+    return calibrate
+
+
+def run_suite(prayers_dir: str, rounds: int = SUITE_ROUNDS) -> Dict[str, float]:
+    """Замеры горячих путей на корпусе prayers_dir и калибровка: имя -> секунды"""
+    prayers = [load_prayer(file_path) for file_path in list_prayer_files(prayers_dir)]
+    texts = [prayer.get("content", "") for prayer in prayers if prayer]
+
+    def tokenize():
+        for prayer in prayers:
+            for _ in tokenize_prayer(prayer):
+                pass
+
+    def archaisms():
+        for text in texts:
+            analyze_text_full(text)
+
+    def split_fields():
+        for text in texts:
+            split_long_field(text)
+
+    results = {
+        CALIBRATION_CASE: best_time(calibration_case(), rounds),
+        "tokenize": best_time(tokenize, rounds),
+        "count_corpus": best_time(lambda: count_corpus(prayers_dir), rounds),
+        "archaism_scoring": best_time(archaisms, rounds),
+        "split_long_field": best_time(split_fields, rounds),
+    }
+
+    # Пакетная правка contentModern у всех молитв; в каждом запуске новое значение,
+    # чтобы все файлы действительно перезаписывались
+    with tempfile.TemporaryDirectory() as batch_dir:
+        batch_path = os.path.join(batch_dir, "batch.jsonl")
+        urls = [prayer["url"] for prayer in prayers if prayer]
+        run = [0]
+
+        def bulk_update():
+            run[0] += 1
+            with open(batch_path, 'w', encoding='utf-8') as f:
+                for url in urls:
+                    edit = {"url": url, "field": "contentModern", "value": f"Текст правки {run[0]}"}
+                    f.write(json.dumps(edit, ensure_ascii=False) + "\n")
+            with contextlib.redirect_stdout(io.StringIO()):
+                apply_batch(batch_path, prayers_dir)
+
+        results["bulk_update"] = best_time(bulk_update, rounds)
+    return results
+
+
+def relative_times(results: Dict[str, float]) -> Dict[str, float]:
+    """Время замеров в долях калибровочного замера"""
+    calibration = results[CALIBRATION_CASE]
+    return {name: elapsed / calibration for name, elapsed in results.items() if name != CALIBRATION_CASE}
+
+
+def compare_results(results: Dict[str, float], baseline: Dict[str, Any], tolerance: float) -> List[str]:
+    """Замеры, доля которых от калибровки выросла больше чем в tolerance раз"""
+    regressions = []
+    for name, ratio in relative_times(results).items():
+        recorded = baseline["ratios"].get(name)
+        if recorded and ratio > recorded * tolerance:
+            regressions.append(f"{name}: x{ratio:.2f} калибровки против x{recorded:.2f} (x{ratio / recorded:.2f})")
+    return regressions
+
+
+def load_baseline(file_path: str, factor: int) -> Dict[str, Any]:
+    """Записанные результаты; ValueError, если с ними нельзя сравнивать"""
+    with open(file_path, 'r', encoding='utf-8') as f:
+        baseline = json.load(f)
+    if baseline.get("version") != BASELINE_VERSION:
+        raise ValueError(f"{file_path}: формат записи устарел, перезапишите его через --record")
+    if baseline.get("factor") != factor:
+        raise ValueError(f"{file_path}: результаты сняты на корпусе x{baseline.get('factor')}, "
+                         f"а замер идет на x{factor}; запустите с --factor {baseline.get('factor')}")
+    return baseline
+
+
+def suite_main(args: argparse.Namespace) -> int:
+    """Режим --suite: прогоняет замеры, записывает или сравнивает результаты"""
+    baseline = None
+    if args.compare:
+        try:
+            baseline = load_baseline(args.compare, args.factor)
+        except (OSError, ValueError) as e:
+            print(f"❌ Сравнение невозможно: {e}")
+            return 1
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        total = make_synthetic_corpus(tmp_dir, args.factor)
+        print(f"⏱  Набор замеров на синтетическом корпусе x{args.factor} ({total} файлов), "
+              f"лучшее из {args.rounds}:")
+        results = run_suite(tmp_dir, args.rounds)
+
+    ratios = relative_times(results)
+    print(f"  {CALIBRATION_CASE:<18} {results[CALIBRATION_CASE]:8.3f} с")
+    for name, ratio in ratios.items():
+        print(f"  {name:<18} {results[name]:8.3f} с  x{ratio:6.2f} калибровки")
+
+    if args.record:
+        record = {
+            "version": BASELINE_VERSION,
+            "recordedAt": utc_now_iso(),
+            "python": platform.python_version(),
+            "factor": args.factor,
+            "prayers": total,
+            "rounds": args.rounds,
+            # Секунды калибровки - только для справки, сравниваются доли
+            "calibration": round(results[CALIBRATION_CASE], 4),
+            "ratios": {name: round(ratio, 3) for name, ratio in ratios.items()},
+        }
+        with open(args.record, 'w', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False, indent=2) + "\n")
+        print(f"💾 Результаты записаны: {args.record}")
+
+    if baseline is not None:
+        regressions = compare_results(results, baseline, args.tolerance)
+        if regressions:
+            print(f"❌ Регрессии производительности (допуск x{args.tolerance}):")
+            for regression in regressions:
+                print(f"  {regression}")
+            return 1
+        print(f"✅ Регрессий нет (допуск x{args.tolerance})")
+    return 0
+
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Замеры производительности обработки корпуса молитв")
+    parser.add_argument("--max-jobs", type=int, default=os.cpu_count() or 1,
+                        help="максимальное количество процессов")
+    parser.add_argument("--factor", type=int, default=10,
+                        help="во сколько раз увеличить синтетический корпус")
+    parser.add_argument("--suite", action="store_true",
+                        help="прогнать набор замеров горячих путей")
+    parser.add_argument("--rounds", type=int, default=SUITE_ROUNDS,
+                        help=f"повторов каждого замера в --suite (по умолчанию {SUITE_ROUNDS})")
+    parser.add_argument("--record", metavar="FILE",
+                        help=f"записать результаты --suite в файл (например, {BASELINE_FILE})")
+    parser.add_argument("--compare", metavar="FILE",
+                        help="сравнить результаты --suite с записанными, код возврата 1 при регрессии")
+    parser.add_argument("--tolerance", type=float, default=REGRESSION_TOLERANCE,
+                        help=f"допустимое замедление относительно калибровки в разах (по умолчанию {REGRESSION_TOLERANCE})")
+    args = parser.parse_args()
+
+    if args.suite:
+        sys.exit(suite_main(args))
+
+    jobs_list = sorted({1, 2, 4, 8, args.max_jobs} & set(range(1, args.max_jobs + 1)))
+
+    print(f"⏱  Текущий корпус ({len(list_prayer_files())} файлов):")
+    bench_extract_scaling(PRAYERS_DIR, jobs_list)
+    bench_related(PRAYERS_DIR)
+
+    with tempfile.TemporaryDirectory() as pack_dir:
+        bench_packed(PRAYERS_DIR, os.path.join(pack_dir, "prayers.pack"))
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        total = make_synthetic_corpus(tmp_dir, args.factor)
+        print(f"\n⏱  Синтетический корпус x{args.factor} ({total} файлов):")
+        bench_extract_scaling(tmp_dir, jobs_list)
+        bench_related(tmp_dir)
+        bench_packed(tmp_dir, os.path.join(tmp_dir, "prayers.pack"))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+"""
+Сборка статических JSON-файлов для раздачи сервером
+Каждый JSON из data/ пересобирается в dist/data: без отступов, рядом - .gz и .br
+(если установлен пакет brotli), а в manifest.json - размеры и сильные ETag
+(хеш содержимого). Сервер отдает готовые байты и не сжимает ответы на лету.
+Пересобираются только файлы, у которых изменились размер или время изменения
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+from multiprocessing import Pool
+from typing import Any, Dict, List, Optional, Tuple
+
+from corpus_reader import atomic_write_bytes, list_json_files
+from prayer_catalog import CATALOG_DIR, source_stamp
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+SOURCE_DIR = "data"
+DIST_DIR = "dist/data"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_VERSION = 1
+
+# Каталоги внутри data/, которые сами являются результатом сборки
+EXCLUDED_DIRS = [CATALOG_DIR]
+
+GZIP_LEVEL = 9
+BROTLI_QUALITY = 11
+
+# Сколько символов sha256 идет в ETag (128 бит)
+ETAG_LENGTH = 32
+
+
+def list_sources(source_dir: str = SOURCE_DIR) -> List[str]:
+    """JSON-файлы данных без каталогов сборки, отсортированы"""
+    excluded = tuple(os.path.join(directory, "") for directory in EXCLUDED_DIRS)
+    return [file_path for file_path in list_json_files(source_dir) if not file_path.startswith(excluded)]
+
+
+def minify(raw: bytes) -> bytes:
+    """JSON без отступов и пробелов; порядок ключей сохраняется"""
+    return json.dumps(json.loads(raw), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def build_artifact(job: Tuple[str, str]) -> Tuple[str, Dict[str, Any]]:
+    """
+    Воркер: минифицирует один файл и пишет .json, .json.gz и .json.br
+    Возвращает (путь в dist, запись манифеста)
+    """
+    source, target = job
+    with open(source, 'rb') as f:
+        raw = f.read()
+    data = minify(raw)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    atomic_write_bytes(target, data)
+
+    # mtime=0: одинаковый вход дает одинаковый .gz, не меняется от сборки к сборке
+    gzipped = gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    atomic_write_bytes(target + ".gz", gzipped)
+    brotli_size = None
+    if brotli is not None:
+        compressed = brotli.compress(data, quality=BROTLI_QUALITY)
+        atomic_write_bytes(target + ".br", compressed)
+        brotli_size = len(compressed)
+    elif os.path.exists(target + ".br"):
+        # Старый .br от прежней версии файла отдавать нельзя
+        os.remove(target + ".br")
+
+    return target, {
+        "source": source,
+        "stamp": source_stamp(source),
+        "etag": f'"{hashlib.sha256(data).hexdigest()[:ETAG_LENGTH]}"',
+        "sourceSize": len(raw),
+        "size": len(data),
+        "gzip": len(gzipped),
+        "br": brotli_size,
+    }
+
+
+def load_manifest(manifest_path: str) -> Dict[str, Dict[str, Any]]:
+    try:
+        with open(manifest_path, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return manifest.get("files", {}) if manifest.get("version") == MANIFEST_VERSION else {}
+
+
+def is_fresh(entry: Optional[Dict[str, Any]], source: str, target: str) -> bool:
+    """Собранный файл актуален: источник не менялся, все сжатые копии на месте"""
+    if entry is None or entry["stamp"] != source_stamp(source):
+        return False
+    if not (os.path.exists(target) and os.path.exists(target + ".gz")):
+        return False
+    # После установки brotli недостающие .br нужно досоздать
+    return brotli is None or entry["br"] is not None
+
+
+def build_artifacts(source_dir: str = SOURCE_DIR, dist_dir: str = DIST_DIR, jobs: int = 1,
+                    rebuild: bool = False) -> Dict[str, int]:
+    """
+    Пересобирает измененные файлы, удаляет собранные файлы без источника, пишет манифест
+    С rebuild пересобирается все, но старый манифест все равно нужен для удаления
+    """
+    manifest_path = os.path.join(dist_dir, MANIFEST_NAME)
+    previous = load_manifest(manifest_path)
+    stats = {"files": 0, "built": 0, "unchanged": 0, "removed": 0,
+             "source_bytes": 0, "bytes": 0, "gzip_bytes": 0, "br_bytes": 0}
+
+    files: Dict[str, Dict[str, Any]] = {}
+    pending = []
+    for source in list_sources(source_dir):
+        key = os.path.relpath(source, source_dir).replace(os.sep, "/")
+        target = os.path.join(dist_dir, key)
+        entry = None if rebuild else previous.get(key)
+        if is_fresh(entry, source, target):
+            files[key] = entry
+        else:
+            pending.append((source, target))
+
+    if jobs <= 1:
+        for target, entry in map(build_artifact, pending):
+            files[os.path.relpath(target, dist_dir).replace(os.sep, "/")] = entry
+    else:
+        with Pool(jobs) as pool:
+            chunksize = max(1, len(pending) // (jobs * 8))
+            for target, entry in pool.imap_unordered(build_artifact, pending, chunksize=chunksize):
+                files[os.path.relpath(target, dist_dir).replace(os.sep, "/")] = entry
+
+    for key in previous:
+        if key not in files:
+            for suffix in ("", ".gz", ".br"):
+                target = os.path.join(dist_dir, key) + suffix
+                if os.path.exists(target):
+                    os.remove(target)
+            stats["removed"] += 1
+
+    files = dict(sorted(files.items()))
+    stats["files"] = len(files)
+    stats["built"] = len(pending)
+    stats["unchanged"] = len(files) - len(pending)
+    for entry in files.values():
+        stats["source_bytes"] += entry["sourceSize"]
+        stats["bytes"] += entry["size"]
+        stats["gzip_bytes"] += entry["gzip"]
+        stats["br_bytes"] += entry["br"] or 0
+
+    os.makedirs(dist_dir, exist_ok=True)
+    manifest = {"version": MANIFEST_VERSION, "files": files}
+    atomic_write_bytes(manifest_path, json.dumps(manifest, ensure_ascii=False, indent=2).encode('utf-8'))
+    return stats
+
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Сборка минифицированных и сжатых JSON-файлов для сайта")
+    parser.add_argument("--output", default=DIST_DIR,
+                        help=f"каталог сборки (по умолчанию {DIST_DIR})")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="количество процессов (по умолчанию 1)")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="пересобрать все файлы, а не только измененные")
+    args = parser.parse_args()
+
+    print("📦 Собираем JSON-файлы для раздачи...")
+    if brotli is None:
+        print("⚠️  Пакет brotli не установлен, .br не создаются (pip install brotli)", file=sys.stderr)
+    stats = build_artifacts(SOURCE_DIR, args.output, args.jobs, args.rebuild)
+
+    print(f"Файлов: {stats['files']}, пересобрано: {stats['built']}, без изменений: {stats['unchanged']}, "
+          f"удалено: {stats['removed']}")
+    sizes = (f"Размер: исходный {stats['source_bytes'] // 1024} КБ, без отступов {stats['bytes'] // 1024} КБ, "
+             f"gzip {stats['gzip_bytes'] // 1024} КБ")
+    if brotli is not None:
+        sizes += f", brotli {stats['br_bytes'] // 1024} КБ"
+    print(sizes)
+    print(f"✅ Манифест: {os.path.join(args.output, MANIFEST_NAME)}")
+
+
+if __name__ == "__main__":
+    main()
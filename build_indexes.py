@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Пересборка производных индексов из корпуса молитв
+Один проход по data/prayers/*.json строит prayers-index.json, prayers-metadata.json,
+prayers-by-days-complete.json и их копии для сайта. Результат детерминированный,
+перезаписываются только файлы, содержимое которых изменилось.
+public/data/prayers-metadata.json сюда не входит: это старый список
+{id, title, randomUrl, filename} со случайными url, которых нет в корпусе, поэтому
+он не пересобирается и не проверяется --check
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, List, Optional, Tuple
+
+from corpus_reader import PRAYERS_DIR, write_text_if_changed
+from prayer_catalog import iter_prayer_headers
+
+INDEX_FILE = "data/prayers-index.json"
+METADATA_FILE = "data/prayers-metadata.json"
+DAYS_FILE = "data/prayers-by-days-complete.json"
+DAYS_COPY_FILE = "src/data/prayers-by-days-complete.json"
+DAYS_TS_FILE = "src/data/prayers-by-days-complete.ts"
+PUBLIC_INDEX_FILE = "public/data/prayers-index.json"
+
+# Категория и день недели не хранятся в файлах молитв: они берутся из прежних
+# индексов, а для новых молитв используются значения по умолчанию
+DEFAULT_CATEGORY = "Разные молитвы"
+DEFAULT_DAY = "monday"
+DEFAULT_METADATA_VERSION = "2.0"
+
+
+def load_json_if_exists(file_path: str) -> Optional[Any]:
+    """Читает JSON файл, если он есть"""
+    if not os.path.exists(file_path):
+        return None
+    with open(file_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def render_json(data: Any) -> str:
+    """Тот же формат, что и у существующих индексов: отступ 2, без экранирования кириллицы"""
+    return json.dumps(data, ensure_ascii=False, indent=2)
+
+
+def prayer_tags(data: Dict[str, Any]) -> List[str]:
+    """Теги молитвы: summary.tags, у старых файлов - поле tags"""
+    summary = data.get('summary')
+    if isinstance(summary, dict) and isinstance(summary.get('tags'), list):
+        return summary['tags']
+    tags = data.get('tags')
+    return tags if isinstance(tags, list) else []
+
+
+def read_corpus(prayers_dir: str = PRAYERS_DIR) -> List[Dict[str, Any]]:
+    """
+    Заголовки всех молитв, нужные индексам. Тексты индексам не нужны, поэтому
+    при свежем data/catalog читается только headers.json (см. prayer_catalog.py)
+    """
+    headers = []
+    for data in iter_prayer_headers(prayers_dir):
+        payload_fields = data.get("payloadFields", [])
+        headers.append({
+            "id": data.get("id"),
+            "title": data.get("title", ""),
+            "url": data["url"],
+            "category": data.get("category"),
+            "tags": prayer_tags(data),
+            "timestamp": max(data.get(key) or "" for key in ("createdAt", "updatedAt", "enhancedAt")),
+            "hasModern": "contentModern" in payload_fields,
+            "hasExplanation": "explanation" in payload_fields,
+            "seoOptimized": "seoOptimized" in data.get("payloadKeys", []),
+        })
+    headers.sort(key=lambda header: header["url"])
+    return headers
+
+
+def corpus_timestamp(headers: List[Dict[str, Any]]) -> str:
+    """Время последнего изменения корпуса - вместо текущего времени, чтобы сборка была детерминированной"""
+    return max((header["timestamp"] for header in headers), default="")
+
+
+def build_index(headers: List[Dict[str, Any]], previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """prayers-index.json: id, title, url, category, tags для каждой молитвы"""
+    previous_categories = {
+        entry["url"]: entry.get("category")
+        for entry in (previous or {}).get("prayers", [])
+    }
+    prayers = [
+        {
+            "id": header["id"],
+            "title": header["title"],
+            "url": header["url"],
+            "category": header["category"] or previous_categories.get(header["url"]) or DEFAULT_CATEGORY,
+            "tags": header["tags"],
+        }
+        for header in headers
+    ]
+    return {
+        "lastUpdated": corpus_timestamp(headers),
+        "totalPrayers": len(prayers),
+        "prayers": prayers,
+    }
+
+
+def unique_in_order(values: List[str]) -> List[str]:
+    return list(dict.fromkeys(values))
+
+
+def build_metadata(index: Dict[str, Any], headers: List[Dict[str, Any]],
+                   previous: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """prayers-metadata.json: списки категорий и тегов и флаги наличия данных"""
+    prayers = index["prayers"]
+    return {
+        "lastUpdated": index["lastUpdated"],
+        "totalPrayers": len(prayers),
+        "categories": unique_in_order([prayer["category"] for prayer in prayers]),
+        "tags": unique_in_order([tag for prayer in prayers for tag in prayer["tags"]]),
+        "seoOptimized": any(header["seoOptimized"] for header in headers),
+        "hasModernTranslations": any(header["hasModern"] for header in headers),
+        "hasExplanations": any(header["hasExplanation"] for header in headers),
+        "version": (previous or {}).get("version", DEFAULT_METADATA_VERSION),
+    }
+
+
+def previous_day_assignments(previous: Dict[str, Any]) -> Tuple[Dict[str, str], set]:
+    """Из прежнего файла по дням: основной день каждой молитвы и множество универсальных"""
+    primary_days: Dict[str, str] = {}
+    universal = set()
+    for day, day_data in previous.get("weekDays", {}).items():
+        for prayer in day_data.get("prayers", []):
+            if prayer.get("isUniversal"):
+                universal.add(prayer["url"])
+            else:
+                primary_days.setdefault(prayer["url"], day)
+    return primary_days, universal
+
+
+def build_days(index: Dict[str, Any], previous: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    prayers-by-days-complete.json: описание дней и распределение молитв
+    Распределение по дням берется из прежнего файла, новые молитвы попадают в DEFAULT_DAY
+    Универсальные молитвы показываются во всех днях с isUniversal: true
+    """
+    if not previous:
+        return None
+
+    primary_days, universal = previous_day_assignments(previous)
+    week_days = previous["weekDays"]
+    if DEFAULT_DAY not in week_days:
+        return None
+
+    day_prayers: Dict[str, List[Dict[str, Any]]] = {day: [] for day in week_days}
+    universal_prayers = []
+    for prayer in index["prayers"]:
+        day = primary_days.get(prayer["url"], DEFAULT_DAY)
+        day_prayers[day if day in day_prayers else DEFAULT_DAY].append(dict(prayer, isUniversal=False))
+        if prayer["url"] in universal:
+            universal_prayers.append(dict(prayer, isUniversal=True))
+
+    days = {}
+    for day, day_data in week_days.items():
+        specific = day_prayers[day]
+        days[day] = {key: value for key, value in day_data.items() if key not in ("totalPrayers", "prayers")}
+        days[day]["totalPrayers"] = len(specific)
+        days[day]["prayers"] = specific + universal_prayers
+
+    total = len(index["prayers"])
+    metadata = dict(previous.get("metadata", {}))
+    metadata["generatedAt"] = index["lastUpdated"]
+    metadata["totalPrayers"] = total
+
+    statistics = dict(previous.get("statistics", {}))
+    statistics["totalPrayers"] = total
+    statistics["averagePrayersPerDay"] = round(total / len(days)) if days else 0
+    statistics["distribution"] = {day: days[day]["totalPrayers"] for day in days}
+
+    return {"metadata": metadata, "weekDays": days, "statistics": statistics}
+
+
+def build_public_index(index: Dict[str, Any]) -> Dict[str, Any]:
+    """Короткий индекс для public/data: только id, title и url"""
+    return {
+        "totalCount": index["totalPrayers"],
+        "lastUpdated": index["lastUpdated"],
+        "prayers": [
+            {"id": prayer["id"], "title": prayer["title"], "url": prayer["url"]}
+            for prayer in index["prayers"]
+        ],
+    }
+
+
+def build_outputs(prayers_dir: str = PRAYERS_DIR) -> Dict[str, str]:
+    """Собирает содержимое всех производных файлов: путь -> текст"""
+    headers = read_corpus(prayers_dir)
+    index = build_index(headers, load_json_if_exists(INDEX_FILE))
+    outputs = {
+        INDEX_FILE: render_json(index),
+        METADATA_FILE: render_json(build_metadata(index, headers, load_json_if_exists(METADATA_FILE))),
+        PUBLIC_INDEX_FILE: render_json(build_public_index(index)),
+    }
+
+    days = build_days(index, load_json_if_exists(DAYS_FILE))
+    if days is not None:
+        days_json = render_json(days)
+        outputs[DAYS_FILE] = days_json
+        outputs[DAYS_COPY_FILE] = days_json
+        outputs[DAYS_TS_FILE] = f"export default {days_json}"
+    return outputs
+
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Пересборка индексов молитв из data/prayers")
+    parser.add_argument("--check", action="store_true",
+                        help="ничего не записывать, код возврата 1, если индексы устарели")
+    args = parser.parse_args()
+
+    print("🔄 Пересобираем индексы из корпуса молитв...")
+    outputs = build_outputs()
+
+    stale = []
+    for file_path, text in outputs.items():
+        if args.check:
+            current = None
+            if os.path.exists(file_path):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    current = f.read()
+            if current != text:
+                stale.append(file_path)
+                print(f"⚠️  Устарел: {file_path}")
+            continue
+
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        if write_text_if_changed(file_path, text):
+            stale.append(file_path)
+            print(f"💾 Обновлен: {file_path}")
+        else:
+            print(f"✅ Без изменений: {file_path}")
+
+    if args.check:
+        if stale:
+            print(f"\n❌ Устаревших файлов: {len(stale)}, запустите build_indexes.py")
+            sys.exit(1)
+        print("\n✅ Все индексы актуальны")
+        return
+    print(f"\n✅ Готово! Обновлено файлов: {len(stale)}")
+
+
+if __name__ == "__main__":
+    main()
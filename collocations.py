@@ -0,0 +1,285 @@
+#!/usr/bin/env python3
+"""
+Устойчивые сочетания слов (биграммы и триграммы) в корпусе молитв
+Сочетания в пределах предложения считает corpus_scan.scan_file за тот же проход,
+что и частоты слов; частоты каждого файла вливаются в счетчики Space-Saving,
+поэтому в памяти не больше 2 * capacity счетчиков на каждую длину, сколько бы
+разных сочетаний ни было в корпусе. Сочетания с высоким PMI (слова стоят рядом
+чаще случайного) пишет в extracted_words/collocations.txt только extract_words.py;
+запуск этого модуля лишь показывает сочетания (например, с другими порогами)
+"""
+
+import argparse
+import math
+import os
+from collections import Counter
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from corpus_reader import (
+    PRAYERS_DIR,
+    iter_file_counts,
+    list_prayer_files,
+    write_text_if_changed,
+)
+from corpus_scan import NGRAM_SIZES, scan_file
+
+COLLOCATIONS_FILE = "extracted_words/collocations.txt"
+
+# Счетчиков Space-Saving на каждую длину сочетаний
+DEFAULT_CAPACITY = 50000
+
+# Сочетание попадает в результат, если гарантированно встретилось столько раз (count - error)
+MIN_COUNT = 5
+
+# Минимальный PMI (в битах): ниже - слова просто часто стоят рядом
+MIN_PMI = 3.0
+
+
+class Collocation(NamedTuple):
+    """Сочетание слов и его оценки"""
+    words: Tuple[str, ...]
+    count: int      # оценка Space-Saving (не меньше настоящего числа вхождений)
+    error: int      # на сколько оценка может быть завышена
+    pmi: float
+
+    @property
+    def phrase(self) -> str:
+        return " ".join(self.words)
+
+
+class SpaceSaving:
+    """
+    Поиск частых элементов потока в ограниченной памяти (Metwally et al., 2005)
+    Счетчики сгруппированы по значению, поэтому и увеличение, и вытеснение
+    самого редкого элемента выполняются за O(1). Частоты по частям корпуса
+    (файлам, воркерам) вливаются через merge, как объединение сводок
+    (Agarwal et al., 2012): память остается в пределах 2 * capacity счетчиков
+    """
+
+    def __init__(self, capacity: int):
+        if capacity <= 0:
+            raise ValueError("Число счетчиков должно быть положительным")
+        self.capacity = capacity
+        self.counts: Dict[Tuple[str, ...], int] = {}
+        self.errors: Dict[Tuple[str, ...], int] = {}
+        # значение счетчика -> элементы с этим значением (dict как упорядоченное множество)
+        self.buckets: Dict[int, Dict[Tuple[str, ...], None]] = {}
+        self.min_count = 0
+        # Верхняя граница настоящей частоты любого элемента, которого нет среди счетчиков
+        self.floor = 0
+        self.total = 0
+        # После merge корзины не ведутся, их пересобирает _compact
+        self._merged = False
+
+    def add(self, item: Tuple[str, ...]):
+        if self._merged:
+            self._compact()
+        self.total += 1
+        counts = self.counts
+        buckets = self.buckets
+        count = counts.get(item)
+        if count is None:
+            if len(counts) < self.capacity:
+                counts[item] = 1
+                self.errors[item] = 0
+                buckets.setdefault(1, {})[item] = None
+                self.min_count = 1
+                return
+            # Вытесняется один из самых редких элементов, новый наследует его счетчик.
+            # popitem берет последний добавленный: удаление с начала dict оставляет
+            # пустые слоты, и next(iter()) по ним становится линейным
+            count = self.min_count
+            bucket = buckets[count]
+            evicted, _ = bucket.popitem()
+            del counts[evicted]
+            del self.errors[evicted]
+            self.errors[item] = count
+            self.floor = count
+        else:
+            bucket = buckets[count]
+            del bucket[item]
+
+        counts[item] = count + 1
+        if not bucket:
+            del buckets[count]
+            if self.min_count == count:
+                self.min_count = count + 1
+        following = buckets.get(count + 1)
+        if following is None:
+            buckets[count + 1] = {item: None}
+        else:
+            following[item] = None
+
+    def merge(self, items: Iterable[Tuple[Tuple[str, ...], int]]):
+        """
+        Вливает точные частоты части потока (элемент, сколько раз встретился)
+        Новый элемент мог быть вытеснен раньше, поэтому получает floor и в счетчик, и в ошибку
+        """
+        counts = self.counts
+        errors = self.errors
+        floor = self.floor
+        for item, count in items:
+            self.total += count
+            previous = counts.get(item)
+            if previous is None:
+                counts[item] = floor + count
+                errors[item] = floor
+            else:
+                counts[item] = previous + count
+        self._merged = True
+        if len(counts) > 2 * self.capacity:
+            self._compact()
+
+    def _compact(self):
+        """Оставляет capacity самых частых элементов и пересобирает корзины"""
+        counts = self.counts
+        if len(counts) > self.capacity:
+            ranked = sorted(counts.items(), key=lambda entry: -entry[1])
+            self.floor = max(self.floor, ranked[self.capacity][1])
+            for item, _ in ranked[self.capacity:]:
+                del counts[item]
+                del self.errors[item]
+        self.buckets = {}
+        for item, count in counts.items():
+            self.buckets.setdefault(count, {})[item] = None
+        self.min_count = min(self.buckets, default=0)
+        self._merged = False
+
+    def guaranteed(self, item: Tuple[str, ...]) -> int:
+        return self.counts.get(item, 0) - self.errors.get(item, 0)
+
+    def items(self) -> Iterator[Tuple[Tuple[str, ...], int, int]]:
+        """(элемент, оценка, ошибка)"""
+        if self._merged:
+            self._compact()
+        for item, count in self.counts.items():
+            yield item, count, self.errors[item]
+
+
+def new_sketches(capacity: int = DEFAULT_CAPACITY, sizes: Sequence[int] = NGRAM_SIZES) -> Dict[int, SpaceSaving]:
+    """Пустые счетчики Space-Saving на каждую длину сочетаний"""
+    return {size: SpaceSaving(capacity) for size in sizes}
+
+
+def merge_ngram_counts(sketches: Dict[int, SpaceSaving], ngram_counts: Dict[str, int]):
+    """
+    Вливает частоты сочетаний одного файла ({"слово1 слово2": частота}, corpus_scan.scan_file)
+    в счетчики своей длины
+    """
+    by_size: Dict[int, List[Tuple[Tuple[str, ...], int]]] = {size: [] for size in sketches}
+    for ngram, count in ngram_counts.items():
+        words = tuple(ngram.split(" "))
+        if len(words) in by_size:
+            by_size[len(words)].append((words, count))
+    for size, items in by_size.items():
+        sketches[size].merge(items)
+
+
+def pmi(words: Tuple[str, ...], count: int, unigrams: Counter, total: int) -> float:
+    """
+    Поточечная взаимная информация в битах: log2 P(w1..wn) / (P(w1) * ... * P(wn))
+    Вероятность сочетания оценивается по числу слов корпуса, как и вероятности слов
+    """
+    score = math.log2(count / total)
+    for word in words:
+        score -= math.log2(unigrams[word] / total)
+    return score
+
+
+def rank_collocations(unigrams: Counter, sketches: Dict[int, SpaceSaving],
+                      min_count: int = MIN_COUNT, min_pmi: float = MIN_PMI) -> List[Collocation]:
+    """
+    Сочетания с гарантированной частотой не меньше min_count и PMI не меньше min_pmi
+    PMI считается по гарантированной частоте, чтобы вытеснения не завышали оценку
+    Порядок: по частоте, затем по PMI (у редких сочетаний PMI всегда высокий)
+    """
+    total = sum(unigrams.values())
+    result = []
+    for sketch in sketches.values():
+        for words, count, error in sketch.items():
+            guaranteed = count - error
+            if guaranteed < min_count:
+                continue
+            score = pmi(words, guaranteed, unigrams, total)
+            if score >= min_pmi:
+                result.append(Collocation(words, count, error, round(score, 3)))
+    result.sort(key=lambda item: (-item.count, -item.pmi, item.words))
+    return result
+
+
+def build_collocations(prayers_dir: str = PRAYERS_DIR, capacity: int = DEFAULT_CAPACITY,
+                       min_count: int = MIN_COUNT, min_pmi: float = MIN_PMI, jobs: int = 1) -> List[Collocation]:
+    """Один проход corpus_scan.scan_file по корпусу без кэша, как extract_words.py --no-cache"""
+    unigrams = Counter()
+    sketches = new_sketches(capacity)
+    for result in iter_file_counts(list_prayer_files(prayers_dir), jobs, scan_file):
+        unigrams.update(result.counts)
+        merge_ngram_counts(sketches, result.ngrams)
+    return rank_collocations(unigrams, sketches, min_count, min_pmi)
+
+
+def save_collocations_file(collocations: List[Collocation], file_path: str = COLLOCATIONS_FILE) -> bool:
+    """
+    Формат строки: сочетание - количество - PMI
+    Возвращает True, если файл был перезаписан
+    """
+    lines = [
+        "# Устойчивые сочетания слов в молитвах (биграммы и триграммы)\n",
+        "# Формат: сочетание - количество - PMI (в битах), по убыванию количества\n",
+        f"# Всего сочетаний: {len(collocations)}\n\n",
+    ]
+    lines.extend(f"{item.phrase} - {item.count} - {item.pmi}\n" for item in collocations)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    return write_text_if_changed(file_path, "".join(lines))
+
+
+def load_collocations(file_path: str = COLLOCATIONS_FILE, min_pmi: float = MIN_PMI) -> List[Tuple[Tuple[str, ...], int, float]]:
+    """Читает collocations.txt: [(слова, количество, PMI)]; пустой список, если файла нет"""
+    result = []
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.startswith('#') or ' - ' not in line:
+                    continue
+                phrase, count, score = line.strip().rsplit(' - ', 2)
+                if float(score) >= min_pmi:
+                    result.append((tuple(phrase.split()), int(count), float(score)))
+    except FileNotFoundError:
+        pass
+    return result
+
+
+def phrases_by_word(collocations: Iterable[Tuple[Tuple[str, ...], int, float]],
+                    limit: Optional[int] = 5) -> Dict[str, List[str]]:
+    """Слово -> самые частые сочетания с ним (для показа при проверке слов)"""
+    by_word: Dict[str, List[Tuple[int, str]]] = {}
+    for words, count, _ in collocations:
+        for word in set(words):
+            by_word.setdefault(word, []).append((-count, " ".join(words)))
+    return {word: [phrase for _, phrase in sorted(items)[:limit]] for word, items in by_word.items()}
+
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Поиск устойчивых сочетаний слов в молитвах "
+                                                 f"(файл {COLLOCATIONS_FILE} пишет extract_words.py)")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY,
+                        help=f"счетчиков на каждую длину сочетаний (по умолчанию {DEFAULT_CAPACITY})")
+    parser.add_argument("--min-count", type=int, default=MIN_COUNT,
+                        help=f"минимальная частота сочетания (по умолчанию {MIN_COUNT})")
+    parser.add_argument("--min-pmi", type=float, default=MIN_PMI,
+                        help=f"минимальный PMI в битах (по умолчанию {MIN_PMI})")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="количество процессов для разбора файлов (по умолчанию 1)")
+    parser.add_argument("--top", type=int, default=20, help="сколько сочетаний показать")
+    args = parser.parse_args()
+
+    print("🔍 Ищем устойчивые сочетания слов...")
+    collocations = build_collocations(PRAYERS_DIR, args.capacity, args.min_count, args.min_pmi, args.jobs)
+    print(f"📊 Сочетаний: {len(collocations)}")
+    for item in collocations[:args.top]:
+        print(f"  {item.phrase}: {item.count} (PMI {item.pmi})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,233 @@
+#!/usr/bin/env python3
+"""
+Общий модуль чтения корпуса молитв
+Разбирает каждый файл из data/prayers один раз и отдает поток токенов по полям,
+из которого строятся уникальные слова, частоты и любая другая статистика
+"""
+
+import glob
+import json
+import os
+import re
+import tempfile
+from collections import Counter
+from datetime import datetime, timezone
+from multiprocessing import Pool
+from typing import Dict, Any, Callable, Iterator, List, Optional, Tuple
+
+from text_normalize import normalize_text
+
+PRAYERS_DIR = "data/prayers"
+
+# Текстовые поля молитвы, из которых извлекаются слова
+TEXT_FIELDS = ['content', 'contentModern', 'summary', 'explanation']
+
+# После normalize_text буквы ё в тексте уже нет
+WORD_RE = re.compile(r'\b[а-я]+\b')
+
+# Меняется при любом изменении токенизации, чтобы сбросить кэш слов
+TOKENIZER_VERSION = 2
+
+
+def list_prayer_files(prayers_dir: str = PRAYERS_DIR) -> List[str]:
+    """Возвращает отсортированный список путей к JSON файлам молитв"""
+    if not os.path.isdir(prayers_dir):
+        return []
+    return [
+        os.path.join(prayers_dir, name)
+        for name in sorted(os.listdir(prayers_dir))
+        if name.endswith('.json')
+    ]
+
+
+def list_json_files(directory: str) -> List[str]:
+    """JSON-файлы каталога (рекурсивно), отсортированы"""
+    result = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        result.extend(os.path.join(root, name) for name in sorted(files) if name.endswith('.json'))
+    return result
+
+
+def resolve_paths(patterns: List[str]) -> List[str]:
+    """Раскрывает каталоги и glob-шаблоны в отсортированный список JSON файлов"""
+    files = []
+    for pattern in patterns:
+        if os.path.isdir(pattern):
+            files.extend(list_prayer_files(pattern))
+        elif os.path.isfile(pattern):
+            files.append(pattern)
+        else:
+            files.extend(sorted(glob.glob(pattern)))
+    return list(dict.fromkeys(files))
+
+
+def load_prayer(file_path: str) -> Optional[Dict[str, Any]]:
+    """Загружает JSON файл молитвы, при ошибке возвращает None"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except Exception as e:
+        print(f"Ошибка обработки файла {os.path.basename(file_path)}: {e}")
+        return None
+
+
+def get_field_text(data: Dict[str, Any], field: str) -> str:
+    """
+    Возвращает текст поля молитвы
+    summary бывает объектом {text, tags} - из него берется text
+    """
+    value = data.get(field)
+    if isinstance(value, dict):
+        value = value.get('text')
+    return value if isinstance(value, str) else ""
+
+
+def extract_tokens(text: str) -> List[str]:
+    """
+    Разбивает текст на слова (с повторами)
+    Текст сначала нормализуется: нижний регистр, без ударений, ё -> е
+    """
+    return WORD_RE.findall(normalize_text(text))
+
+
+def tokenize_prayer(data: Dict[str, Any]) -> Iterator[Tuple[str, List[str]]]:
+    """Отдает пары (поле, токены) для всех непустых текстовых полей молитвы"""
+    for field in TEXT_FIELDS:
+        text = get_field_text(data, field)
+        if text:
+            yield field, extract_tokens(text)
+
+
+def iter_corpus_tokens(prayers_dir: str = PRAYERS_DIR) -> Iterator[Tuple[str, str, List[str]]]:
+    """
+    Единственный проход по корпусу: каждый файл читается и разбирается один раз
+    Отдает тройки (имя_файла, поле, токены)
+    """
+    for file_path in list_prayer_files(prayers_dir):
+        data = load_prayer(file_path)
+        if data is None:
+            continue
+        filename = os.path.basename(file_path)
+        for field, tokens in tokenize_prayer(data):
+            yield filename, field, tokens
+
+
+def count_prayer_tokens(data: Dict[str, Any]) -> Counter:
+    """Считает частоту слов во всех текстовых полях одной молитвы"""
+    counter = Counter()
+    for _, tokens in tokenize_prayer(data):
+        counter.update(tokens)
+    return counter
+
+
+def scan_prayer_file(file_path: str) -> Optional[Tuple[str, List[Tuple[str, int]], Counter]]:
+    """
+    Разбирает один файл молитвы
+    Возвращает (имя_файла, [(поле, уникальных_слов)], частоты) или None при ошибке
+    """
+    data = load_prayer(file_path)
+    if data is None:
+        return None
+    
+    counter = Counter()
+    field_stats = []
+    for field, tokens in tokenize_prayer(data):
+        counter.update(tokens)
+        field_stats.append((field, len(set(tokens))))
+    return os.path.basename(file_path), field_stats, counter
+
+
+def iter_file_counts(file_paths: List[str], jobs: int = 1,
+                     scan: Callable[[str], Any] = scan_prayer_file) -> Iterator[Any]:
+    """
+    Отдает результаты scan (по умолчанию scan_prayer_file) в порядке file_paths
+    При jobs > 1 файлы разбираются в пуле процессов, каждый воркер
+    возвращает частичный Counter, а слияние делает вызывающий код
+    """
+    if jobs <= 1:
+        for file_path in file_paths:
+            result = scan(file_path)
+            if result is not None:
+                yield result
+        return
+    
+    chunksize = max(1, len(file_paths) // (jobs * 8))
+    with Pool(jobs) as pool:
+        for result in pool.imap(scan, file_paths, chunksize=chunksize):
+            if result is not None:
+                yield result
+
+
+def count_corpus(prayers_dir: str = PRAYERS_DIR, jobs: int = 1) -> Counter:
+    """Считает частоты слов по всему корпусу, сливая частичные счетчики файлов"""
+    word_counter = Counter()
+    for _, _, counter in iter_file_counts(list_prayer_files(prayers_dir), jobs):
+        word_counter.update(counter)
+    return word_counter
+
+
+def sorted_frequencies(counter: Counter) -> List[Tuple[str, int]]:
+    """Детерминированный порядок частот: по убыванию количества, затем по алфавиту"""
+    return sorted(counter.items(), key=lambda item: (-item[1], item[0]))
+
+
+def utc_now_iso() -> str:
+    """Текущее время UTC в формате полей createdAt/updatedAt: 2025-09-22T11:39:16.973Z"""
+    now = datetime.now(timezone.utc)
+    return now.strftime('%Y-%m-%dT%H:%M:%S.') + f"{now.microsecond // 1000:03d}Z"
+
+
+def atomic_write_text(file_path: str, text: str):
+    """
+    Атомарно записывает файл: сначала во временный файл рядом, затем os.replace
+    При сбое на диске остается либо старая, либо новая версия, но не обрезанная
+    """
+    directory = os.path.dirname(file_path) or "."
+    try:
+        mode = os.stat(file_path).st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o644
+    
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def atomic_write_bytes(file_path: str, data: bytes):
+    """Атомарно записывает двоичный файл, как atomic_write_text"""
+    directory = os.path.dirname(file_path) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(file_path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def write_text_if_changed(file_path: str, text: str) -> bool:
+    """Записывает файл, только если его содержимое отличается; возвращает True при записи"""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            if f.read() == text:
+                return False
+    except FileNotFoundError:
+        pass
+    
+    atomic_write_text(file_path, text)
+    return True
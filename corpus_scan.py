@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Полный разбор одного файла молитвы за один проход
+Из одного чтения файла получаются частоты слов для словаря корпуса, частоты
+сочетаний слов в пределах предложения (их сводит collocations.py) и запись
+для поискового индекса. Результаты по файлам хранит кэш word_cache.py,
+поэтому все выходные файлы extract_words.py строятся без повторного чтения корпуса
+"""
+
+import os
+from collections import Counter
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from build_indexes import prayer_tags
+from corpus_reader import TEXT_FIELDS, extract_tokens, get_field_text, load_prayer
+from text_chunker import sentence_spans
+
+# Длины сочетаний слов для collocations.py
+NGRAM_SIZES = (2, 3)
+
+
+class SearchDoc(NamedTuple):
+    """Молитва в поисковом индексе"""
+    id: Any
+    url: str
+    title: str
+    terms: List[str]    # отсортированные нормализованные слова
+
+
+class FileScan(NamedTuple):
+    """Результат разбора одного файла"""
+    filename: str
+    field_stats: List[Tuple[str, int]]  # (поле, уникальных слов)
+    counts: Counter
+    ngrams: Counter     # "слово1 слово2" -> сколько раз встретилось в предложениях файла
+    doc: SearchDoc
+
+
+def prayer_search_terms(data: Dict[str, Any], words: Iterable[str]) -> Set[str]:
+    """Слова для поиска: название, теги и уже разобранные слова текстовых полей"""
+    terms = set(extract_tokens(data.get("title", "")))
+    for tag in prayer_tags(data):
+        terms.update(extract_tokens(tag))
+    terms.update(words)
+    return terms
+
+
+def scan_file(file_path: str) -> Optional[FileScan]:
+    """Разбирает файл молитвы; None, если файл не читается"""
+    data = load_prayer(file_path)
+    if data is None:
+        return None
+
+    filename = os.path.basename(file_path)
+    counts = Counter()
+    ngrams = Counter()
+    field_stats = []
+    for field in TEXT_FIELDS:
+        text = get_field_text(data, field)
+        if not text:
+            continue
+        # Слова не переходят границу предложения, поэтому токены поля - это токены его предложений подряд
+        tokens = []
+        for start, end in sentence_spans(text):
+            sentence = extract_tokens(text[start:end])
+            tokens.extend(sentence)
+            for size in NGRAM_SIZES:
+                ngrams.update(" ".join(ngram) for ngram in zip(*(sentence[i:] for i in range(size))))
+        counts.update(tokens)
+        field_stats.append((field, len(set(tokens))))
+
+    url = data.get("url") or filename[:-len('.json')]
+    terms = sorted(prayer_search_terms(data, counts))
+    return FileScan(filename, field_stats, counts, ngrams, SearchDoc(data.get("id"), url, data.get("title", ""), terms))
@@ -4,51 +4,90 @@
 Разбивает слова на файлы по 500 слов для удобного анализа
 """
 
-import json
+import argparse
 import os
-import re
 from collections import Counter
-from typing import Set, List
+from typing import Dict, List, Optional, Set, Tuple
+
+from collocations import (
+    COLLOCATIONS_FILE,
+    SpaceSaving,
+    merge_ngram_counts,
+    new_sketches,
+    rank_collocations,
+    save_collocations_file,
+)
+from corpus_reader import (
+    PRAYERS_DIR,
+    extract_tokens,
+    iter_file_counts,
+    list_prayer_files,
+    sorted_frequencies,
+    write_text_if_changed,
+)
+from corpus_scan import SearchDoc, scan_file
+from run_profile import RunProfile, StageStats, add_profile_argument
+from word_cache import CACHE_FILE, cached_corpus
+from search_index import SEARCH_INDEX_FILE, save_search_index
+from word_families import FAMILIES_FILE, save_families_file
+
+WORDS_DIR = "extracted_words"
+FREQUENCY_FILE = os.path.join(WORDS_DIR, "word_frequency.txt")
 
 def extract_words_from_text(text: str) -> Set[str]:
     """Извлекает все слова из текста"""
-    # Убираем знаки препинания и разбиваем на слова
-    words = re.findall(r'\b[а-яё]+\b', text.lower())
-    return set(words)
+    return set(extract_tokens(text))
 
-def process_all_prayers() -> Set[str]:
-    """Обрабатывает все файлы молитв и извлекает уникальные слова"""
-    prayers_dir = "data/prayers"
-    all_words = set()
+def process_all_prayers(jobs: int = 1, use_cache: bool = True,
+                        stage: Optional[StageStats] = None) -> Tuple[Counter, Dict[int, SpaceSaving], List[SearchDoc]]:
+    """
+    Обрабатывает все файлы молитв за один проход
+    Возвращает частоты слов (ключи счетчика - это множество уникальных слов),
+    счетчики Space-Saving частых сочетаний слов по длинам и записи поискового индекса по файлам
+    При jobs > 1 файлы разбираются параллельно, результат тот же
+    С кэшем заново разбираются только файлы, изменившиеся с прошлого запуска
+    В stage учитываются прочитанные файлы молитв и кэш
+    """
+    word_counter = Counter()
+    sketches = new_sketches()
+    docs: List[SearchDoc] = []
     
-    if not os.path.exists(prayers_dir):
-        print(f"Директория {prayers_dir} не найдена")
-        return all_words
+    if not os.path.exists(PRAYERS_DIR):
+        print(f"Директория {PRAYERS_DIR} не найдена")
+        return word_counter, sketches, docs
     
-    files = [f for f in os.listdir(prayers_dir) if f.endswith('.json')]
+    files = list_prayer_files()
     print(f"Найдено {len(files)} файлов молитв")
     
-    for filename in files:
-        filepath = os.path.join(prayers_dir, filename)
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Извлекаем слова из всех текстовых полей
-            text_fields = ['content', 'contentModern', 'summary', 'explanation']
-            for field in text_fields:
-                if field in data and data[field]:
-                    words = extract_words_from_text(data[field])
-                    all_words.update(words)
-                    print(f"  {filename}: {field} - {len(words)} слов")
-                    
-        except Exception as e:
-            print(f"Ошибка обработки файла {filename}: {e}")
-    
-    return all_words
+    if use_cache:
+        corpus = cached_corpus(PRAYERS_DIR, jobs)
+        if stage is not None:
+            stage.read_files(corpus.hashed + [CACHE_FILE])
+            if corpus.hashed:
+                stage.wrote_file(CACHE_FILE)
+        for filename, field_stats in corpus.rescanned:
+            for field, unique_count in field_stats:
+                print(f"  {filename}: {field} - {unique_count} слов")
+        print(f"Заново разобрано файлов: {len(corpus.rescanned)} (кэш: {CACHE_FILE})")
+        return corpus.words, corpus.ngrams, corpus.docs
+    
+    if stage is not None:
+        stage.read_files(files)
+    for result in iter_file_counts(files, jobs, scan_file):
+        word_counter.update(result.counts)
+        merge_ngram_counts(sketches, result.ngrams)
+        docs.append(result.doc)
+        for field, unique_count in result.field_stats:
+            print(f"  {result.filename}: {field} - {unique_count} слов")
+    
+    return word_counter, sketches, docs
 
-def save_words_to_files(words: Set[str], words_per_file: int = 500):
-    """Сохраняет слова в файлы по указанному количеству"""
+def chunk_file_path(number: int) -> str:
+    """Путь к файлу слов с номером number (с 1)"""
+    return os.path.join(WORDS_DIR, f"words_chunk_{number:03d}.txt")
+
+def save_words_to_files(words: Set[str], words_per_file: int = 500) -> List[str]:
+    """Сохраняет слова в файлы по указанному количеству; возвращает перезаписанные файлы"""
     words_list = sorted(list(words))
     total_words = len(words_list)
     
@@ -56,86 +95,128 @@ def save_words_to_files(words: Set[str], words_per_file: int = 500):
     print(f"Будет создано файлов: {(total_words + words_per_file - 1) // words_per_file}")
     
     # Создаем директорию для файлов со словами
-    words_dir = "extracted_words"
-    os.makedirs(words_dir, exist_ok=True)
+    os.makedirs(WORDS_DIR, exist_ok=True)
     
-    # Разбиваем на файлы
+    # Разбиваем на файлы, перезаписывая только изменившиеся
+    expected = set()
+    written = []
     for i in range(0, total_words, words_per_file):
         chunk = words_list[i:i + words_per_file]
-        filename = f"words_chunk_{i//words_per_file + 1:03d}.txt"
-        filepath = os.path.join(words_dir, filename)
+        filepath = chunk_file_path(i // words_per_file + 1)
+        expected.add(os.path.basename(filepath))
         
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(f"# Слова {i+1}-{min(i+words_per_file, total_words)} из {total_words}\n")
-            f.write(f"# Всего слов в файле: {len(chunk)}\n\n")
-            
-            for word in chunk:
-                f.write(f"{word}\n")
+        text = (f"# Слова {i+1}-{min(i+words_per_file, total_words)} из {total_words}\n"
+                f"# Всего слов в файле: {len(chunk)}\n\n"
+                + "".join(f"{word}\n" for word in chunk))
         
-        print(f"Создан файл: {filepath} ({len(chunk)} слов)")
+        if write_text_if_changed(filepath, text):
+            written.append(filepath)
+            print(f"Создан файл: {filepath} ({len(chunk)} слов)")
+    
+    # Удаляем лишние файлы, оставшиеся от словаря большего размера
+    for filename in os.listdir(WORDS_DIR):
+        if filename.startswith("words_chunk_") and filename.endswith(".txt") and filename not in expected:
+            os.remove(os.path.join(WORDS_DIR, filename))
+            print(f"Удален устаревший файл: {filename}")
+    return written
 
-def create_word_frequency_file(words: Set[str]):
-    """Создает файл с частотой слов"""
-    prayers_dir = "data/prayers"
-    word_counter = Counter()
-    
-    files = [f for f in os.listdir(prayers_dir) if f.endswith('.json')]
-    
-    for filename in files:
-        filepath = os.path.join(prayers_dir, filename)
-        try:
-            with open(filepath, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-            
-            # Считаем частоту слов
-            text_fields = ['content', 'contentModern', 'summary', 'explanation']
-            for field in text_fields:
-                if field in data and data[field]:
-                    words_in_text = re.findall(r'\b[а-яё]+\b', data[field].lower())
-                    word_counter.update(words_in_text)
-                    
-        except Exception as e:
-            print(f"Ошибка обработки файла {filename}: {e}")
-    
-    # Сохраняем частоту слов
-    words_dir = "extracted_words"
-    filepath = os.path.join(words_dir, "word_frequency.txt")
-    
-    with open(filepath, 'w', encoding='utf-8') as f:
-        f.write("# Частота слов в молитвах\n")
-        f.write("# Формат: слово - количество вхождений\n\n")
-        
-        for word, count in word_counter.most_common():
-            f.write(f"{word} - {count}\n")
-    
-    print(f"Создан файл частоты слов: {filepath}")
+def create_word_frequency_file(word_counter: Counter) -> Optional[str]:
+    """Создает файл с частотой слов по уже посчитанному счетчику; возвращает путь, если файл изменился"""
+    filepath = FREQUENCY_FILE
+    
+    text = ("# Частота слов в молитвах\n"
+            "# Формат: слово - количество вхождений\n\n"
+            + "".join(f"{word} - {count}\n" for word, count in sorted_frequencies(word_counter)))
+    
+    if write_text_if_changed(filepath, text):
+        print(f"Создан файл частоты слов: {filepath}")
+        return filepath
+    print(f"Файл частоты слов не изменился: {filepath}")
+    return None
+
+def parse_args() -> argparse.Namespace:
+    """Разбирает аргументы командной строки"""
+    parser = argparse.ArgumentParser(description="Извлечение уникальных слов из молитв")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="количество процессов для разбора файлов (по умолчанию 1)")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="разобрать весь корпус заново, не используя кэш слов")
+    add_profile_argument(parser)
+    return parser.parse_args()
 
 def main():
     """Главная функция"""
+    args = parse_args()
+    run = RunProfile("extract_words", args.profile)
     print("🔍 Извлекаем все уникальные слова из молитв...")
     
-    # Извлекаем все слова
-    all_words = process_all_prayers()
+    # Извлекаем все слова и их частоты за один проход по корпусу
+    with run.stage("scan") as stage:
+        word_counter, sketches, search_docs = process_all_prayers(args.jobs, not args.no_cache, stage)
+    all_words = set(word_counter)
     
     if not all_words:
         print("❌ Не удалось извлечь слова")
+        run.finish()
         return
     
     print(f"\n📊 Статистика:")
     print(f"  Всего уникальных слов: {len(all_words)}")
     
-    # Сохраняем слова в файлы
+    # Сохраняем слова в файлы; каждый выходной файл сначала сравнивается с прежней версией
     print(f"\n💾 Сохраняем слова в файлы...")
-    save_words_to_files(all_words, 500)
+    with run.stage("word_chunks") as stage:
+        stage.read_if_exists(chunk_file_path(number) for number in range(1, (len(all_words) + 499) // 500 + 1))
+        for filepath in save_words_to_files(all_words, 500):
+            stage.wrote_file(filepath)
     
     # Создаем файл с частотой слов
     print(f"\n📈 Создаем файл с частотой слов...")
-    create_word_frequency_file(all_words)
+    with run.stage("frequency") as stage:
+        stage.read_if_exists([FREQUENCY_FILE])
+        filepath = create_word_frequency_file(word_counter)
+        if filepath:
+            stage.wrote_file(filepath)
+    
+    # Устойчивые сочетания для поиска архаичных фраз
+    print(f"\n📎 Ищем устойчивые сочетания слов...")
+    with run.stage("collocations") as stage:
+        collocations = rank_collocations(word_counter, sketches)
+        stage.read_if_exists([COLLOCATIONS_FILE])
+        if save_collocations_file(collocations):
+            stage.wrote_file(COLLOCATIONS_FILE)
+            print(f"Создан файл сочетаний: {COLLOCATIONS_FILE} ({len(collocations)} сочетаний)")
+        else:
+            print(f"Файл сочетаний не изменился: {COLLOCATIONS_FILE}")
+    
+    # Группируем словоформы в семейства для проверки архаизмов
+    print(f"\n🌳 Группируем словоформы по основам...")
+    with run.stage("families") as stage:
+        stage.read_if_exists([FAMILIES_FILE])
+        if save_families_file(word_counter):
+            stage.wrote_file(FAMILIES_FILE)
+            print(f"Создан файл семейств слов: {FAMILIES_FILE}")
+        else:
+            print(f"Файл семейств слов не изменился: {FAMILIES_FILE}")
+    
+    # Поисковый индекс для сайта
+    print(f"\n🔎 Собираем поисковый индекс...")
+    with run.stage("search_index") as stage:
+        stage.read_if_exists([SEARCH_INDEX_FILE])
+        if save_search_index(search_docs):
+            stage.wrote_file(SEARCH_INDEX_FILE)
+            print(f"Создан поисковый индекс: {SEARCH_INDEX_FILE}")
+        else:
+            print(f"Поисковый индекс не изменился: {SEARCH_INDEX_FILE}")
     
     print(f"\n✅ Готово! Проверьте папку 'extracted_words'")
     print(f"📁 Файлы для анализа:")
     print(f"  - words_chunk_*.txt - слова по 500 штук")
     print(f"  - word_frequency.txt - частота слов")
+    print(f"  - collocations.txt - устойчивые сочетания с PMI")
+    print(f"  - word_families.txt - семейства словоформ")
+    print(f"  - {SEARCH_INDEX_FILE} - поисковый индекс для сайта")
+    run.finish()
 
 if __name__ == "__main__":
     main()
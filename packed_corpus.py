@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Корпус молитв одним бинарным файлом с таблицей смещений
+Каждое поле каждой молитвы лежит отдельным JSON-фрагментом, в конце файла -
+таблица смещений и футер. Читатель открывает файл через mmap и разбирает только
+запрошенные поля нужной молитвы, остальной корпус не трогается.
+Обновление дописывает измененные молитвы и новую таблицу в конец копии файла,
+которая затем атомарно заменяет старую: читатели через mmap и сбой во время записи
+видят либо старый, либо новый файл целиком
+"""
+
+import argparse
+import json
+import mmap
+import os
+import struct
+import tempfile
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from corpus_reader import PRAYERS_DIR, list_prayer_files, load_prayer
+from prayer_catalog import CATALOG_DIR, source_stamp
+
+PACK_FILE = os.path.join(CATALOG_DIR, "prayers.pack")
+PACK_MAGIC = b"PRAYPACK"
+PACK_VERSION = 1
+
+# Футер: смещение таблицы, длина таблицы, версия, магия
+FOOTER = struct.Struct("<QQI8s")
+
+# Когда мертвые данные (старые версии молитв) больше живых, файл пересобирается целиком
+MAX_DEAD_RATIO = 1.0
+
+# url -> {"id", "file", "stamp", "fields": {поле: [смещение, длина]}}
+PackTable = Dict[str, Dict[str, Any]]
+
+
+def encode_prayer(data: Dict[str, Any], start: int) -> Tuple[bytes, Dict[str, List[int]]]:
+    """Кодирует поля молитвы подряд, начиная со смещения start"""
+    chunks = []
+    fields = {}
+    offset = start
+    for key, value in data.items():
+        blob = json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        fields[key] = [offset, len(blob)]
+        chunks.append(blob)
+        offset += len(blob)
+    return b"".join(chunks), fields
+
+
+def read_table(pack_file: str) -> Optional[Tuple[PackTable, int]]:
+    """Таблица и смещение ее начала (конец живых данных) или None, если файла нет или он чужой"""
+    try:
+        with open(pack_file, 'rb') as f:
+            size = f.seek(0, os.SEEK_END)
+            if size < len(PACK_MAGIC) + FOOTER.size:
+                return None
+            f.seek(size - FOOTER.size)
+            table_offset, table_length, version, magic = FOOTER.unpack(f.read(FOOTER.size))
+            if magic != PACK_MAGIC or version != PACK_VERSION:
+                return None
+            f.seek(table_offset)
+            return json.loads(f.read(table_length)), table_offset
+    except (OSError, ValueError, struct.error):
+        return None
+
+
+def write_table(f, table: PackTable):
+    """Дописывает таблицу и футер в текущую позицию файла"""
+    table_offset = f.tell()
+    blob = json.dumps(table, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    f.write(blob)
+    f.write(FOOTER.pack(table_offset, len(blob), PACK_VERSION, PACK_MAGIC))
+
+
+def live_bytes(table: PackTable) -> int:
+    return sum(length for entry in table.values() for _, length in entry["fields"].values())
+
+
+def write_pack(pack_file: str, file_paths: List[str], table: PackTable, base_length: int = 0) -> int:
+    """
+    Пишет новую версию файла во временный файл рядом и подменяет старую через os.replace
+    base_length > 0 - сколько байт старого файла (данные до таблицы) скопировать без перекодирования,
+    0 - файл собирается с нуля. Возвращает число дописанных молитв
+    """
+    directory = os.path.dirname(pack_file) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(pack_file)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            if base_length:
+                with open(pack_file, 'rb') as old:
+                    remaining = base_length
+                    while remaining:
+                        block = old.read(min(remaining, 1 << 20))
+                        if not block:
+                            raise ValueError(f"Файл {pack_file} короче своей таблицы")
+                        f.write(block)
+                        remaining -= len(block)
+            else:
+                f.write(PACK_MAGIC)
+            appended = append_prayers(f, file_paths, table)
+            write_table(f, table)
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, pack_file)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    return appended
+
+
+def pack_corpus(prayers_dir: str = PRAYERS_DIR, pack_file: str = PACK_FILE, rebuild: bool = False) -> Dict[str, int]:
+    """
+    Собирает или обновляет упакованный корпус
+    Заново кодируются только файлы, у которых изменились размер или время изменения;
+    они дописываются в конец копии вместе с новой таблицей. Старая таблица становится мертвыми данными
+    """
+    stats = {"prayers": 0, "appended": 0, "removed": 0, "rebuilt": 0}
+    existing = None if rebuild else read_table(pack_file)
+
+    file_paths = list_prayer_files(prayers_dir)
+    changed = []
+    table: PackTable = {}
+    if existing is not None:
+        old_table, _ = existing
+        by_file = {entry["file"]: (url, entry) for url, entry in old_table.items()}
+        for file_path in file_paths:
+            old = by_file.get(os.path.basename(file_path))
+            if old is not None and old[1]["stamp"] == source_stamp(file_path):
+                table[old[0]] = old[1]
+            else:
+                changed.append(file_path)
+        current_files = {os.path.basename(file_path) for file_path in file_paths}
+        stats["removed"] = sum(1 for name in by_file if name not in current_files)
+    else:
+        changed = file_paths
+
+    os.makedirs(os.path.dirname(pack_file), exist_ok=True)
+    if existing is not None and not changed and stats["removed"] == 0:
+        stats["prayers"] = len(table)
+        return stats
+
+    dead = 0
+    if existing is not None:
+        dead = existing[1] - len(PACK_MAGIC) - live_bytes(table)
+    if existing is None or dead > MAX_DEAD_RATIO * max(live_bytes(table), 1):
+        # Пересборка с нуля
+        table = {}
+        stats["rebuilt"] = 1
+        stats["appended"] = write_pack(pack_file, file_paths, table)
+    else:
+        # Данные до старой таблицы копируются как есть, таблица не копируется: она больше не нужна
+        stats["appended"] = write_pack(pack_file, changed, table, existing[1])
+
+    stats["prayers"] = len(table)
+    return stats
+
+
+def append_prayers(f, file_paths: List[str], table: PackTable) -> int:
+    """Дописывает молитвы в текущую позицию файла и обновляет таблицу"""
+    appended = 0
+    for file_path in file_paths:
+        data = load_prayer(file_path)
+        if data is None:
+            continue
+        url = data.get("url") or os.path.basename(file_path)[:-len('.json')]
+        blob, fields = encode_prayer(data, f.tell())
+        f.write(blob)
+        table[url] = {
+            "id": data.get("id"),
+            "file": os.path.basename(file_path),
+            "stamp": source_stamp(file_path),
+            "fields": fields,
+        }
+        appended += 1
+    return appended
+
+
+class PackedCorpus:
+    """Чтение упакованного корпуса через mmap"""
+
+    def __init__(self, pack_file: str = PACK_FILE):
+        loaded = read_table(pack_file)
+        if loaded is None:
+            raise ValueError(f"Файл {pack_file} не найден или поврежден, запустите packed_corpus.py")
+        self.table, _ = loaded
+        self.urls = sorted(self.table)
+        self.by_id = {entry["id"]: url for url, entry in self.table.items() if entry["id"] is not None}
+        self.by_file = {entry["file"]: url for url, entry in self.table.items()}
+        self._file = open(pack_file, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def close(self):
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> 'PackedCorpus':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self) -> int:
+        return len(self.table)
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.table
+
+    def is_fresh(self, prayers_dir: str = PRAYERS_DIR) -> bool:
+        """Совпадает ли упакованный корпус с файлами в prayers_dir"""
+        stamps = {entry["file"]: entry["stamp"] for entry in self.table.values()}
+        file_paths = list_prayer_files(prayers_dir)
+        return len(file_paths) == len(stamps) and all(
+            stamps.get(os.path.basename(file_path)) == source_stamp(file_path) for file_path in file_paths
+        )
+
+    def field(self, url: str, name: str, default: Any = None) -> Any:
+        """Одно поле молитвы; разбирается только его фрагмент"""
+        location = self.table[url]["fields"].get(name)
+        if location is None:
+            return default
+        offset, length = location
+        return json.loads(self._mmap[offset:offset + length])
+
+    def get(self, url: str, fields: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Молитва по url: все поля или только перечисленные"""
+        names = fields if fields is not None else list(self.table[url]["fields"])
+        return {name: self.field(url, name) for name in names if name in self.table[url]["fields"]}
+
+    def get_by_id(self, prayer_id: int, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        url = self.by_id.get(prayer_id)
+        return self.get(url, fields) if url is not None else None
+
+    def get_file(self, file_path: str, fields: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Молитва по пути к файлу в каталоге молитв, если упакована ее текущая версия
+        (совпадают размер и время изменения); иначе None - файл нужно читать самому
+        """
+        url = self.by_file.get(os.path.basename(file_path))
+        if url is None or self.table[url]["stamp"] != source_stamp(file_path):
+            return None
+        return self.get(url, fields)
+
+    def iter_field(self, name: str) -> Iterator[Tuple[str, Any]]:
+        """(url, значение) для всех молитв, у которых есть поле, в порядке url"""
+        for url in self.urls:
+            if name in self.table[url]["fields"]:
+                yield url, self.field(url, name)
+
+
+@lru_cache(maxsize=None)
+def get_packed_corpus(pack_file: str = PACK_FILE) -> PackedCorpus:
+    """Возвращает общий для процесса экземпляр PackedCorpus"""
+    return PackedCorpus(pack_file)
+
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Упаковка корпуса молитв в один файл для быстрого чтения")
+    parser.add_argument("--output", default=PACK_FILE,
+                        help=f"файл упакованного корпуса (по умолчанию {PACK_FILE})")
+    parser.add_argument("--rebuild", action="store_true",
+                        help="пересобрать файл целиком, а не дописывать изменения")
+    args = parser.parse_args()
+
+    print("📦 Упаковываем корпус молитв...")
+    stats = pack_corpus(PRAYERS_DIR, args.output, args.rebuild)
+    size_kb = os.path.getsize(args.output) // 1024
+    mode = "пересобран" if stats["rebuilt"] else "обновлен"
+    print(f"✅ Файл {args.output} {mode}: молитв {stats['prayers']}, дописано {stats['appended']}, "
+          f"удалено {stats['removed']}, размер {size_kb} КБ")
+
+
+if __name__ == "__main__":
+    main()
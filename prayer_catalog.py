@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Разделение файлов молитв на легкий каталог заголовков и тяжелые поля
+data/prayers остается источником истины. Из него собирается data/catalog:
+headers.json - все поля молитв, кроме тяжелых, одним файлом,
+payloads/<url>.json - тексты и SEO-разметка одной молитвы.
+Скриптам, которым нужны только названия, теги и связи, хватает headers.json
+"""
+
+import argparse
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from corpus_reader import PRAYERS_DIR, list_prayer_files, load_prayer, write_text_if_changed
+
+CATALOG_DIR = "data/catalog"
+HEADERS_FILE = "headers.json"
+PAYLOADS_DIR = "payloads"
+CATALOG_VERSION = 2
+
+# Поля, которые уходят из заголовка в отдельный файл. seoOptimized.structuredData
+# повторяет текст молитвы и весит больше самого content
+PAYLOAD_FIELDS = ('content', 'contentModern', 'explanation', 'seoOptimized')
+
+
+def prayer_url(data: Dict[str, Any], file_path: str) -> str:
+    return data.get("url") or os.path.basename(file_path)[:-len('.json')]
+
+
+def split_prayer(data: Dict[str, Any]) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """
+    Делит молитву на заголовок и тяжелые поля
+    В заголовке payloadFields - непустые вынесенные поля, payloadKeys - все вынесенные поля,
+    чтобы не читать их ради проверки наличия
+    """
+    header = {key: value for key, value in data.items() if key not in PAYLOAD_FIELDS}
+    payload = {key: data[key] for key in PAYLOAD_FIELDS if key in data}
+    header["payloadFields"] = [key for key, value in payload.items() if value]
+    header["payloadKeys"] = list(payload)
+    return header, payload
+
+
+def join_prayer(header: Dict[str, Any], payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Обратная операция к split_prayer (порядок ключей может отличаться от исходного файла)"""
+    data = {key: value for key, value in header.items() if key not in ("payloadFields", "payloadKeys")}
+    data.update(payload)
+    return data
+
+
+def source_stamp(file_path: str) -> List[int]:
+    """Размер и время изменения исходного файла: по ним проверяется свежесть каталога"""
+    stat = os.stat(file_path)
+    return [stat.st_size, stat.st_mtime_ns]
+
+
+def render_compact(data: Any) -> str:
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+
+
+def pack_catalog(prayers_dir: str = PRAYERS_DIR, catalog_dir: str = CATALOG_DIR) -> Dict[str, int]:
+    """
+    Собирает каталог за один проход по корпусу
+    Файлы payloads перезаписываются только при изменении, лишние удаляются
+    """
+    stats = {"prayers": 0, "written": 0, "unchanged": 0, "removed": 0}
+    payloads_dir = os.path.join(catalog_dir, PAYLOADS_DIR)
+    os.makedirs(payloads_dir, exist_ok=True)
+
+    headers = []
+    sources = {}
+    expected = set()
+    for file_path in list_prayer_files(prayers_dir):
+        data = load_prayer(file_path)
+        if data is None:
+            continue
+        url = prayer_url(data, file_path)
+        header, payload = split_prayer(data)
+        header.setdefault("url", url)
+        headers.append(header)
+        expected.add(f"{url}.json")
+        sources[os.path.basename(file_path)] = source_stamp(file_path)
+        stats["prayers"] += 1
+
+        payload_path = os.path.join(payloads_dir, f"{url}.json")
+        if write_text_if_changed(payload_path, render_compact(payload)):
+            stats["written"] += 1
+        else:
+            stats["unchanged"] += 1
+
+    for filename in sorted(os.listdir(payloads_dir)):
+        if filename.endswith(".json") and filename not in expected:
+            os.remove(os.path.join(payloads_dir, filename))
+            stats["removed"] += 1
+
+    catalog = {
+        "version": CATALOG_VERSION,
+        "totalPrayers": len(headers),
+        "sources": sources,
+        "prayers": headers,
+    }
+    write_text_if_changed(os.path.join(catalog_dir, HEADERS_FILE), render_compact(catalog))
+    return stats
+
+
+def load_catalog_headers(prayers_dir: str = PRAYERS_DIR, catalog_dir: str = CATALOG_DIR) -> Optional[List[Dict[str, Any]]]:
+    """
+    Заголовки из каталога или None, если каталога нет или он устарел
+    (другой набор файлов или у какого-то файла изменились размер или время)
+    """
+    headers_path = os.path.join(catalog_dir, HEADERS_FILE)
+    try:
+        with open(headers_path, 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if catalog.get("version") != CATALOG_VERSION:
+        return None
+
+    sources = catalog.get("sources", {})
+    file_paths = list_prayer_files(prayers_dir)
+    if len(file_paths) != len(sources):
+        return None
+    for file_path in file_paths:
+        if sources.get(os.path.basename(file_path)) != source_stamp(file_path):
+            return None
+    return catalog["prayers"]
+
+
+def iter_prayer_headers(prayers_dir: str = PRAYERS_DIR, catalog_dir: str = CATALOG_DIR) -> List[Dict[str, Any]]:
+    """Заголовки всех молитв: из свежего каталога, иначе из самих файлов"""
+    headers = load_catalog_headers(prayers_dir, catalog_dir)
+    if headers is not None:
+        return headers
+
+    headers = []
+    for file_path in list_prayer_files(prayers_dir):
+        data = load_prayer(file_path)
+        if data is not None:
+            header, _ = split_prayer(data)
+            header.setdefault("url", prayer_url(data, file_path))
+            headers.append(header)
+    return headers
+
+
+def load_prayer_payload(url: str, catalog_dir: str = CATALOG_DIR) -> Optional[Dict[str, Any]]:
+    """Тяжелые поля одной молитвы из каталога или None, если их там нет"""
+    payload_path = os.path.join(catalog_dir, PAYLOADS_DIR, f"{url}.json")
+    try:
+        with open(payload_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Сборка каталога заголовков молитв и файлов с тяжелыми полями")
+    parser.add_argument("--catalog-dir", default=CATALOG_DIR,
+                        help=f"куда собрать каталог (по умолчанию {CATALOG_DIR})")
+    args = parser.parse_args()
+
+    print("📦 Собираем каталог молитв...")
+    stats = pack_catalog(PRAYERS_DIR, args.catalog_dir)
+    print(f"Молитв: {stats['prayers']}")
+    print(f"Файлов payloads записано: {stats['written']}, без изменений: {stats['unchanged']}, "
+          f"удалено: {stats['removed']}")
+    print(f"✅ Каталог: {os.path.join(args.catalog_dir, HEADERS_FILE)}")
+
+
+if __name__ == "__main__":
+    main()
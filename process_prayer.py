@@ -4,10 +4,19 @@
 Помогает разбивать длинные поля на части и собирать их обратно
 """
 
+import argparse
+import csv
 import json
 import sys
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+from corpus_reader import PRAYERS_DIR, atomic_write_text, utc_now_iso
+from run_profile import RunProfile, StageStats, add_profile_argument
+from text_chunker import iter_chunks
+from validate_prayers import PRAYER_SCHEMA, check_value
+
+BATCH_COLUMNS = ("url", "field", "value")
 
 def load_prayer_file(file_path: str) -> Dict[str, Any]:
     """Загружает JSON файл молитвы"""
@@ -19,38 +28,17 @@ def load_prayer_file(file_path: str) -> Dict[str, Any]:
         return None
 
 def save_prayer_file(file_path: str, data: Dict[str, Any]) -> bool:
-    """Сохраняет JSON файл молитвы"""
+    """Сохраняет JSON файл молитвы атомарно (временный файл + rename)"""
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, ensure_ascii=False, indent=2)
+        atomic_write_text(file_path, json.dumps(data, ensure_ascii=False, indent=2))
         return True
     except Exception as e:
         print(f"Ошибка сохранения файла {file_path}: {e}")
         return False
 
 def split_long_field(content: str, max_length: int = 1000) -> List[str]:
-    """Разбивает длинное поле на части"""
-    if len(content) <= max_length:
-        return [content]
-    
-    parts = []
-    current_pos = 0
-    
-    while current_pos < len(content):
-        # Ищем ближайший конец предложения или абзаца
-        end_pos = min(current_pos + max_length, len(content))
-        
-        # Если это не конец строки, ищем ближайший перенос строки или точку
-        if end_pos < len(content):
-            for i in range(end_pos, current_pos + max_length // 2, -1):
-                if content[i] in ['\n', '.', '!', '?']:
-                    end_pos = i + 1
-                    break
-        
-        parts.append(content[current_pos:end_pos])
-        current_pos = end_pos
-    
-    return parts
+    """Разбивает длинное поле на части по границам предложений (см. text_chunker)"""
+    return [chunk.text for chunk in iter_chunks(content, max_length)] or [content]
 
 def get_field_info(data: Dict[str, Any], field_name: str) -> Dict[str, Any]:
     """Получает информацию о поле"""
@@ -95,7 +83,7 @@ def process_prayer_file(file_path: str, field_name: str = "contentModern", new_c
     # Если нужно обновить поле
     if new_content:
         print(f"Обновляем поле '{field_name}'...")
-        if update_field(data, field_name, new_content):
+        if update_field(data, field_name, new_content) and update_field(data, "updatedAt", utc_now_iso()):
             if save_prayer_file(file_path, data):
                 print("✅ Файл успешно обновлен!")
                 return True
@@ -108,25 +96,194 @@ def process_prayer_file(file_path: str, field_name: str = "contentModern", new_c
     
     return True
 
+def check_edit(edit: Any) -> Optional[str]:
+    """Описание ошибки в правке или None, если правку можно применять"""
+    if not isinstance(edit, dict):
+        return "ожидается объект с полями url, field, value"
+    missing = [column for column in BATCH_COLUMNS if edit.get(column) is None]
+    if missing:
+        return f"нет {', '.join(missing)}"
+    url = edit['url']
+    if not isinstance(url, str) or not url or '/' in url or '\\' in url or '..' in url:
+        return f"недопустимый url {url!r}: ожидается имя файла молитвы без .json"
+    if edit['field'] not in PRAYER_SCHEMA:
+        return f"неизвестное поле '{edit['field']}'"
+    issues = []
+    check_value(edit['value'], PRAYER_SCHEMA[edit['field']][0], edit['field'], issues)
+    if issues:
+        return issues[0][1]
+    return None
+
+def parse_csv_value(field_name: str, value: str) -> Any:
+    """В CSV все значения - строки; для нестроковых полей схемы значение читается как JSON"""
+    spec = PRAYER_SCHEMA.get(field_name, (str, False))[0]
+    if spec is str:
+        return value
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+def read_batch_edits(batch_path: str, skipped: Optional[List[str]] = None) -> Iterator[Tuple[str, str, Any]]:
+    """
+    Читает пакет правок (url, field, value) из JSONL или CSV (с заголовком url,field,value)
+    url - имя файла молитвы без .json, field - поле из схемы молитвы (PRAYER_SCHEMA),
+    value должно подходить под тип поля (в CSV нестроковые значения записываются как JSON)
+    Ошибочные строки пропускаются и попадают в skipped; CSV без нужных колонок - ValueError
+    """
+    if skipped is None:
+        skipped = []
+    if batch_path.endswith('.csv'):
+        csv.field_size_limit(sys.maxsize)
+        with open(batch_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            missing = [column for column in BATCH_COLUMNS if column not in (reader.fieldnames or [])]
+            if missing:
+                raise ValueError(f"{batch_path}: в заголовке CSV нет колонок {', '.join(missing)} "
+                                 f"(нужен заголовок {','.join(BATCH_COLUMNS)})")
+            for row in reader:
+                if isinstance(row.get('value'), str):
+                    row['value'] = parse_csv_value(row.get('field'), row['value'])
+                error = check_edit(row)
+                if error:
+                    skipped.append(f"строка {reader.line_num}: {error}")
+                    print(f"Пропущена строка {reader.line_num}: {error}")
+                    continue
+                yield row['url'], row['field'], row['value']
+        return
+    
+    with open(batch_path, 'r', encoding='utf-8') as f:
+        for line_number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                edit = json.loads(line)
+            except ValueError as e:
+                error = str(e)
+            else:
+                error = check_edit(edit)
+            if error:
+                skipped.append(f"строка {line_number}: {error}")
+                print(f"Пропущена строка {line_number}: {error}")
+                continue
+            yield edit['url'], edit['field'], edit['value']
+
+def group_edits(edits: Iterator[Tuple[str, str, Any]]) -> Dict[str, Dict[str, Any]]:
+    """Группирует правки по файлам; при повторе поля побеждает последняя правка"""
+    grouped: Dict[str, Dict[str, Any]] = {}
+    for url, field_name, value in edits:
+        grouped.setdefault(url, {})[field_name] = value
+    return grouped
+
+def apply_batch(batch_path: str, prayers_dir: str = PRAYERS_DIR,
+                stage: Optional[StageStats] = None) -> Dict[str, int]:
+    """
+    Применяет пакет правок: каждый файл читается и записывается один раз,
+    запись атомарная, updatedAt обновляется только у реально измененных файлов
+    Пропущенные строки пакета считаются ошибками (skipped и failed)
+    В stage учитываются прочитанные пакет и файлы молитв и записанные файлы
+    """
+    stats = {"files": 0, "updated": 0, "unchanged": 0, "missing": 0, "failed": 0, "fields": 0, "skipped": 0}
+    skipped: List[str] = []
+    if stage is not None:
+        stage.read_files([batch_path])
+    grouped = group_edits(read_batch_edits(batch_path, skipped))
+    stats["skipped"] = len(skipped)
+    stats["failed"] += len(skipped)
+    updated_at = utc_now_iso()
+    
+    for url, fields in grouped.items():
+        stats["files"] += 1
+        file_path = os.path.join(prayers_dir, f"{url}.json")
+        if not os.path.exists(file_path):
+            print(f"❌ Файл не найден: {file_path}")
+            stats["missing"] += 1
+            continue
+        
+        data = load_prayer_file(file_path)
+        if stage is not None:
+            stage.read_files([file_path])
+        if data is None:
+            stats["failed"] += 1
+            continue
+        
+        changed = [name for name, value in fields.items() if data.get(name) != value]
+        if not changed:
+            stats["unchanged"] += 1
+            continue
+        
+        for name in changed:
+            data[name] = fields[name]
+        data["updatedAt"] = updated_at
+        
+        if save_prayer_file(file_path, data):
+            if stage is not None:
+                stage.wrote_file(file_path)
+            stats["updated"] += 1
+            stats["fields"] += len(changed)
+            print(f"✅ {url}: {', '.join(changed)}")
+        else:
+            stats["failed"] += 1
+    
+    return stats
+
+def run_batch(batch_path: str, stage: Optional[StageStats] = None) -> bool:
+    """Пакетный режим: применяет правки и печатает итог"""
+    if not os.path.exists(batch_path):
+        print(f"Файл пакета не найден: {batch_path}")
+        return False
+    
+    print(f"Применяем пакет правок: {batch_path}")
+    try:
+        stats = apply_batch(batch_path, stage=stage)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return False
+    print(f"\n📋 Файлов в пакете: {stats['files']}")
+    print(f"   Обновлено файлов: {stats['updated']} (полей: {stats['fields']})")
+    print(f"   Без изменений: {stats['unchanged']}")
+    if stats['missing'] or stats['failed']:
+        print(f"   Не найдено: {stats['missing']}, ошибок: {stats['failed']} (пропущено строк: {stats['skipped']})")
+    return not (stats['missing'] or stats['failed'])
+
 def main():
     """Главная функция"""
-    if len(sys.argv) < 2:
-        print("Использование: python process_prayer.py <путь_к_файлу> [поле] [новое_содержимое]")
-        print("Примеры:")
-        print("  python process_prayer.py data/prayers/chas-shestoy.json")
-        print("  python process_prayer.py data/prayers/chas-shestoy.json contentModern")
-        print("  python process_prayer.py data/prayers/chas-shestoy.json contentModern 'Новый текст'")
-        return
+    parser = argparse.ArgumentParser(
+        description="Обработка JSON файлов молитв",
+        epilog="Примеры:\n"
+               "  python process_prayer.py data/prayers/chas-shestoy.json\n"
+               "  python process_prayer.py data/prayers/chas-shestoy.json contentModern\n"
+               "  python process_prayer.py data/prayers/chas-shestoy.json contentModern 'Новый текст'\n"
+               "  python process_prayer.py --batch edits.jsonl   # строки {\"url\", \"field\", \"value\"}",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("file_path", nargs="?", help="путь к файлу молитвы")
+    parser.add_argument("field_name", nargs="?", default="contentModern", help="поле (по умолчанию contentModern)")
+    parser.add_argument("new_content", nargs="?", help="новое содержимое поля")
+    parser.add_argument("--batch", help="пакет правок в формате JSONL или CSV (url,field,value)")
+    add_profile_argument(parser)
+    args = parser.parse_args()
+    run = RunProfile("process_prayer", args.profile)
+    
+    if args.batch:
+        with run.stage("apply_batch") as stage:
+            ok = run_batch(args.batch, stage)
+        run.finish()
+        sys.exit(0 if ok else 1)
     
-    file_path = sys.argv[1]
-    field_name = sys.argv[2] if len(sys.argv) > 2 else "contentModern"
-    new_content = sys.argv[3] if len(sys.argv) > 3 else None
+    if not args.file_path:
+        parser.print_help()
+        return
     
-    if not os.path.exists(file_path):
-        print(f"Файл не найден: {file_path}")
+    if not os.path.exists(args.file_path):
+        print(f"Файл не найден: {args.file_path}")
         return
     
-    process_prayer_file(file_path, field_name, new_content)
+    with run.stage("process") as stage:
+        stage.read_files([args.file_path])
+        if process_prayer_file(args.file_path, args.field_name, args.new_content) and args.new_content:
+            stage.wrote_file(args.file_path)
+    run.finish()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Пересчет списков relatedPrayers в файлах молитв
+Каждая молитва описывается двумя разреженными TF-IDF векторами: по тегам и категории
+и по основам слов текста. Кандидаты берутся из инвертированного индекса, поэтому
+сравниваются только молитвы с общими признаками, а не все пары корпуса
+"""
+
+import argparse
+import heapq
+import json
+import math
+import os
+import sys
+from collections import Counter, defaultdict
+from multiprocessing import Pool
+from typing import Any, Dict, List, Optional, Tuple
+
+from build_indexes import INDEX_FILE, load_json_if_exists, prayer_tags
+from corpus_reader import PRAYERS_DIR, count_prayer_tokens, list_prayer_files, load_prayer, write_text_if_changed
+from word_families import stem_word
+
+TOP_K = 5
+
+# Вклад блоков признаков в итоговую оценку
+TAG_WEIGHT = 0.7
+TEXT_WEIGHT = 0.3
+
+# Признаки, которые есть больше чем у половины молитв, не различают их и только
+# удлиняют списки индекса
+MAX_DF_RATIO = 0.5
+# Слово, встретившееся в одной молитве, не может связать две молитвы
+MIN_TERM_DF = 2
+# От текста остаются только самые весомые основы
+TOP_TERMS = 32
+# Сколько записей списка индекса просматривается на один признак (списки отсортированы по весу)
+MAX_POSTINGS = 200
+MIN_SCORE = 0.05
+
+# Теги, которые есть почти у всех молитв, не показываются в commonTags
+GENERIC_TAG_RATIO = 0.9
+
+CATEGORY_PREFIX = "категория:"
+
+SparseVector = Dict[str, float]
+
+
+class PrayerFeatures:
+    """Заголовок молитвы и ее признаки"""
+
+    __slots__ = ("id", "title", "url", "tags", "category", "terms")
+
+    def __init__(self, id, title: str, url: str, tags: List[str], category: Optional[str], terms: Counter):
+        self.id = id
+        self.title = title
+        self.url = url
+        self.tags = tags
+        self.category = category
+        self.terms = terms
+
+
+def read_prayer_features(file_path: str) -> Optional[PrayerFeatures]:
+    """Читает один файл молитвы, тексты сразу сводятся к частотам основ"""
+    data = load_prayer(file_path)
+    if data is None:
+        return None
+    terms = Counter()
+    for word, count in count_prayer_tokens(data).items():
+        terms[stem_word(word)] += count
+    return PrayerFeatures(
+        data.get("id"),
+        data.get("title", ""),
+        data.get("url") or os.path.basename(file_path)[:-len('.json')],
+        prayer_tags(data),
+        data.get("category"),
+        terms,
+    )
+
+
+def read_corpus_features(prayers_dir: str = PRAYERS_DIR, jobs: int = 1) -> List[PrayerFeatures]:
+    """Признаки всех молитв в порядке url; при jobs > 1 файлы разбираются параллельно"""
+    file_paths = list_prayer_files(prayers_dir)
+    if jobs <= 1:
+        prayers = [read_prayer_features(file_path) for file_path in file_paths]
+    else:
+        chunksize = max(1, len(file_paths) // (jobs * 8))
+        with Pool(jobs) as pool:
+            prayers = list(pool.imap(read_prayer_features, file_paths, chunksize=chunksize))
+
+    prayers = [prayer for prayer in prayers if prayer is not None]
+    # Категория хранится в индексе, а не в файлах молитв
+    index = load_json_if_exists(INDEX_FILE) or {}
+    categories = {entry["url"]: entry.get("category") for entry in index.get("prayers", [])}
+    for prayer in prayers:
+        prayer.category = prayer.category or categories.get(prayer.url)
+    prayers.sort(key=lambda prayer: prayer.url)
+    return prayers
+
+
+def document_frequencies(feature_sets: List[List[str]]) -> Counter:
+    df = Counter()
+    for features in feature_sets:
+        df.update(set(features))
+    return df
+
+
+def normalize(vector: SparseVector) -> SparseVector:
+    norm = math.sqrt(sum(weight * weight for weight in vector.values()))
+    return {feature: weight / norm for feature, weight in vector.items()} if norm else {}
+
+
+def tag_vectors(prayers: List[PrayerFeatures]) -> List[SparseVector]:
+    """Бинарные теги и категория с весом idf"""
+    feature_sets = [
+        prayer.tags + ([CATEGORY_PREFIX + prayer.category] if prayer.category else [])
+        for prayer in prayers
+    ]
+    df = document_frequencies(feature_sets)
+    total = len(prayers)
+    max_df = MAX_DF_RATIO * total
+    return [
+        normalize({feature: math.log(total / df[feature]) for feature in features if df[feature] <= max_df})
+        for features in feature_sets
+    ]
+
+
+def term_vectors(prayers: List[PrayerFeatures]) -> List[SparseVector]:
+    """Основы слов с весом (1 + log tf) * idf, у каждой молитвы не больше TOP_TERMS основ"""
+    df = document_frequencies([list(prayer.terms) for prayer in prayers])
+    total = len(prayers)
+    max_df = MAX_DF_RATIO * total
+    vectors = []
+    for prayer in prayers:
+        weights = {
+            term: (1 + math.log(count)) * math.log(total / df[term])
+            for term, count in prayer.terms.items()
+            if MIN_TERM_DF <= df[term] <= max_df
+        }
+        top = heapq.nlargest(TOP_TERMS, weights.items(), key=lambda item: (item[1], item[0]))
+        vectors.append(normalize(dict(top)))
+    return vectors
+
+
+def build_postings(vectors: List[SparseVector], block_weight: float) -> Dict[str, Tuple[Tuple[int, ...], Tuple[float, ...]]]:
+    """
+    Инвертированный индекс: признак -> (номера молитв, веса), самые весомые записи первыми
+    Списки хранятся двумя кортежами, чтобы внутренний цикл накопления был как можно проще
+    """
+    postings: Dict[str, List[Tuple[int, float]]] = defaultdict(list)
+    for doc, vector in enumerate(vectors):
+        for feature, weight in vector.items():
+            postings[feature].append((doc, block_weight * weight))
+    packed = {}
+    for feature, entries in postings.items():
+        entries.sort(key=lambda entry: (-entry[1], entry[0]))
+        del entries[MAX_POSTINGS:]
+        packed[feature] = (tuple(doc for doc, _ in entries), tuple(weight for _, weight in entries))
+    return packed
+
+
+def rank_related(prayers: List[PrayerFeatures], top_k: int = TOP_K) -> List[List[Tuple[int, float]]]:
+    """
+    Для каждой молитвы top_k самых похожих: [(номер, оценка)]
+    Оценка - взвешенная сумма косинусов по тегам и по тексту, она накапливается
+    только по общим признакам из инвертированного индекса
+    """
+    blocks = [
+        (tag_vectors(prayers), TAG_WEIGHT),
+        (term_vectors(prayers), TEXT_WEIGHT),
+    ]
+    indexed = [(vectors, build_postings(vectors, weight)) for vectors, weight in blocks]
+
+    ranked = []
+    for doc in range(len(prayers)):
+        scores: Dict[int, float] = {}
+        get = scores.get
+        for vectors, postings in indexed:
+            for feature, weight in vectors[doc].items():
+                others, weights = postings[feature]
+                for other, other_weight in zip(others, weights):
+                    scores[other] = get(other, 0.0) + weight * other_weight
+        scores.pop(doc, None)
+        # (оценка, -номер): при равных оценках выше молитва с меньшим url
+        top = heapq.nlargest(top_k, [(score, -other) for other, score in scores.items() if score >= MIN_SCORE])
+        ranked.append([(-negative, score) for score, negative in top])
+    return ranked
+
+
+def common_tags(prayer: PrayerFeatures, other: PrayerFeatures, generic: set) -> List[str]:
+    """Общие теги в порядке тегов самой молитвы, без тегов, которые есть почти у всех"""
+    other_tags = set(other.tags)
+    return [tag for tag in prayer.tags if tag in other_tags and tag not in generic]
+
+
+def build_related(prayers: List[PrayerFeatures], top_k: int = TOP_K) -> Dict[str, List[Dict[str, Any]]]:
+    """url молитвы -> новый список relatedPrayers"""
+    df = document_frequencies([prayer.tags for prayer in prayers])
+    generic = {tag for tag, count in df.items() if count >= GENERIC_TAG_RATIO * len(prayers)}
+
+    related = {}
+    for doc, top in enumerate(rank_related(prayers, top_k)):
+        prayer = prayers[doc]
+        related[prayer.url] = [
+            {
+                "id": prayers[other].id,
+                "title": prayers[other].title,
+                "url": prayers[other].url,
+                "commonTags": common_tags(prayer, prayers[other], generic),
+            }
+            for other, _ in top
+        ]
+    return related
+
+
+def write_related(related: Dict[str, List[Dict[str, Any]]], prayers_dir: str = PRAYERS_DIR,
+                  check: bool = False) -> List[str]:
+    """
+    Записывает relatedPrayers в файлы молитв, перезаписывая только измененные
+    updatedAt не трогается: список производный и не меняет саму молитву
+    Возвращает url устаревших (при check) или обновленных файлов
+    """
+    changed = []
+    for url, items in related.items():
+        file_path = os.path.join(prayers_dir, f"{url}.json")
+        data = load_prayer(file_path)
+        if data is None or data.get("relatedPrayers") == items:
+            continue
+        changed.append(url)
+        if not check:
+            data["relatedPrayers"] = items
+            write_text_if_changed(file_path, json.dumps(data, ensure_ascii=False, indent=2))
+    return changed
+
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Пересчет relatedPrayers по тегам, категориям и тексту молитв")
+    parser.add_argument("--top-k", type=int, default=TOP_K,
+                        help=f"сколько связанных молитв оставлять (по умолчанию {TOP_K})")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="количество процессов для разбора файлов")
+    parser.add_argument("--check", action="store_true",
+                        help="ничего не записывать, код возврата 1, если списки устарели")
+    args = parser.parse_args()
+
+    print("🔗 Пересчитываем связанные молитвы...")
+    prayers = read_corpus_features(PRAYERS_DIR, args.jobs)
+    print(f"Найдено {len(prayers)} молитв")
+
+    related = build_related(prayers, args.top_k)
+    changed = write_related(related, PRAYERS_DIR, args.check)
+
+    if args.check:
+        if changed:
+            print(f"❌ Устаревших списков: {len(changed)}, запустите related_prayers.py")
+            sys.exit(1)
+        print("✅ Все списки relatedPrayers актуальны")
+        return
+    print(f"✅ Обновлено файлов: {len(changed)} из {len(prayers)}")
+
+
+if __name__ == "__main__":
+    main()
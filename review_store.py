@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Постоянное хранилище решений ручной проверки архаизмов (SQLite)
+Каждый ответ y/n/s записывается сразу с отметкой времени, поэтому проверку
+можно прервать в любой момент и продолжить, не отвечая на те же слова повторно
+"""
+
+import os
+import sqlite3
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from corpus_reader import utc_now_iso
+from text_normalize import normalize_word
+
+REVIEW_DB = "extracted_words/review.sqlite"
+
+VERDICT_YES = "yes"
+VERDICT_NO = "no"
+VERDICT_SKIP = "skip"
+VERDICTS = (VERDICT_YES, VERDICT_NO, VERDICT_SKIP)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS decisions (
+    word TEXT PRIMARY KEY,
+    verdict TEXT NOT NULL CHECK (verdict IN ('yes', 'no', 'skip')),
+    decided_at TEXT NOT NULL,
+    source TEXT NOT NULL DEFAULT 'review'
+);
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    word TEXT NOT NULL,
+    verdict TEXT NOT NULL,
+    decided_at TEXT NOT NULL,
+    source TEXT NOT NULL
+);
+"""
+
+
+class ReviewStore:
+    """Решения по словам: последнее в таблице decisions, все ответы в history"""
+
+    def __init__(self, db_file: str = REVIEW_DB):
+        db_dir = os.path.dirname(db_file)
+        if db_dir:
+            os.makedirs(db_dir, exist_ok=True)
+        self.conn = sqlite3.connect(db_file)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def record(self, word: str, verdict: str, source: str = "review"):
+        """Сохраняет решение по слову сразу же (отдельной транзакцией)"""
+        if verdict not in VERDICTS:
+            raise ValueError(f"Неизвестное решение: {verdict}")
+        decided_at = utc_now_iso()
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO decisions (word, verdict, decided_at, source) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(word) DO UPDATE SET verdict = excluded.verdict, "
+                "decided_at = excluded.decided_at, source = excluded.source",
+                (word, verdict, decided_at, source),
+            )
+            self.conn.execute(
+                "INSERT INTO history (word, verdict, decided_at, source) VALUES (?, ?, ?, ?)",
+                (word, verdict, decided_at, source),
+            )
+
+    def record_many(self, words: Iterable[str], verdict: str, source: str = "review"):
+        """Сохраняет одно решение сразу для нескольких слов (например, для семейства форм)"""
+        for word in words:
+            self.record(word, verdict, source)
+
+    def import_words(self, words: Iterable[str], verdict: str, source: str) -> int:
+        """Импортирует решения, не трогая уже принятые; возвращает число новых"""
+        decided_at = utc_now_iso()
+        rows = [(normalize_word(word), verdict, decided_at, source) for word in words if word.strip()]
+        with self.conn:
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO decisions (word, verdict, decided_at, source) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+            return self.conn.total_changes - before
+
+    def verdict(self, word: str) -> Optional[str]:
+        row = self.conn.execute("SELECT verdict FROM decisions WHERE word = ?", (word,)).fetchone()
+        return row[0] if row else None
+
+    def decisions(self) -> Dict[str, str]:
+        """Все решения: слово -> yes/no/skip"""
+        return dict(self.conn.execute("SELECT word, verdict FROM decisions"))
+
+    def words_with_verdict(self, verdict: str) -> List[str]:
+        return [row[0] for row in self.conn.execute(
+            "SELECT word FROM decisions WHERE verdict = ? ORDER BY word", (verdict,)
+        )]
+
+    def counts(self) -> Dict[str, int]:
+        """Количество решений каждого вида"""
+        result = {verdict: 0 for verdict in VERDICTS}
+        result.update(self.conn.execute("SELECT verdict, COUNT(*) FROM decisions GROUP BY verdict"))
+        return result
+
+    def pending(self, words: Iterable[str], include_skipped: bool = False) -> Iterator[str]:
+        """Отдает только слова без решения (и отложенные, если include_skipped)"""
+        decided = self.decisions()
+        for word in words:
+            verdict = decided.get(word)
+            if verdict is None or (include_skipped and verdict == VERDICT_SKIP):
+                yield word
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Замеры этапов для скриптов обработки молитв
+Каждый этап считает время (настенное и процессорное, включая дочерние процессы пула),
+прочитанные и записанные файлы с байтами и пик памяти (tracemalloc).
+С флагом --profile скрипт печатает таблицу этапов, сохраняет статистику cProfile
+и JSON с замерами в .cache/profile. Без флага замеры ничего не печатают и почти ничего не стоят
+"""
+
+import argparse
+import cProfile
+import io
+import json
+import os
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+
+PROFILE_DIR = ".cache/profile"
+
+# Сколько самых дорогих функций cProfile попадает в JSON
+TOP_FUNCTIONS = 25
+
+
+def cpu_seconds() -> float:
+    """Процессорное время процесса и завершенных дочерних процессов (воркеров Pool)"""
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class StageStats:
+    """Замеры одного этапа"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.files_read = 0
+        self.bytes_read = 0
+        self.files_written = 0
+        self.bytes_written = 0
+        self.peak_memory = 0
+
+    def read_files(self, file_paths: Iterable[str]):
+        """Учитывает прочитанные файлы (размер берется из os.stat)"""
+        for file_path in file_paths:
+            self.files_read += 1
+            self.bytes_read += os.path.getsize(file_path)
+
+    def read_if_exists(self, file_paths: Iterable[str]):
+        """Учитывает файлы, которые есть на диске: прежние версии, с которыми сравнивается новый текст"""
+        self.read_files(file_path for file_path in file_paths if os.path.exists(file_path))
+
+    def wrote_file(self, file_path: str):
+        self.files_written += 1
+        self.bytes_written += os.path.getsize(file_path)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "wall": round(self.wall, 4),
+            "cpu": round(self.cpu, 4),
+            "filesRead": self.files_read,
+            "bytesRead": self.bytes_read,
+            "filesWritten": self.files_written,
+            "bytesWritten": self.bytes_written,
+            "peakMemory": self.peak_memory,
+        }
+
+
+class RunProfile:
+    """
+    Замеры одного запуска скрипта
+    with run.stage("scan") as stage: ... - этап; повторный этап с тем же именем суммируется
+    cProfile видит только главный процесс: работа воркеров Pool видна в cpu этапа
+    """
+
+    def __init__(self, script: str, enabled: bool = False, output_dir: str = PROFILE_DIR):
+        self.script = script
+        self.enabled = enabled
+        self.output_dir = output_dir
+        self.stages: Dict[str, StageStats] = {}
+        self.started_at = datetime.now(timezone.utc)
+        self._wall_start = time.perf_counter()
+        self._cpu_start = cpu_seconds()
+        self._profiler: Optional[cProfile.Profile] = None
+        if enabled:
+            tracemalloc.start()
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[StageStats]:
+        stats = self.stages.setdefault(name, StageStats(name))
+        if self.enabled:
+            tracemalloc.reset_peak()
+        wall_start = time.perf_counter()
+        cpu_start = cpu_seconds()
+        try:
+            yield stats
+        finally:
+            stats.wall += time.perf_counter() - wall_start
+            stats.cpu += cpu_seconds() - cpu_start
+            if self.enabled:
+                stats.peak_memory = max(stats.peak_memory, tracemalloc.get_traced_memory()[1])
+
+    def top_functions(self) -> List[Dict[str, Any]]:
+        """Самые дорогие функции по накопленному времени"""
+        stats = pstats.Stats(self._profiler, stream=io.StringIO())
+        rows = []
+        for (file_name, line, function), (_, calls, total, cumulative, _) in stats.stats.items():
+            rows.append({
+                "function": f"{os.path.relpath(file_name) if os.path.isabs(file_name) else file_name}:{line}({function})",
+                "calls": calls,
+                "total": round(total, 4),
+                "cumulative": round(cumulative, 4),
+            })
+        rows.sort(key=lambda row: (-row["cumulative"], row["function"]))
+        return rows[:TOP_FUNCTIONS]
+
+    def finish(self) -> Optional[str]:
+        """
+        Завершает замеры; при включенном профилировании печатает таблицу этапов,
+        пишет .prof (для snakeviz/pstats) и JSON с замерами. Возвращает путь к JSON
+        """
+        if not self.enabled:
+            return None
+        self._profiler.disable()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+        total = {
+            "wall": round(time.perf_counter() - self._wall_start, 4),
+            "cpu": round(cpu_seconds() - self._cpu_start, 4),
+            "peakMemory": peak,
+        }
+        stamp = self.started_at.strftime("%Y%m%dT%H%M%SZ")
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, f"{self.script}-{stamp}")
+        self._profiler.dump_stats(base + ".prof")
+
+        report = {
+            "script": self.script,
+            "startedAt": self.started_at.isoformat().replace("+00:00", "Z"),
+            "argv": sys.argv[1:],
+            "total": total,
+            "stages": [stats.as_dict() for stats in self.stages.values()],
+            "cprofile": base + ".prof",
+            "topFunctions": self.top_functions(),
+        }
+        with open(base + ".json", 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+        print(f"\n⏱️  Замеры этапов ({self.script}):")
+        for stats in self.stages.values():
+            share = 100.0 * stats.wall / total["wall"] if total["wall"] else 0.0
+            print(f"   {stats.name:<16} {stats.wall:8.3f} с ({share:4.1f}%), cpu {stats.cpu:8.3f} с, "
+                  f"прочитано {stats.files_read} ф. / {stats.bytes_read // 1024} КБ, "
+                  f"записано {stats.files_written} ф. / {stats.bytes_written // 1024} КБ, "
+                  f"пик памяти {stats.peak_memory // 1024} КБ")
+        print(f"   {'всего':<16} {total['wall']:8.3f} с, cpu {total['cpu']:8.3f} с, "
+              f"пик памяти {peak // 1024} КБ")
+        print(f"💾 Замеры: {base}.json, профиль cProfile: {base}.prof")
+        return base + ".json"
+
+
+def add_profile_argument(parser: argparse.ArgumentParser):
+    parser.add_argument("--profile", action="store_true",
+                        help=f"замерить этапы, сохранить cProfile и JSON с замерами в {PROFILE_DIR}")
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+Сборка готового поискового индекса для сайта
+Нормализованные слова (без ударений, ё -> е, церковнославянские буквы -> русские)
+из названия, тегов и текстов каждой молитвы сводятся в инвертированный индекс.
+Слова отсортированы, поэтому поиск по префиксу - это бинарный поиск по списку terms,
+а номера молитв в списках хранятся разностями от предыдущего номера.
+Слова каждой молитвы берутся из кэша разбора (word_cache.py), корпус заново не читается.
+Индекс лежит в public/data: его загружает поиск на сайте (src/lib/searchIndex.ts)
+"""
+
+import argparse
+import json
+import os
+import sys
+from typing import Any, Dict, Iterable, List
+
+from corpus_reader import PRAYERS_DIR, list_prayer_files, write_text_if_changed
+from corpus_scan import SearchDoc
+from text_normalize import COMBINING_RANGES, INVISIBLE_CHARS, LETTER_FOLDS
+from word_cache import CACHE_FILE, WordCache
+
+SEARCH_INDEX_FILE = "public/data/search-index.json"
+SEARCH_INDEX_VERSION = 1
+
+
+def delta_encode(numbers: List[int]) -> List[int]:
+    """[3, 5, 9] -> [3, 2, 4]; список должен быть отсортирован"""
+    previous = 0
+    deltas = []
+    for number in numbers:
+        deltas.append(number - previous)
+        previous = number
+    return deltas
+
+
+def delta_decode(deltas: List[int]) -> List[int]:
+    numbers = []
+    current = 0
+    for delta in deltas:
+        current += delta
+        numbers.append(current)
+    return numbers
+
+
+def normalization_rules() -> Dict[str, Any]:
+    """
+    Правила нормализации запроса, те же что у text_normalize.normalize_text
+    Лежат в самом индексе, чтобы сайт нормализовал запрос так же, как корпус
+    """
+    return {
+        "strip": [[start, end] for start, end in COMBINING_RANGES]
+                 + [[ord(char), ord(char)] for char in INVISIBLE_CHARS],
+        "folds": LETTER_FOLDS,
+    }
+
+
+def build_search_index(search_docs: Iterable[SearchDoc]) -> Dict[str, Any]:
+    """
+    Индекс из записей молитв в порядке файлов (corpus_scan.scan_file / WordCache.search_docs)
+    docs - [id, url, title] в порядке url, номер молитвы в postings - позиция в docs
+    postings[i] - разности номеров молитв, в которых встречается terms[i]
+    """
+    docs: List[List[Any]] = []
+    postings: Dict[str, List[int]] = {}
+    for search_doc in search_docs:
+        doc = len(docs)
+        docs.append([search_doc.id, search_doc.url, search_doc.title])
+        for term in search_doc.terms:
+            postings.setdefault(term, []).append(doc)
+
+    # Файлы идут в порядке имен, а url совпадает с именем файла, так что номера
+    # в каждом списке уже возрастают
+    terms = sorted(postings)
+    return {
+        "version": SEARCH_INDEX_VERSION,
+        "normalization": normalization_rules(),
+        "docs": docs,
+        "terms": terms,
+        "postings": [delta_encode(postings[term]) for term in terms],
+    }
+
+
+def cached_search_docs(prayers_dir: str = PRAYERS_DIR, jobs: int = 1,
+                       cache_file: str = CACHE_FILE) -> List[SearchDoc]:
+    """Записи молитв из кэша разбора; заново разбираются только измененные файлы"""
+    cache = WordCache(cache_file)
+    try:
+        cache.update(list_prayer_files(prayers_dir), jobs)
+        return cache.search_docs()
+    finally:
+        cache.close()
+
+
+def render_search_index(index: Dict[str, Any]) -> str:
+    """Компактный JSON без пробелов: файл читается сайтом, а не человеком"""
+    return json.dumps(index, ensure_ascii=False, separators=(',', ':'))
+
+
+def save_search_index(search_docs: Iterable[SearchDoc], file_path: str = SEARCH_INDEX_FILE) -> bool:
+    """Собирает и сохраняет индекс, возвращает True, если файл был перезаписан"""
+    text = render_search_index(build_search_index(search_docs))
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    return write_text_if_changed(file_path, text)
+
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Сборка поискового индекса молитв для сайта")
+    parser.add_argument("--output", default=SEARCH_INDEX_FILE,
+                        help=f"куда сохранить индекс (по умолчанию {SEARCH_INDEX_FILE})")
+    parser.add_argument("--check", action="store_true",
+                        help="ничего не записывать, код возврата 1, если индекс устарел")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="количество процессов для разбора измененных файлов (по умолчанию 1)")
+    args = parser.parse_args()
+
+    print("🔎 Собираем поисковый индекс...")
+    index = build_search_index(cached_search_docs(PRAYERS_DIR, args.jobs))
+    text = render_search_index(index)
+    total_postings = sum(len(deltas) for deltas in index["postings"])
+    print(f"Молитв: {len(index['docs'])}, слов: {len(index['terms'])}, записей в индексе: {total_postings}")
+
+    if args.check:
+        current = None
+        if os.path.exists(args.output):
+            with open(args.output, 'r', encoding='utf-8') as f:
+                current = f.read()
+        if current != text:
+            print(f"❌ Индекс {args.output} устарел, запустите search_index.py")
+            sys.exit(1)
+        print("✅ Поисковый индекс актуален")
+        return
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    if write_text_if_changed(args.output, text):
+        print(f"💾 Индекс сохранен: {args.output} ({len(text.encode('utf-8')) // 1024} КБ)")
+    else:
+        print(f"✅ Без изменений: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,11 @@
 import { NextRequest, NextResponse } from 'next/server';
-import { getAllPrayers } from '@/lib/prayers';
+import { getAllPrayerHeaders } from '@/lib/prayers';
 
 export const dynamic = 'force-static';
 
 export async function GET(request: NextRequest) {
     try {
-        const prayers = await getAllPrayers();
+        const prayers = getAllPrayerHeaders();
         const baseUrl = 'https://molitvy365.ru';
 
         // Сортируем молитвы по популярности (можно настроить логику)
@@ -1,9 +1,10 @@
 'use client';
 
-import { useState, useMemo } from 'react';
+import { useState, useMemo, useEffect } from 'react';
 import Link from 'next/link';
 import { Search, Heart, Shield, Users, Clock, Sparkles, BookOpen, X } from 'lucide-react';
 import { PrayerIndex } from '@/types/prayer';
+import { SearchIndex, fetchSearchIndex, searchPrayers } from '@/lib/searchIndex';
 
 interface QuickSearchProps {
     prayerIndex: PrayerIndex;
@@ -22,16 +23,40 @@ const quickSearchPresets = [
 export default function QuickSearch({ prayerIndex }: QuickSearchProps) {
     const [searchQuery, setSearchQuery] = useState('');
     const [selectedPreset, setSelectedPreset] = useState<string | null>(null);
+    const [searchIndex, setSearchIndex] = useState<SearchIndex | null>(null);
+
+    // Полнотекстовый индекс загружается при первом вводе запроса;
+    // пока он не загружен (или не загрузился), ищем по названию и тегам
+    useEffect(() => {
+        if (!searchQuery || searchIndex) {
+            return;
+        }
+        let cancelled = false;
+        fetchSearchIndex()
+            .then(index => {
+                if (!cancelled) {
+                    setSearchIndex(index);
+                }
+            })
+            .catch(() => undefined);
+        return () => {
+            cancelled = true;
+        };
+    }, [searchQuery, searchIndex]);
 
     // Фильтрация молитв
     const { allFilteredPrayers, displayedPrayers } = useMemo(() => {
         let filtered = prayerIndex.prayers;
 
-        // Поиск по названию
+        // Поиск по названию, тегам и (после загрузки индекса) по тексту молитв
         if (searchQuery) {
+            const foundUrls = searchIndex
+                ? new Set(searchPrayers(searchIndex, searchQuery).map(result => result.url))
+                : null;
             filtered = filtered.filter(prayer =>
                 prayer.title.toLowerCase().includes(searchQuery.toLowerCase()) ||
-                prayer.tags.some(tag => tag.toLowerCase().includes(searchQuery.toLowerCase()))
+                prayer.tags.some(tag => tag.toLowerCase().includes(searchQuery.toLowerCase())) ||
+                (foundUrls !== null && foundUrls.has(prayer.url))
             );
         }
 
@@ -51,7 +76,7 @@ export default function QuickSearch({ prayerIndex }: QuickSearchProps) {
             allFilteredPrayers: filtered, // Все найденные молитвы для подсчета
             displayedPrayers: filtered.slice(0, 6) // Первые 6 для отображения
         };
-    }, [searchQuery, selectedPreset, prayerIndex.prayers]);
+    }, [searchQuery, selectedPreset, searchIndex, prayerIndex.prayers]);
 
     const handlePresetClick = (presetName: string) => {
         if (selectedPreset === presetName) {
@@ -87,7 +112,7 @@ export default function QuickSearch({ prayerIndex }: QuickSearchProps) {
                     <Search className="absolute left-4 top-1/2 transform -translate-y-1/2 w-5 h-5 text-gray-400" />
                     <input
                         type="text"
-                        placeholder="Поиск по названию молитвы или тегам..."
+                        placeholder="Поиск по названию, тегам или тексту молитвы..."
                         value={searchQuery}
                         onChange={(e) => {
                             setSearchQuery(e.target.value);
@@ -14,38 +14,107 @@ export function loadPrayer(url: string): Prayer | null {
         const filePath = path.join(process.cwd(), 'data', 'prayers', `${url}.json`);
         const fileContents = fs.readFileSync(filePath, 'utf8');
         return JSON.parse(fileContents);
-    } catch (error) {
+    } catch {
         return null;
     }
 }
 
+function listPrayerFiles(): string[] {
+    const prayersDir = path.join(process.cwd(), 'data', 'prayers');
+    return fs.readdirSync(prayersDir).filter(file => file.endsWith('.json'));
+}
+
+function readPrayerFile(file: string): Prayer {
+    const filePath = path.join(process.cwd(), 'data', 'prayers', file);
+    const fileContents = fs.readFileSync(filePath, 'utf8');
+    return JSON.parse(fileContents);
+}
+
 export function getAllPrayers(): Prayer[] {
+    return listPrayerFiles().map(readPrayerFile);
+}
+
+// Заголовок молитвы без тяжелых полей (content, contentModern, explanation, seoOptimized):
+// payloadFields - непустые вынесенные поля, payloadKeys - все вынесенные поля
+export type PrayerHeader = Omit<Prayer, 'content' | 'contentModern'> & {
+    payloadFields: string[];
+    payloadKeys: string[];
+};
+
+// Как CATALOG_VERSION в prayer_catalog.py
+const CATALOG_VERSION = 2;
+
+interface PrayerCatalog {
+    version: number;
+    sources: Record<string, [number, number]>; // файл -> [размер, mtime в наносекундах]
+    prayers: PrayerHeader[];
+}
+
+// Каталог свежий, если в нем те же файлы молитв с теми же размерами и временем изменения
+// (так же проверяет load_catalog_headers в prayer_catalog.py)
+function isCatalogFresh(catalog: PrayerCatalog, files: string[]): boolean {
+    if (catalog.version !== CATALOG_VERSION || files.length !== Object.keys(catalog.sources).length) {
+        return false;
+    }
     const prayersDir = path.join(process.cwd(), 'data', 'prayers');
-    const files = fs.readdirSync(prayersDir);
+    return files.every(file => {
+        const stamp = catalog.sources[file];
+        if (!stamp) {
+            return false;
+        }
+        const stat = fs.statSync(path.join(prayersDir, file), { bigint: true });
+        // mtime в наносекундах больше 2^53: сравниваем с той же точностью, что дает JSON.parse
+        return Number(stat.size) === stamp[0] && Number(stat.mtimeNs) === stamp[1];
+    });
+}
+
+function readCatalogHeaders(files: string[]): PrayerHeader[] | null {
+    try {
+        const catalogPath = path.join(process.cwd(), 'data', 'catalog', 'headers.json');
+        const catalog = JSON.parse(fs.readFileSync(catalogPath, 'utf8')) as PrayerCatalog;
+        return isCatalogFresh(catalog, files) ? catalog.prayers : null;
+    } catch {
+        return null;
+    }
+}
 
-    return files
-        .filter(file => file.endsWith('.json'))
-        .map(file => {
-            const filePath = path.join(prayersDir, file);
-            const fileContents = fs.readFileSync(filePath, 'utf8');
-            return JSON.parse(fileContents);
-        });
+// Заголовки всех молитв из data/catalog/headers.json (собирается prayer_catalog.py),
+// если каталога нет или он устарел - из самих файлов молитв
+export function getAllPrayerHeaders(): PrayerHeader[] {
+    const files = listPrayerFiles();
+    const headers = readCatalogHeaders(files);
+    if (headers) {
+        return headers;
+    }
+    return files.map(file => {
+        const { content, contentModern, explanation, seoOptimized, ...header } =
+            readPrayerFile(file) as Prayer & { explanation?: string; seoOptimized?: object };
+        const payload = { content, contentModern, explanation, seoOptimized };
+        const payloadKeys = Object.entries(payload)
+            .filter(([, value]) => value !== undefined)
+            .map(([key]) => key);
+        const payloadFields = Object.entries(payload)
+            .filter(([, value]) => value)
+            .map(([key]) => key);
+        return { ...header, url: header.url || file.replace(/\.json$/, ''), payloadFields, payloadKeys };
+    });
 }
 
 // Функция для получения молитвы дня
 export function getPrayerOfTheDay(): Prayer {
-    const prayers = getAllPrayers();
+    // Для выбора нужен только список файлов, читается одна молитва
+    const files = listPrayerFiles();
     const today = new Date();
     const dayOfYear = Math.floor((today.getTime() - new Date(today.getFullYear(), 0, 0).getTime()) / (1000 * 60 * 60 * 24));
 
     // Используем день года как seed для получения стабильной молитвы дня
-    const prayerIndex = dayOfYear % prayers.length;
-    return prayers[prayerIndex];
+    const prayerIndex = dayOfYear % files.length;
+    return readPrayerFile(files[prayerIndex]);
 }
 
 // Функция для получения случайной молитвы
 export function getRandomPrayer(): Prayer {
-    const prayers = getAllPrayers();
-    const randomIndex = Math.floor(Math.random() * prayers.length);
-    return prayers[randomIndex];
+    const files = listPrayerFiles();
+    const randomIndex = Math.floor(Math.random() * files.length);
+    return readPrayerFile(files[randomIndex]);
 }
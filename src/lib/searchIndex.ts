@@ -0,0 +1,115 @@
+// Поисковый индекс собирается скриптом search_index.py в public/data/search-index.json
+export const SEARCH_INDEX_URL = '/data/search-index.json';
+
+export interface SearchIndex {
+    version: number;
+    normalization: {
+        strip: [number, number][];
+        folds: Record<string, string>;
+    };
+    docs: [number, string, string][]; // [id, url, title]
+    terms: string[]; // отсортированы, для поиска по префиксу
+    postings: number[][]; // номера документов разностями
+}
+
+export interface SearchResult {
+    id: number;
+    url: string;
+    title: string;
+}
+
+// Слово - как WORD_RE в corpus_reader.py
+const WORD_RE = /(?<![\p{L}\p{N}_])[а-я]+(?![\p{L}\p{N}_])/gu;
+
+let indexPromise: Promise<SearchIndex> | null = null;
+
+// Загружаем индекс один раз, при первом поиске, а не вместе со страницей
+export function fetchSearchIndex(): Promise<SearchIndex> {
+    if (!indexPromise) {
+        indexPromise = fetch(SEARCH_INDEX_URL).then(response => {
+            if (!response.ok) {
+                throw new Error(`Не удалось загрузить поисковый индекс: ${response.status}`);
+            }
+            return response.json() as Promise<SearchIndex>;
+        });
+        // После ошибки следующий поиск попробует загрузить индекс еще раз
+        indexPromise.catch(() => {
+            indexPromise = null;
+        });
+    }
+    return indexPromise;
+}
+
+// Нормализация запроса теми же правилами, что и текст молитв
+export function normalizeQuery(query: string, index: SearchIndex): string[] {
+    const { strip, folds } = index.normalization;
+    let normalized = '';
+    for (const char of query.toLowerCase()) {
+        const code = char.codePointAt(0) ?? 0;
+        if (strip.some(([start, end]) => code >= start && code <= end)) {
+            continue;
+        }
+        normalized += folds[char] ?? char;
+    }
+    return normalized.match(WORD_RE) ?? [];
+}
+
+function decodePostings(deltas: number[]): number[] {
+    const docs: number[] = [];
+    let current = 0;
+    for (const delta of deltas) {
+        current += delta;
+        docs.push(current);
+    }
+    return docs;
+}
+
+// Первая позиция в отсортированном списке, где terms[i] >= value
+function lowerBound(terms: string[], value: string): number {
+    let low = 0;
+    let high = terms.length;
+    while (low < high) {
+        const middle = (low + high) >> 1;
+        if (terms[middle] < value) {
+            low = middle + 1;
+        } else {
+            high = middle;
+        }
+    }
+    return low;
+}
+
+// Документы со словом term (или со словами, начинающимися с term, если prefix)
+function lookup(index: SearchIndex, term: string, prefix: boolean): Set<number> {
+    const result = new Set<number>();
+    for (let i = lowerBound(index.terms, term); i < index.terms.length; i++) {
+        const candidate = index.terms[i];
+        if (prefix ? !candidate.startsWith(term) : candidate !== term) {
+            break;
+        }
+        decodePostings(index.postings[i]).forEach(doc => result.add(doc));
+    }
+    return result;
+}
+
+// Молитвы, содержащие все слова запроса; последнее слово ищется по префиксу (ввод еще не закончен)
+export function searchPrayers(index: SearchIndex, query: string, limit?: number): SearchResult[] {
+    const words = normalizeQuery(query, index);
+    if (words.length === 0) {
+        return [];
+    }
+
+    let matched = lookup(index, words[words.length - 1], true);
+    for (const word of words.slice(0, -1)) {
+        const docs = lookup(index, word, false);
+        matched = new Set(Array.from(matched).filter(doc => docs.has(doc)));
+    }
+
+    const results = Array.from(matched)
+        .sort((a, b) => a - b)
+        .map(doc => {
+            const [id, url, title] = index.docs[doc];
+            return { id, url, title };
+        });
+    return limit === undefined ? results : results.slice(0, limit);
+}
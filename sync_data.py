@@ -0,0 +1,288 @@
+#!/usr/bin/env python3
+"""
+Синхронизация копий данных по хешам содержимого
+Хеши всех JSON-файлов данных хранятся в манифесте (.cache/data-manifest.json) вместе
+с размером и временем изменения, поэтому повторный запуск перечитывает только измененные файлы.
+Копии обновляются только там, где хеш источника и копии различается. Копия, которую
+правили вручную после последней синхронизации, считается разошедшейся и без --force не трогается.
+При первом запуске истории синхронизации еще нет, поэтому любая отличающаяся копия
+считается разошедшейся: ее нужно проверить и перезаписать с --force. Хеши совпадающих
+и записанных копий становятся историей для следующих запусков
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+from corpus_reader import PRAYERS_DIR, atomic_write_text, list_json_files
+
+MANIFEST_FILE = ".cache/data-manifest.json"
+MANIFEST_VERSION = 1
+
+# Каталоги, файлы которых хешируются (для поиска одинаковых файлов в разных местах)
+DATA_ROOTS = ["data", "public/data", "prayer-app/public/data"]
+
+# Точные копии: источник -> копия. public/data/prayers-index.json сюда не входит -
+# это сокращенный индекс, его собирает build_indexes.py
+MIRRORS = [
+    (PRAYERS_DIR, "public/data/prayers"),
+    ("data/utrennie_molitvy_archive/json", "prayer-app/public/data/utrennie_molitvy_archive/json"),
+]
+
+# Оглавления архивов: в каждом пункте slug из json/ и путь к расширенному тексту guide_path
+ARCHIVE_INDEXES = ["data/utrennie_molitvy_archive/_index.json"]
+
+STATE_SAME = "same"
+STATE_MISSING = "missing"
+STATE_STALE = "stale"
+STATE_DRIFTED = "drifted"
+STATE_ORPHAN = "orphan"
+
+
+def file_hash(file_path: str) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DataManifest:
+    """Хеши файлов данных; хеш пересчитывается, только если изменились размер или время"""
+
+    def __init__(self, manifest_file: str = MANIFEST_FILE):
+        self.manifest_file = manifest_file
+        self.files: Dict[str, List[Any]] = {}   # путь -> [размер, mtime_ns, sha256]
+        self.synced: Dict[str, str] = {}         # копия -> хеш, записанный при последней синхронизации
+        self.has_history = False                 # синхронизация уже запускалась с этим манифестом
+        self.hashed = 0
+        try:
+            with open(manifest_file, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        if data.get("version") == MANIFEST_VERSION:
+            self.files = data.get("files", {})
+            self.synced = data.get("synced", {})
+            self.has_history = "synced" in data
+
+    def hash(self, file_path: str) -> Optional[str]:
+        """Хеш файла или None, если его нет"""
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            self.files.pop(file_path, None)
+            return None
+        cached = self.files.get(file_path)
+        if cached is not None and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        sha = file_hash(file_path)
+        self.files[file_path] = [stat.st_size, stat.st_mtime_ns, sha]
+        self.hashed += 1
+        return sha
+
+    def blobs(self) -> Dict[str, List[str]]:
+        """Хеш -> все пути с таким содержимым"""
+        paths = defaultdict(list)
+        for file_path, (_, _, sha) in sorted(self.files.items()):
+            paths[sha].append(file_path)
+        return dict(paths)
+
+    def save(self):
+        os.makedirs(os.path.dirname(self.manifest_file) or ".", exist_ok=True)
+        data = {
+            "version": MANIFEST_VERSION,
+            "files": dict(sorted(self.files.items())),
+            "synced": dict(sorted(self.synced.items())),
+        }
+        atomic_write_text(self.manifest_file, json.dumps(data, ensure_ascii=False, separators=(',', ':')))
+
+
+def copy_file(source: str, target: str):
+    """Копирует файл атомарно: временный файл рядом с целью, затем os.replace"""
+    directory = os.path.dirname(target) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(target)}.", suffix=".tmp")
+    os.close(fd)
+    try:
+        shutil.copyfile(source, tmp_path)
+        os.chmod(tmp_path, 0o644)
+        os.replace(tmp_path, target)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def plan_mirror(manifest: DataManifest, source_dir: str, target_dir: str) -> List[Tuple[str, str, str]]:
+    """
+    Состояние каждой копии: (состояние, источник, копия)
+    stale - копия совпадает с тем, что записано при прошлой синхронизации, а источник изменился;
+    drifted - копию меняли отдельно от источника; без истории синхронизации (первый запуск)
+    так выглядит любая отличающаяся копия
+    """
+    plan = []
+    expected = set()
+    for source in list_json_files(source_dir):
+        target = os.path.join(target_dir, os.path.relpath(source, source_dir))
+        expected.add(target)
+        source_sha = manifest.hash(source)
+        target_sha = manifest.hash(target)
+        if target_sha is None:
+            state = STATE_MISSING
+        elif target_sha == source_sha:
+            state = STATE_SAME
+        elif manifest.synced.get(target) == target_sha:
+            state = STATE_STALE
+        else:
+            state = STATE_DRIFTED
+        plan.append((state, source, target))
+
+    if os.path.isdir(target_dir):
+        for target in list_json_files(target_dir):
+            if target not in expected:
+                manifest.hash(target)
+                plan.append((STATE_ORPHAN, "", target))
+    return plan
+
+
+def check_archive_index(index_file: str) -> List[str]:
+    """Пункты оглавления архива, которые ссылаются на несуществующие файлы"""
+    try:
+        with open(index_file, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError) as e:
+        return [f"{index_file}: не удалось прочитать ({e})"]
+
+    archive_dir = os.path.dirname(index_file)
+    problems = []
+    items = index.get("items", [])
+    if index.get("count") != len(items):
+        problems.append(f"{index_file}: count={index.get('count')}, а пунктов {len(items)}")
+    for item in items:
+        slug = item.get("slug", "")
+        text_path = os.path.join(archive_dir, "json", f"{slug}.json")
+        if not os.path.isfile(text_path):
+            problems.append(f"{index_file}: {slug} - нет текста {text_path}")
+        guide_path = item.get("guide_path")
+        if guide_path and not os.path.isfile(os.path.join(archive_dir, guide_path)):
+            problems.append(f"{index_file}: {slug} - нет файла {guide_path}")
+    return problems
+
+
+def sync_data(manifest: DataManifest, check: bool = False, force: bool = False,
+              prune: bool = False) -> Dict[str, Any]:
+    """
+    Проверяет все копии и (если не check) обновляет их
+    Разошедшиеся копии перезаписываются только с force, лишние файлы удаляются только с prune
+    """
+    stats = {state: 0 for state in (STATE_SAME, STATE_MISSING, STATE_STALE, STATE_DRIFTED, STATE_ORPHAN)}
+    stats.update({"copied": 0, "copied_bytes": 0, "removed": 0})
+    drifted = []
+    orphans = []
+
+    for source_dir, target_dir in MIRRORS:
+        for state, source, target in plan_mirror(manifest, source_dir, target_dir):
+            stats[state] += 1
+            if state == STATE_DRIFTED and not (force and not check):
+                drifted.append(target)
+            elif state == STATE_ORPHAN and not (prune and not check):
+                orphans.append(target)
+            if check:
+                continue
+
+            if state in (STATE_MISSING, STATE_STALE) or (state == STATE_DRIFTED and force):
+                copy_file(source, target)
+                stats["copied"] += 1
+                stats["copied_bytes"] += os.path.getsize(target)
+                manifest.synced[target] = manifest.hash(target)
+            elif state == STATE_SAME:
+                manifest.synced[target] = manifest.hash(target)
+            elif state == STATE_ORPHAN and prune:
+                os.remove(target)
+                manifest.hash(target)
+                manifest.synced.pop(target, None)
+                stats["removed"] += 1
+
+    for root in DATA_ROOTS:
+        for file_path in list_json_files(root):
+            manifest.hash(file_path)
+
+    # Хеши всех путей, которых больше нет на диске, выбрасываются из манифеста
+    for file_path in list(manifest.files):
+        if not os.path.exists(file_path):
+            del manifest.files[file_path]
+
+    duplicates = {sha: paths for sha, paths in manifest.blobs().items() if len(paths) > 1}
+    stats["duplicate_groups"] = len(duplicates)
+    stats["duplicate_bytes"] = sum(manifest.files[paths[0]][0] * (len(paths) - 1) for paths in duplicates.values())
+    return {
+        "stats": stats,
+        "drifted": drifted,
+        "orphans": orphans,
+        "index_problems": [problem for index_file in ARCHIVE_INDEXES for problem in check_archive_index(index_file)],
+    }
+
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Синхронизация копий данных молитв по хешам содержимого")
+    parser.add_argument("--check", action="store_true",
+                        help="только проверить: код возврата 1, если копии отстают или разошлись")
+    parser.add_argument("--force", action="store_true",
+                        help="перезаписать и разошедшиеся копии (правки в копиях будут потеряны)")
+    parser.add_argument("--prune", action="store_true",
+                        help="удалить из копий файлы, которых нет в источнике")
+    parser.add_argument("--manifest", default=MANIFEST_FILE,
+                        help=f"файл манифеста хешей (по умолчанию {MANIFEST_FILE})")
+    args = parser.parse_args()
+
+    print("🔄 Сверяем копии данных по хешам...")
+    manifest = DataManifest(args.manifest)
+    result = sync_data(manifest, args.check, args.force, args.prune)
+    if not args.check:
+        manifest.save()
+    stats = result["stats"]
+
+    print(f"Совпадают: {stats[STATE_SAME]}, нет копии: {stats[STATE_MISSING]}, "
+          f"устарели: {stats[STATE_STALE]}, разошлись: {stats[STATE_DRIFTED]}, лишние: {stats[STATE_ORPHAN]}")
+    print(f"Перехешировано файлов: {manifest.hashed}")
+    if not args.check:
+        print(f"Скопировано: {stats['copied']} ({stats['copied_bytes'] // 1024} КБ), удалено: {stats['removed']}")
+    if result["drifted"]:
+        hint = "" if args.force else " (перезаписать: --force)"
+        if not manifest.has_history:
+            hint += ", истории синхронизации еще нет - проверьте отличия перед --force"
+        print(f"⚠️  Копии правились отдельно от источника{hint}:")
+        for target in result["drifted"][:10]:
+            print(f"   - {target}")
+        if len(result["drifted"]) > 10:
+            print(f"   ... и еще {len(result['drifted']) - 10}")
+    if result["orphans"]:
+        hint = "" if args.prune else " (удалить: --prune)"
+        print(f"⚠️  В копиях есть файлы без источника{hint}:")
+        for target in result["orphans"]:
+            print(f"   - {target}")
+    for problem in result["index_problems"]:
+        print(f"❌ {problem}")
+    print(f"📊 Одинаковых файлов в разных местах: {stats['duplicate_groups']} групп, "
+          f"{stats['duplicate_bytes'] // 1024} КБ повторов")
+
+    if args.check:
+        out_of_sync = stats[STATE_MISSING] + stats[STATE_STALE] + stats[STATE_DRIFTED] + stats[STATE_ORPHAN]
+        if out_of_sync or result["index_problems"]:
+            print("❌ Копии не совпадают с источниками, запустите sync_data.py")
+            sys.exit(1)
+        print("✅ Все копии совпадают с источниками")
+    else:
+        print(f"✅ Манифест: {args.manifest}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+"""Выравнивание предложений при сильно разном их числе в оригинале и переводе"""
+
+import pytest
+
+from align_translation import STATUS_INCOMPLETE, align_prayer, align_prayer_file, align_segments, segment_text
+
+SENTENCE = "Господи помилуй нас грешных."
+
+
+def text(count: int, sentence: str = SENTENCE) -> str:
+    return " ".join(f"{sentence[:-1]} {number}." for number in range(count))
+
+
+@pytest.mark.parametrize("n, m", [(1, 20), (3, 100), (20, 1), (100, 3)])
+def test_skewed_counts_align(n, m):
+    original, modern = segment_text(text(n)), segment_text(text(m))
+    pairs = align_segments(original, modern)
+    assert pairs is not None
+    assert pairs
+    for o_start, o_end, m_start, m_end, _ in pairs:
+        assert 0 <= o_start < o_end <= n
+        assert 0 <= m_start < m_end <= m
+
+
+def test_unrelated_skewed_texts_report():
+    result = align_prayer(text(3), text(100, "Совсем другие слова здесь."))
+    assert result["aligned"]
+    assert result["coverage"] == 0.0
+
+
+def test_unaligned_file_is_incomplete(tmp_path, monkeypatch):
+    monkeypatch.setattr("align_translation.align_segments", lambda original, modern: None)
+    file_path = tmp_path / "molitva.json"
+    file_path.write_text('{"url": "molitva", "title": "Молитва", "content": "Один. Два.", '
+                         '"contentModern": "Три. Четыре."}', encoding="utf-8")
+    result = align_prayer_file(str(file_path))
+    assert result["status"] == STATUS_INCOMPLETE
+    assert result["error"]
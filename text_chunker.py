@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+"""
+Разбиение длинных текстов молитв на части по границам предложений и абзацев
+Границы находятся одним проходом регулярного выражения, затем предложения
+жадно собираются в части не больше заданного размера (в символах или словах).
+Части могут перекрываться и хранят смещения в исходном тексте, поэтому
+собираются обратно без потерь
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+from typing import Iterator, List, NamedTuple
+
+from corpus_reader import load_prayer
+from text_normalize import COMBINING_CLASS
+
+UNIT_CHARS = "chars"
+UNIT_WORDS = "words"
+
+# Конец предложения или перевод строки (со стоящими за ним знаками, кавычками и скобками)
+# вместе с последующими пробелами: пробелы остаются в конце предыдущего предложения.
+# Выражение начинается с одного класса символов - так regex быстрее ищет кандидатов
+BOUNDARY_RE = re.compile(r'[.!?…\n][.!?…"»”)\]]*\s*')
+# Слово вместе с ударениями, как в archaism_matcher
+WORD_RE = re.compile(rf'(?:\w|[{COMBINING_CLASS}])+')
+SPACE_RE = re.compile(r'\s+')
+
+CHUNK_FIELDS = ('content', 'contentModern')
+
+
+class Chunk(NamedTuple):
+    """Часть текста и ее место в исходном тексте"""
+    index: int
+    start: int   # смещение начала (с перекрытием)
+    end: int     # смещение конца
+    text: str
+
+
+def sentence_spans(text: str) -> List[List[int]]:
+    """Границы предложений [начало, конец) одним проходом; вместе покрывают весь текст"""
+    spans = []
+    start = 0
+    for match in BOUNDARY_RE.finditer(text):
+        if match.end() > start:
+            spans.append([start, match.end()])
+            start = match.end()
+    if start < len(text):
+        spans.append([start, len(text)])
+    return spans
+
+
+def measure(text: str, unit: str) -> int:
+    return len(WORD_RE.findall(text)) if unit == UNIT_WORDS else len(text)
+
+
+def split_oversized(text: str, start: int, end: int, size: int, unit: str) -> List[List[int]]:
+    """Режет предложение длиннее size по пробелам, слово длиннее size в символах - жестко"""
+    cuts = [match.end() for match in SPACE_RE.finditer(text, start, end)]
+    if not cuts or cuts[-1] != end:
+        cuts.append(end)
+
+    pieces = []
+    piece_start = start
+    current = 0
+    word_start = start
+    for cut in cuts:
+        word_size = measure(text[word_start:cut], unit)
+        if current and current + word_size > size:
+            pieces.append([piece_start, word_start])
+            piece_start, current = word_start, 0
+        current += word_size
+        word_start = cut
+    pieces.append([piece_start, end])
+
+    if unit != UNIT_CHARS:
+        return pieces
+    result = []
+    for piece_start, piece_end in pieces:
+        while piece_end - piece_start > size:
+            result.append([piece_start, piece_start + size])
+            piece_start += size
+        result.append([piece_start, piece_end])
+    return result
+
+
+def iter_chunks(text: str, size: int = 1000, unit: str = UNIT_CHARS, overlap: int = 0) -> Iterator[Chunk]:
+    """
+    Отдает части текста не больше size (в символах или словах)
+    overlap - сколько единиц с конца предыдущей части повторяется в начале следующей
+    (целыми предложениями). Время линейно по длине текста.
+    В словах не режется только последовательность без пробелов (например, "17-й" при size=1)
+    """
+    if size <= 0:
+        raise ValueError("Размер части должен быть положительным")
+    if not 0 <= overlap < size:
+        raise ValueError("Перекрытие должно быть меньше размера части")
+
+    if unit == UNIT_CHARS and len(text) <= size:
+        if text:
+            yield Chunk(0, 0, len(text), text)
+        return
+
+    spans = []
+    for start, end in sentence_spans(text):
+        span_size = end - start if unit == UNIT_CHARS else measure(text[start:end], unit)
+        if span_size > size:
+            for piece_start, piece_end in split_oversized(text, start, end, size, unit):
+                piece_size = piece_end - piece_start if unit == UNIT_CHARS else measure(text[piece_start:piece_end], unit)
+                spans.append((piece_start, piece_end, piece_size))
+        else:
+            spans.append((start, end, span_size))
+
+    index = 0
+    first = 0       # первое предложение текущей части
+    current = 0     # размер текущей части
+    for position, (_, _, span_size) in enumerate(spans):
+        if position > first and current + span_size > size:
+            yield Chunk(index, spans[first][0], spans[position - 1][1],
+                        text[spans[first][0]:spans[position - 1][1]])
+            index += 1
+            # Новая часть начинается с хвоста предыдущей размером не больше overlap,
+            # но так, чтобы в нее поместилось следующее предложение
+            next_first = position
+            carried = 0
+            while (next_first - 1 > first and carried + spans[next_first - 1][2] <= overlap
+                   and carried + spans[next_first - 1][2] + span_size <= size):
+                next_first -= 1
+                carried += spans[next_first][2]
+            first = next_first
+            current = carried
+        current += span_size
+    if spans:
+        yield Chunk(index, spans[first][0], spans[-1][1], text[spans[first][0]:spans[-1][1]])
+
+
+def chunk_text(text: str, size: int = 1000, unit: str = UNIT_CHARS, overlap: int = 0) -> List[Chunk]:
+    return list(iter_chunks(text, size, unit, overlap))
+
+
+def join_chunks(chunks: List[Chunk]) -> str:
+    """Собирает исходный текст из частей, перекрытия учитываются по смещениям"""
+    parts = []
+    covered = 0
+    for chunk in chunks:
+        parts.append(chunk.text[max(covered - chunk.start, 0):])
+        covered = chunk.end
+    return "".join(parts)
+
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Разбиение текстов молитв на части для пакетного перевода")
+    parser.add_argument("paths", nargs="+", help="файлы молитв (*.json)")
+    parser.add_argument("--field", choices=CHUNK_FIELDS, default="content",
+                        help="какое поле разбивать (по умолчанию content)")
+    parser.add_argument("--size", type=int, default=1000,
+                        help="максимальный размер части (по умолчанию 1000)")
+    parser.add_argument("--unit", choices=[UNIT_CHARS, UNIT_WORDS], default=UNIT_CHARS,
+                        help="единица размера: символы или слова")
+    parser.add_argument("--overlap", type=int, default=0,
+                        help="перекрытие соседних частей в тех же единицах")
+    parser.add_argument("--output", "-o",
+                        help="записать части в JSONL (url, field, index, start, end, text) вместо вывода сводки")
+    args = parser.parse_args()
+
+    out = open(args.output, 'w', encoding='utf-8') if args.output else None
+    try:
+        for file_path in args.paths:
+            data = load_prayer(file_path)
+            if data is None:
+                continue
+            text = data.get(args.field) or ""
+            url = data.get("url") or os.path.basename(file_path)[:-len('.json')]
+            chunks = chunk_text(text, args.size, args.unit, args.overlap)
+            if join_chunks(chunks) != text:
+                print(f"❌ {url}: части не собираются в исходный текст", file=sys.stderr)
+                sys.exit(1)
+            if out is None:
+                sizes = [measure(chunk.text, args.unit) for chunk in chunks]
+                print(f"{url}: {len(text)} символов, частей {len(chunks)}, "
+                      f"размер {min(sizes, default=0)}-{max(sizes, default=0)} ({args.unit})")
+                continue
+            for chunk in chunks:
+                out.write(json.dumps({"url": url, "field": args.field, **chunk._asdict()},
+                                     ensure_ascii=False) + "\n")
+    finally:
+        if out is not None:
+            out.close()
+    if out is not None:
+        print(f"💾 Части записаны: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Нормализация текста молитв перед разбиением на слова
+Убирает ударения и другие комбинируемые знаки, сводит ё к е и церковнославянские
+буквы к русским. Вся работа делается одной таблицей str.translate
+"""
+
+from typing import Dict, Optional
+
+# Комбинируемые знаки: ударения, титла, выносные буквы
+COMBINING_RANGES = [
+    (0x0300, 0x036F),  # Combining Diacritical Marks (в т.ч. ударение U+0301)
+    (0x0483, 0x0489),  # Cyrillic combining: титло, придыхания
+    (0x1DC0, 0x1DFF),  # Combining Diacritical Marks Supplement
+    (0x2DE0, 0x2DFF),  # Cyrillic Extended-A (выносные буквы)
+    (0xA66F, 0xA67F),  # Cyrillic Extended-B combining
+    (0xFE20, 0xFE2F),  # Combining Half Marks
+]
+
+# Класс символов регулярного выражения для комбинируемых знаков
+COMBINING_CLASS = "".join(f"\\u{start:04x}-\\u{end:04x}" for start, end in COMBINING_RANGES)
+
+# Невидимые символы, разрывающие слова
+INVISIBLE_CHARS = ['\u00ad', '\u200b', '\u200c', '\u200d', '\u2060', '\ufeff']
+
+# Церковнославянские и дореформенные буквы -> современные русские (после lower())
+LETTER_FOLDS = {
+    'ё': 'е',
+    'ѣ': 'е',
+    'є': 'е',
+    'і': 'и',
+    'ї': 'и',
+    'ѵ': 'и',
+    'ѳ': 'ф',
+    'ѡ': 'о',
+    'ѻ': 'о',
+    'ѽ': 'о',
+    'ꙩ': 'о',
+    'ѿ': 'от',
+    'ѧ': 'я',
+    'ꙗ': 'я',
+    'ѫ': 'у',
+    'ѹ': 'у',
+    'ꙋ': 'у',
+    'ѯ': 'кс',
+    'ѱ': 'пс',
+    'ѕ': 'з',
+    'ꙁ': 'з',
+    'ꙃ': 'з',
+}
+
+
+def build_translate_table() -> Dict[int, Optional[str]]:
+    """Собирает таблицу для str.translate"""
+    table: Dict[int, Optional[str]] = {}
+    for start, end in COMBINING_RANGES:
+        for code in range(start, end + 1):
+            table[code] = None
+    for char in INVISIBLE_CHARS:
+        table[ord(char)] = None
+    for char, replacement in LETTER_FOLDS.items():
+        table[ord(char)] = replacement
+    return table
+
+
+TRANSLATE_TABLE = build_translate_table()
+
+
+def normalize_text(text: str) -> str:
+    """Приводит текст к нижнему регистру и нормализует буквы и знаки"""
+    return text.lower().translate(TRANSLATE_TABLE)
+
+
+def normalize_word(word: str) -> str:
+    """Нормализует отдельное слово (например, запись словаря архаизмов)"""
+    return normalize_text(word.strip())
@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Проверка корпуса молитв: схема каждого файла и согласованность между файлами
+Каждый файл сверяется с объявленной схемой PRAYER_SCHEMA. Затем проверяется, что
+relatedPrayers ссылаются на существующие молитвы, id и url уникальны, а индексы
+в data/ совпадают с корпусом. Результаты проверки файлов кэшируются по sha1
+(.cache/validation.sqlite), поэтому повторный запуск проверяет только измененные файлы
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import sys
+from multiprocessing import Pool
+from typing import Any, Dict, List, Tuple
+
+from build_indexes import DAYS_FILE, INDEX_FILE, METADATA_FILE, load_json_if_exists
+from corpus_reader import PRAYERS_DIR, list_prayer_files
+
+CACHE_FILE = ".cache/validation.sqlite"
+
+# Меняется вместе со схемой и правилами проверки файла: старый кэш сбрасывается
+VALIDATOR_VERSION = 1
+
+ERROR = "error"
+WARNING = "warning"
+
+# Схема: тип, [схема элемента] для списка или {поле: (схема, обязательное)} для объекта
+STRING_LIST = [str]
+
+SUMMARY_SCHEMA = {
+    "text": (str, True),
+    "tags": (STRING_LIST, True),
+}
+
+RELATED_SCHEMA = {
+    "id": (int, True),
+    "title": (str, True),
+    "url": (str, True),
+    "commonTags": (STRING_LIST, True),
+}
+
+SEO_SCHEMA = {
+    "title": (str, True),
+    "description": (str, True),
+    "keywords": (STRING_LIST, True),
+    "canonicalUrl": (str, True),
+    "structuredData": (dict, True),
+}
+
+PRAYER_SCHEMA = {
+    "id": (int, True),
+    "title": (str, True),
+    "url": (str, True),
+    "content": (str, True),
+    "originalUrl": (str, False),
+    "createdAt": (str, False),
+    "updatedAt": (str, False),
+    "contentModern": (str, False),
+    "summary": (SUMMARY_SCHEMA, False),
+    "explanation": (str, False),
+    "relatedPrayers": ([RELATED_SCHEMA], False),
+    "seoOptimized": (SEO_SCHEMA, False),
+    "enhancedAt": (str, False),
+    "version": (str, False),
+    "category": (str, False),
+}
+
+# Поля старых поколений файлов: не ошибка, но стоит перенести в summary
+LEGACY_FIELDS = {"tags", "overview", "text", "why", "suitable_for", "duration_estimate_min"}
+
+TIMESTAMP_FIELDS = ("createdAt", "updatedAt", "enhancedAt")
+TIMESTAMP_RE = re.compile(r'^\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(\.\d+)?(Z|[+-]\d{2}:\d{2})$')
+
+CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha1 TEXT NOT NULL,
+    result TEXT NOT NULL
+);
+"""
+
+Issue = Tuple[str, str]
+
+
+def type_name(spec: Any) -> str:
+    if isinstance(spec, list):
+        return "list"
+    if isinstance(spec, dict):
+        return "object"
+    return {int: "int", str: "string", dict: "object", list: "list"}.get(spec, spec.__name__)
+
+
+def check_value(value: Any, spec: Any, path: str, issues: List[Issue]):
+    """Сверяет значение со схемой, ошибки дописывает в issues"""
+    if isinstance(spec, list):
+        if not isinstance(value, list):
+            issues.append((ERROR, f"{path}: ожидался list, получен {type(value).__name__}"))
+            return
+        for i, item in enumerate(value):
+            check_value(item, spec[0], f"{path}[{i}]", issues)
+    elif isinstance(spec, dict):
+        if not isinstance(value, dict):
+            issues.append((ERROR, f"{path}: ожидался object, получен {type(value).__name__}"))
+            return
+        for key, (field_spec, required) in spec.items():
+            if key in value:
+                check_value(value[key], field_spec, f"{path}.{key}" if path else key, issues)
+            elif required:
+                issues.append((ERROR, f"{path}.{key}: нет обязательного поля" if path else f"{key}: нет обязательного поля"))
+    elif spec is int:
+        # bool в Python - подкласс int, но в JSON это другой тип
+        if not isinstance(value, int) or isinstance(value, bool):
+            issues.append((ERROR, f"{path}: ожидался int, получен {type(value).__name__}"))
+    elif not isinstance(value, spec):
+        issues.append((ERROR, f"{path}: ожидался {type_name(spec)}, получен {type(value).__name__}"))
+
+
+def validate_prayer(data: Any, filename: str) -> List[Issue]:
+    """Проверки одного файла, не зависящие от остального корпуса"""
+    issues: List[Issue] = []
+    check_value(data, PRAYER_SCHEMA, "", issues)
+    if not isinstance(data, dict):
+        return issues
+
+    for key in data:
+        if key in LEGACY_FIELDS:
+            issues.append((WARNING, f"{key}: поле старого формата"))
+        elif key not in PRAYER_SCHEMA:
+            issues.append((WARNING, f"{key}: поле не описано в схеме"))
+
+    expected_url = filename[:-len('.json')]
+    if isinstance(data.get("url"), str) and data["url"] != expected_url:
+        issues.append((ERROR, f"url: '{data['url']}' не совпадает с именем файла"))
+    if isinstance(data.get("content"), str) and not data["content"].strip():
+        issues.append((ERROR, "content: пустой текст"))
+
+    for key in TIMESTAMP_FIELDS:
+        value = data.get(key)
+        if isinstance(value, str) and not TIMESTAMP_RE.match(value):
+            issues.append((ERROR, f"{key}: '{value}' не в формате ISO 8601"))
+    created, updated = data.get("createdAt"), data.get("updatedAt")
+    if isinstance(created, str) and isinstance(updated, str) and updated < created:
+        issues.append((WARNING, "updatedAt раньше createdAt"))
+
+    related = data.get("relatedPrayers")
+    if isinstance(related, list):
+        seen = set()
+        for item in related:
+            if not isinstance(item, dict):
+                continue
+            if item.get("url") == data.get("url"):
+                issues.append((ERROR, "relatedPrayers: молитва ссылается сама на себя"))
+            if item.get("url") in seen:
+                issues.append((WARNING, f"relatedPrayers: '{item.get('url')}' повторяется"))
+            seen.add(item.get("url"))
+    return issues
+
+
+def file_sha1(content: bytes) -> str:
+    return hashlib.sha1(content).hexdigest()
+
+
+def check_file(file_path: str) -> Tuple[str, str, Dict[str, Any]]:
+    """
+    Воркер: (путь, sha1, результат)
+    Результат - проблемы файла и сводка (id, url, title, ссылки) для проверок между файлами
+    """
+    with open(file_path, 'rb') as f:
+        content = f.read()
+    filename = os.path.basename(file_path)
+    try:
+        data = json.loads(content)
+    except ValueError as e:
+        return file_path, file_sha1(content), {"issues": [(ERROR, f"некорректный JSON: {e}")], "summary": None}
+
+    summary = None
+    if isinstance(data, dict):
+        related = data.get("relatedPrayers")
+        summary = {
+            "id": data.get("id"),
+            "url": data.get("url"),
+            "title": data.get("title"),
+            "related": [
+                [item.get("id"), item.get("url"), item.get("title")]
+                for item in (related if isinstance(related, list) else [])
+                if isinstance(item, dict)
+            ],
+        }
+    return file_path, file_sha1(content), {"issues": validate_prayer(data, filename), "summary": summary}
+
+
+class ValidationCache:
+    """Результаты проверки файлов по sha1 содержимого"""
+
+    def __init__(self, cache_file: str = CACHE_FILE):
+        cache_dir = os.path.dirname(cache_file)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(cache_file)
+        self.conn.executescript(CACHE_SCHEMA)
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'validator_version'").fetchone()
+        if row is None or row[0] != str(VALIDATOR_VERSION):
+            with self.conn:
+                self.conn.execute("DELETE FROM files")
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('validator_version', ?)",
+                    (str(VALIDATOR_VERSION),),
+                )
+
+    def close(self):
+        self.conn.close()
+
+    def update(self, file_paths: List[str], jobs: int = 1) -> Tuple[Dict[str, Dict[str, Any]], int]:
+        """
+        Возвращает (путь -> результат, сколько файлов проверено заново)
+        Файлы с прежними mtime и размером не читаются, с прежним sha1 - не проверяются
+        """
+        cached = {
+            path: (mtime_ns, size, sha1, result)
+            for path, mtime_ns, size, sha1, result in self.conn.execute(
+                "SELECT path, mtime_ns, size, sha1, result FROM files"
+            )
+        }
+        results: Dict[str, Dict[str, Any]] = {}
+        stats = {}
+        suspects = []
+        for file_path in file_paths:
+            st = os.stat(file_path)
+            stats[file_path] = (st.st_mtime_ns, st.st_size)
+            entry = cached.get(file_path)
+            if entry is not None and entry[:2] == stats[file_path]:
+                results[file_path] = json.loads(entry[3])
+            else:
+                suspects.append(file_path)
+
+        checked = 0
+        with self.conn:
+            for path in set(cached) - set(file_paths):
+                self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+            for path, sha1, result in self._check_files(suspects, jobs):
+                entry = cached.get(path)
+                if entry is not None and entry[2] == sha1:
+                    result = json.loads(entry[3])
+                else:
+                    checked += 1
+                results[path] = result
+                mtime_ns, size = stats[path]
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO files (path, mtime_ns, size, sha1, result) VALUES (?, ?, ?, ?, ?)",
+                    (path, mtime_ns, size, sha1, json.dumps(result, ensure_ascii=False)),
+                )
+        return results, checked
+
+    @staticmethod
+    def _check_files(file_paths: List[str], jobs: int):
+        if jobs <= 1 or len(file_paths) < 2:
+            for file_path in file_paths:
+                yield check_file(file_path)
+            return
+        with Pool(jobs) as pool:
+            yield from pool.imap(check_file, file_paths, chunksize=max(1, len(file_paths) // (jobs * 8)))
+
+
+def is_key(value: Any) -> bool:
+    """id и url из JSON можно сверять между файлами, только если это не список и не объект"""
+    return not isinstance(value, (list, dict))
+
+
+def check_corpus_links(summaries: Dict[str, Dict[str, Any]]) -> Dict[str, List[Issue]]:
+    """Проверки между файлами: уникальность id и url, ссылки relatedPrayers"""
+    issues: Dict[str, List[Issue]] = {}
+    by_url: Dict[str, Dict[str, Any]] = {}
+    id_owners: Dict[Any, str] = {}
+    for filename, summary in summaries.items():
+        for key in ("url", "id"):
+            if not is_key(summary[key]):
+                issues.setdefault(filename, []).append(
+                    (ERROR, f"{key} {json.dumps(summary[key], ensure_ascii=False)} - не число и не строка, "
+                            f"файл не сверяется с другими"))
+        if is_key(summary["url"]):
+            by_url[summary["url"]] = summary
+        if not is_key(summary["id"]):
+            continue
+        owner = id_owners.setdefault(summary["id"], filename)
+        if owner != filename:
+            issues.setdefault(filename, []).append((ERROR, f"id {summary['id']} уже занят файлом {owner}"))
+
+    for filename, summary in summaries.items():
+        for related_id, related_url, related_title in summary["related"]:
+            if not is_key(related_url):
+                issues.setdefault(filename, []).append(
+                    (ERROR, f"relatedPrayers: url {json.dumps(related_url, ensure_ascii=False)} - не строка"))
+                continue
+            target = by_url.get(related_url)
+            if target is None:
+                issues.setdefault(filename, []).append(
+                    (ERROR, f"relatedPrayers: молитвы '{related_url}' нет в корпусе"))
+                continue
+            if target["id"] != related_id:
+                issues.setdefault(filename, []).append(
+                    (ERROR, f"relatedPrayers: у '{related_url}' id {target['id']}, а не {related_id}"))
+            if target["title"] != related_title:
+                issues.setdefault(filename, []).append(
+                    (WARNING, f"relatedPrayers: название '{related_url}' устарело"))
+    return issues
+
+
+def check_index_files(summaries: Dict[str, Dict[str, Any]]) -> Dict[str, List[Issue]]:
+    """Сверяет индексы в data/ с корпусом"""
+    issues: Dict[str, List[Issue]] = {}
+    by_url = {summary["url"]: summary for summary in summaries.values() if is_key(summary["url"])}
+
+    index = load_json_if_exists(INDEX_FILE)
+    if index is not None:
+        entries = index.get("prayers", [])
+        indexed = set()
+        for entry in entries:
+            url = entry.get("url")
+            if not is_key(url):
+                issues.setdefault(INDEX_FILE, []).append(
+                    (ERROR, f"url {json.dumps(url, ensure_ascii=False)} - не строка"))
+                continue
+            indexed.add(url)
+            target = by_url.get(url)
+            if target is None:
+                issues.setdefault(INDEX_FILE, []).append((ERROR, f"'{url}': молитвы нет в корпусе"))
+            elif target["id"] != entry.get("id") or target["title"] != entry.get("title"):
+                issues.setdefault(INDEX_FILE, []).append((ERROR, f"'{url}': id или название не совпадают с файлом"))
+        for url in sorted(set(by_url) - indexed):
+            issues.setdefault(INDEX_FILE, []).append((ERROR, f"'{url}': молитвы нет в индексе"))
+        if index.get("totalPrayers") != len(entries):
+            issues.setdefault(INDEX_FILE, []).append(
+                (ERROR, f"totalPrayers {index.get('totalPrayers')}, а записей {len(entries)}"))
+
+    metadata = load_json_if_exists(METADATA_FILE)
+    if metadata is not None and metadata.get("totalPrayers") != len(by_url):
+        issues.setdefault(METADATA_FILE, []).append(
+            (ERROR, f"totalPrayers {metadata.get('totalPrayers')}, а в корпусе {len(by_url)}"))
+
+    days = load_json_if_exists(DAYS_FILE)
+    if days is not None:
+        missing = sorted({
+            prayer.get("url")
+            for day in days.get("weekDays", {}).values()
+            for prayer in day.get("prayers", [])
+            if is_key(prayer.get("url")) and prayer.get("url") not in by_url
+        })
+        for url in missing:
+            issues.setdefault(DAYS_FILE, []).append((ERROR, f"'{url}': молитвы нет в корпусе"))
+    return issues
+
+
+def validate_corpus(prayers_dir: str = PRAYERS_DIR, jobs: int = 1, use_cache: bool = True,
+                    check_indexes: bool = True) -> Tuple[Dict[str, List[Issue]], int]:
+    """Возвращает (файл -> проблемы, сколько файлов проверено заново)"""
+    file_paths = list_prayer_files(prayers_dir)
+    if use_cache:
+        cache = ValidationCache()
+        try:
+            results, checked = cache.update(file_paths, jobs)
+        finally:
+            cache.close()
+    else:
+        results = {path: result for path, _, result in ValidationCache._check_files(file_paths, jobs)}
+        checked = len(results)
+
+    issues: Dict[str, List[Issue]] = {}
+    summaries = {}
+    for path in file_paths:
+        filename = os.path.basename(path)
+        result = results[path]
+        if result["issues"]:
+            issues[filename] = [tuple(issue) for issue in result["issues"]]
+        if result["summary"] is not None:
+            summaries[filename] = result["summary"]
+
+    for filename, found in check_corpus_links(summaries).items():
+        issues.setdefault(filename, []).extend(found)
+    if check_indexes:
+        issues.update(check_index_files(summaries))
+    return issues, checked
+
+
+def main():
+    """Главная функция"""
+    parser = argparse.ArgumentParser(description="Проверка схемы и согласованности корпуса молитв")
+    parser.add_argument("--jobs", "-j", type=int, default=1,
+                        help="количество процессов для проверки измененных файлов")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="проверить все файлы заново, не используя кэш")
+    parser.add_argument("--no-indexes", action="store_true",
+                        help="не сверять индексы в data/ с корпусом")
+    parser.add_argument("--strict", action="store_true",
+                        help="считать предупреждения ошибками")
+    parser.add_argument("--quiet", "-q", action="store_true",
+                        help="не печатать предупреждения")
+    args = parser.parse_args()
+
+    issues, checked = validate_corpus(PRAYERS_DIR, args.jobs, not args.no_cache, not args.no_indexes)
+
+    errors = warnings = 0
+    for filename in sorted(issues):
+        shown = [(level, message) for level, message in issues[filename]
+                 if level == ERROR or not args.quiet]
+        if shown:
+            print(f"📄 {filename}")
+        for level, message in shown:
+            print(f"  {'❌' if level == ERROR else '⚠️ '} {message}")
+        errors += sum(1 for level, _ in issues[filename] if level == ERROR)
+        warnings += sum(1 for level, _ in issues[filename] if level == WARNING)
+
+    print(f"\n🔍 Проверено заново файлов: {checked}; ошибок: {errors}, предупреждений: {warnings}")
+    if errors or (args.strict and warnings):
+        sys.exit(1)
+    print("✅ Корпус согласован")
+
+
+if __name__ == "__main__":
+    main()
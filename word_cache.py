@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Инкрементальный кэш словаря корпуса молитв (SQLite)
+Хранит частоты слов, частоты сочетаний слов и запись поискового индекса по каждому
+файлу, ключ - путь плюс mtime/размер и sha1 содержимого. При запуске заново разбираются
+только изменившиеся файлы, а общие частоты слов исправляются на разницу между старым
+и новым счетчиком файла. Общих частот сочетаний кэш не хранит: частоты файлов
+вливаются в счетчики Space-Saving (collocations.py), память которых ограничена
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+from collections import Counter
+from multiprocessing import Pool
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from collocations import DEFAULT_CAPACITY, SpaceSaving, merge_ngram_counts, new_sketches
+from corpus_reader import TOKENIZER_VERSION, list_prayer_files
+from corpus_scan import FileScan, SearchDoc, scan_file
+
+CACHE_FILE = ".cache/word_cache.sqlite"
+
+# Меняется вместе с таблицами кэша: старые таблицы удаляются и создаются заново
+CACHE_VERSION = 4
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    sha1 TEXT NOT NULL,
+    field_stats TEXT NOT NULL,
+    counts TEXT NOT NULL,
+    ngrams TEXT NOT NULL,
+    doc TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS words (
+    word TEXT PRIMARY KEY,
+    count INTEGER NOT NULL
+);
+"""
+
+
+def file_sha1(file_path: str) -> str:
+    """Считает sha1 содержимого файла"""
+    with open(file_path, 'rb') as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def hash_and_scan(file_path: str) -> Tuple[str, str, Optional[FileScan]]:
+    """Воркер: возвращает (путь, sha1, результат scan_file)"""
+    return file_path, file_sha1(file_path), scan_file(file_path)
+
+
+class WordCache:
+    """Кэш разбора файлов, общих частот слов и записей поискового индекса"""
+
+    def __init__(self, cache_file: str = CACHE_FILE):
+        cache_dir = os.path.dirname(cache_file)
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+        self.conn = sqlite3.connect(cache_file)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+        self.hashed: List[str] = []     # файлы, прочитанные последним update
+        self._check_version()
+
+    def close(self):
+        self.conn.close()
+
+    def _version(self) -> str:
+        return f"{TOKENIZER_VERSION}.{CACHE_VERSION}"
+
+    def _check_version(self):
+        """Сбрасывает кэш, если изменились токенизатор или таблицы кэша"""
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()
+        if row is None or row[0] != self._version():
+            self.clear()
+        else:
+            self.conn.executescript(SCHEMA)
+
+    def clear(self):
+        """Полностью очищает кэш и создает таблицы текущей версии"""
+        with self.conn:
+            self.conn.execute("DROP TABLE IF EXISTS files")
+            self.conn.execute("DROP TABLE IF EXISTS words")
+            self.conn.execute("DROP TABLE IF EXISTS ngrams")
+            self.conn.execute("DELETE FROM meta")
+        self.conn.executescript(SCHEMA)
+        with self.conn:
+            self.conn.execute("INSERT INTO meta (key, value) VALUES ('version', ?)", (self._version(),))
+
+    def update(self, file_paths: List[str], jobs: int = 1) -> List[Tuple[str, List[Tuple[str, int]]]]:
+        """
+        Приводит кэш в соответствие с file_paths
+        Возвращает [(имя_файла, [(поле, уникальных_слов)])] для заново разобранных файлов
+        """
+        cached: Dict[str, Tuple[int, int, str]] = {
+            path: (mtime_ns, size, sha1)
+            for path, mtime_ns, size, sha1 in self.conn.execute(
+                "SELECT path, mtime_ns, size, sha1 FROM files"
+            )
+        }
+
+        # Кандидаты на перечитывание - файлы, у которых изменились mtime или размер
+        stats = {}
+        suspects = []
+        for file_path in file_paths:
+            st = os.stat(file_path)
+            stats[file_path] = (st.st_mtime_ns, st.st_size)
+            entry = cached.get(file_path)
+            if entry is None or entry[:2] != stats[file_path]:
+                suspects.append(file_path)
+        self.hashed = suspects
+
+        removed = set(cached) - set(file_paths)
+        delta = Counter()
+        rescanned = []
+
+        with self.conn:
+            for path in removed:
+                self._forget(path, delta)
+
+            for path, sha1, result in self._hash_and_scan(suspects, jobs):
+                mtime_ns, size = stats[path]
+                entry = cached.get(path)
+                if entry is not None and entry[2] == sha1:
+                    # Содержимое не изменилось - обновляем только mtime
+                    self.conn.execute(
+                        "UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?",
+                        (mtime_ns, size, path),
+                    )
+                    continue
+
+                if entry is not None:
+                    self._forget(path, delta)
+
+                if result is None:
+                    # Файл не читается - забываем его, чтобы попробовать в следующий раз
+                    continue
+
+                delta.update(result.counts)
+                rescanned.append((result.filename, result.field_stats))
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO files (path, mtime_ns, size, sha1, field_stats, counts, ngrams, doc) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (path, mtime_ns, size, sha1,
+                     json.dumps(result.field_stats, ensure_ascii=False),
+                     json.dumps(result.counts, ensure_ascii=False),
+                     json.dumps(result.ngrams, ensure_ascii=False),
+                     json.dumps(result.doc, ensure_ascii=False)),
+                )
+
+            self._apply_delta(delta)
+
+        return rescanned
+
+    def _hash_and_scan(self, file_paths: List[str], jobs: int):
+        if jobs <= 1 or len(file_paths) < 2:
+            for file_path in file_paths:
+                yield hash_and_scan(file_path)
+            return
+        with Pool(jobs) as pool:
+            yield from pool.imap(hash_and_scan, file_paths, chunksize=max(1, len(file_paths) // (jobs * 8)))
+
+    def _forget(self, path: str, delta: Counter):
+        """Вычитает счетчик файла из разницы и удаляет его запись"""
+        counts, = self.conn.execute("SELECT counts FROM files WHERE path = ?", (path,)).fetchone()
+        delta.subtract(json.loads(counts))
+        self.conn.execute("DELETE FROM files WHERE path = ?", (path,))
+
+    def _apply_delta(self, delta: Counter):
+        """Исправляет общие частоты слов на разницу счетчиков"""
+        changes = [(word, diff) for word, diff in delta.items() if diff]
+        if not changes:
+            return
+        self.conn.executemany(
+            "INSERT INTO words (word, count) VALUES (?, ?) "
+            "ON CONFLICT(word) DO UPDATE SET count = count + excluded.count",
+            changes,
+        )
+        self.conn.execute("DELETE FROM words WHERE count <= 0")
+
+    def word_counts(self) -> Counter:
+        """Возвращает общие частоты слов по корпусу"""
+        return Counter(dict(self.conn.execute("SELECT word, count FROM words")))
+
+    def iter_file_ngrams(self) -> Iterator[Dict[str, int]]:
+        """Частоты сочетаний слов по файлам в порядке путей"""
+        for ngrams, in self.conn.execute("SELECT ngrams FROM files ORDER BY path"):
+            yield json.loads(ngrams)
+
+    def ngram_sketches(self, capacity: int = DEFAULT_CAPACITY) -> Dict[int, SpaceSaving]:
+        """Счетчики Space-Saving, в которые влиты частоты сочетаний всех файлов"""
+        sketches = new_sketches(capacity)
+        for ngrams in self.iter_file_ngrams():
+            merge_ngram_counts(sketches, ngrams)
+        return sketches
+
+    def search_docs(self) -> List[SearchDoc]:
+        """Записи поискового индекса всех файлов в порядке путей"""
+        return [SearchDoc(*json.loads(doc)) for doc, in self.conn.execute("SELECT doc FROM files ORDER BY path")]
+
+
+class CachedCorpus(NamedTuple):
+    """Все, что extract_words.py берет из кэша после обновления"""
+    words: Counter
+    ngrams: Dict[int, SpaceSaving]  # длина сочетания -> счетчики Space-Saving
+    docs: List[SearchDoc]
+    rescanned: List[Tuple[str, List[Tuple[str, int]]]]  # заново разобранные файлы
+    hashed: List[str]   # файлы, прочитанные для сверки sha1 (изменились mtime или размер)
+
+
+def cached_corpus(prayers_dir: str, jobs: int = 1, cache_file: str = CACHE_FILE) -> CachedCorpus:
+    """Обновляет кэш по каталогу молитв и возвращает частоты, записи поиска и заново разобранные файлы"""
+    cache = WordCache(cache_file)
+    try:
+        rescanned = cache.update(list_prayer_files(prayers_dir), jobs)
+        return CachedCorpus(cache.word_counts(), cache.ngram_sketches(), cache.search_docs(), rescanned, cache.hashed)
+    finally:
+        cache.close()
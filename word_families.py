@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Группировка словоформ в семейства по основе
+Простой офлайн-стеммер на правилах: отрезает возвратную частицу и самое длинное
+подходящее окончание русского или церковнославянского слова. Одно решение
+по архаизму применяется ко всему семейству (твой/твоего/твоея/твоею -> тво)
+"""
+
+import os
+from collections import Counter
+from typing import Dict, Iterable, List
+
+from corpus_reader import write_text_if_changed
+
+FAMILIES_FILE = "extracted_words/word_families.txt"
+
+# Основа короче этого не отрезается, короткие слова остаются как есть
+MIN_STEM_LENGTH = 3
+
+REFLEXIVE_SUFFIXES = ('ся', 'сь')
+
+# Окончания, от длинных к коротким. Включены церковнославянские формы:
+# -аго/-яго, -ыя/-ия, -ею/-ою, -ши/-шися, -ахом/-ихом и т.п.
+ENDINGS = sorted({
+    # прилагательные и причастия
+    'ейшего', 'ейшему', 'ейшими', 'ейшая', 'ейшее', 'ейший', 'ейшей', 'ейших', 'ейшую',
+    'ого', 'его', 'ому', 'ему', 'ыми', 'ими', 'аго', 'яго', 'ыя', 'ия',
+    'ая', 'яя', 'ое', 'ее', 'ые', 'ие', 'ый', 'ий', 'ой', 'ей', 'ую', 'юю',
+    'ых', 'их', 'ым', 'им', 'ою', 'ею', 'ея',
+    # существительные
+    'ами', 'ями', 'ием', 'иям', 'иях', 'иями', 'ах', 'ях', 'ом', 'ем', 'ам', 'ям',
+    'ов', 'ев', 'ии', 'ью',
+    # глаголы, в т.ч. церковнославянские формы
+    'ахом', 'ихом', 'ехом', 'аша', 'иша', 'еши', 'иши', 'ешь', 'ишь',
+    'ете', 'ите', 'ет', 'ит', 'ут', 'ют', 'ат', 'ят',
+    'ала', 'ало', 'али', 'ила', 'ило', 'или', 'ел', 'ал', 'ил',
+    'вши', 'ши', 'ти', 'ть', 'чь',
+    # одиночные гласные и знаки
+    'а', 'я', 'о', 'е', 'ы', 'и', 'у', 'ю', 'ь', 'й',
+}, key=lambda ending: (-len(ending), ending))
+
+# Окончания, сгруппированные по длине: на слово не больше шести поисков в множестве
+ENDINGS_BY_LENGTH = [
+    (length, frozenset(ending for ending in ENDINGS if len(ending) == length))
+    for length in sorted({len(ending) for ending in ENDINGS}, reverse=True)
+]
+
+
+def stem_word(word: str) -> str:
+    """Возвращает основу нормализованного слова"""
+    stem = word
+    for suffix in REFLEXIVE_SUFFIXES:
+        if stem.endswith(suffix) and len(stem) - len(suffix) >= MIN_STEM_LENGTH + 1:
+            stem = stem[:-len(suffix)]
+            break
+    for length, endings in ENDINGS_BY_LENGTH:
+        if len(stem) - length >= MIN_STEM_LENGTH and stem[-length:] in endings:
+            return stem[:-length]
+    return stem
+
+
+def build_families(words: Iterable[str]) -> Dict[str, List[str]]:
+    """Группирует слова по основе: основа -> отсортированный список форм"""
+    families: Dict[str, List[str]] = {}
+    for word in words:
+        families.setdefault(stem_word(word), []).append(word)
+    for forms in families.values():
+        forms.sort()
+    return families
+
+
+def save_families_file(word_counter: Counter, file_path: str = FAMILIES_FILE) -> bool:
+    """
+    Сохраняет семейства слов, начиная с самых частых в корпусе
+    Формат строки: основа (вхождений): форма1 форма2 ...
+    Возвращает True, если файл был перезаписан
+    """
+    families = build_families(word_counter)
+    ranked = sorted(
+        families.items(),
+        key=lambda item: (-sum(word_counter[word] for word in item[1]), item[0]),
+    )
+
+    lines = [
+        "# Семейства словоформ (группировка по основе)\n",
+        "# Формат: основа (вхождений): формы через пробел\n",
+        f"# Всего семейств: {len(families)}, словоформ: {len(word_counter)}\n\n",
+    ]
+    for stem, forms in ranked:
+        total = sum(word_counter[word] for word in forms)
+        lines.append(f"{stem} ({total}): {' '.join(forms)}\n")
+
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    return write_text_if_changed(file_path, "".join(lines))